@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - Autopick Benchmarks
+
+Times one team-balancing decision per queue size with each engine:
+
+    loop        the original autopick loop (per-uid lists, `uid not in` scans)
+    brute       brute_force_split - the same criteria on indices
+    numpy       score_splits alone - every split with player 0 on red, vectorized
+    numpy-best  best_split's NumPy path (score_splits + exact tie settling)
+    mitm        best_split's meet-in-the-middle path
+
+Usage:
+    python bench_autopick.py [--sizes 3 4 5 6 7 8] [--rounds 5]
+"""
+
+import argparse
+import random
+import time
+from itertools import combinations
+
+import team_balancer
+from team_balancer import _first_best, brute_force_split, optimal_splits
+
+
+def legacy_autopick(all_players, all_elos, players_per_team):
+    """The autopick_teams loop as it was before team_balancer.py"""
+    best_diff = float('inf')
+    best_red_picks = None
+    best_variance = float('inf')
+    best_win_probability_diff = float('inf')
+    total_elo = sum(all_elos.values())
+
+    for red_picks in combinations(all_players, players_per_team):
+        red_total = sum(all_elos[uid] for uid in red_picks)
+        blue_total = total_elo - red_total
+        diff = abs(red_total - blue_total)
+        red_avg = red_total / players_per_team
+        blue_avg = blue_total / players_per_team
+        red_win_prob = 1 / (1 + 10 ** ((blue_avg - red_avg) / 400))
+        win_prob_diff = abs(red_win_prob - 0.5)
+        red_elos = [all_elos[uid] for uid in red_picks]
+        blue_picks = [uid for uid in all_players if uid not in red_picks]
+        blue_elos = [all_elos[uid] for uid in blue_picks]
+        red_var = sum((elo - red_avg) ** 2 for elo in red_elos) / players_per_team
+        blue_var = sum((elo - blue_avg) ** 2 for elo in blue_elos) / players_per_team
+        total_var = red_var + blue_var
+
+        if diff == 0 and win_prob_diff < 0.01:
+            return red_picks
+
+        if (diff, win_prob_diff, total_var) < (best_diff, best_win_probability_diff, best_variance):
+            best_diff, best_win_probability_diff, best_variance = diff, win_prob_diff, total_var
+            best_red_picks = red_picks
+    return best_red_picks
+
+
+def best_ms(func, rounds):
+    """Best wall time of `rounds` calls, in milliseconds"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench(args):
+    numpy_available = team_balancer.np is not None
+    if not numpy_available:
+        print("NumPy is not installed: numpy columns are skipped")
+
+    engines = ('loop', 'brute', 'numpy', 'numpy-best', 'mitm')
+    print(f"{'size':>6}{'splits':>9}" + ''.join(f"{name:>12}" for name in engines) + "  (best ms)")
+    for per_team in args.sizes:
+        random.seed(per_team)
+        players = [str(100000000000000000 + i) for i in range(2 * per_team)]
+        ratings = {uid: random.uniform(700, 1800) for uid in players}
+        elos = [ratings[uid] for uid in players]
+
+        timings = {
+            'loop': best_ms(lambda: legacy_autopick(players, ratings, per_team), args.rounds),
+            'brute': best_ms(lambda: brute_force_split(elos, per_team), args.rounds),
+            'mitm': best_ms(lambda: _first_best(elos, optimal_splits(elos, per_team)), args.rounds),
+        }
+        if numpy_available:
+            team_balancer.split_matrices(per_team)  # Built once per team size, like in the bot
+            timings['numpy'] = best_ms(lambda: team_balancer.score_splits(elos, per_team), args.rounds)
+            timings['numpy-best'] = best_ms(
+                lambda: _first_best(elos, team_balancer.vectorized_optimal_splits(elos, per_team)), args.rounds)
+
+            # Every engine must agree with the original loop
+            expected = legacy_autopick(players, ratings, per_team)
+            chosen = _first_best(elos, team_balancer.vectorized_optimal_splits(elos, per_team))
+            assert tuple(players[i] for i in chosen) == expected, f"{per_team}v{per_team}: numpy disagrees"
+        assert _first_best(elos, optimal_splits(elos, per_team)) == brute_force_split(elos, per_team)
+
+        splits = len(list(combinations(range(2 * per_team), per_team)))
+        print(f"{per_team:>4}v{per_team:<1}{splits:>9}"
+              + ''.join(f"{timings[name]:>12.2f}" if name in timings else f"{'-':>12}" for name in engines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Autopick team-balancing benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 4, 5, 6, 7, 8],
+                        help="Players per team to benchmark")
+    parser.add_argument('--rounds', type=int, default=5, help="Timed runs per engine (best is reported)")
+    bench(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
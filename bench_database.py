@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - Database Benchmarks
+
+Measures DatabaseManager performance on realistic bot workloads.
+Each benchmark builds its own throwaway database in a temp directory.
+
+Usage:
+    python bench_database.py pool [--rounds 200]
+    python bench_database.py leaderboard [--players 50000] [--lookups 20]
+    python bench_database.py mode-elo [--writes 5000]
+    python bench_database.py records [--players 10000 100000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from database import DatabaseManager
+
+TEAM_SIZE = 8  # 4v4
+SERVER_ID = '123456789012345678'
+
+
+def make_players(db, count, server_id=SERVER_ID):
+    """Register `count` players with random ELOs and return their IDs"""
+    ids = [str(100000000000000000 + i) for i in range(count)]
+    for discord_id in ids:
+        db.register_player(discord_id, server_id, f"user{discord_id[-4:]}", f"Player{discord_id[-4:]}")
+        db.update_player_elo(discord_id, server_id, random.uniform(700, 1800))
+    return ids
+
+
+class CountingDatabase:
+    """Wraps a DatabaseManager and counts public method calls"""
+
+    def __init__(self, db):
+        self._db = db
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+def winner_workload(db, player_ids, server_id=SERVER_ID):
+    """One full .winner report, mirroring the DB calls made by process_winner"""
+    red = player_ids[:TEAM_SIZE // 2]
+    blue = player_ids[TEAM_SIZE // 2:]
+
+    # finish_picking: ratings for the prediction, then record the PUG
+    elos = [db.get_player(uid, server_id)['elo'] for uid in red + blue]
+    avg_red = sum(elos[:len(red)]) / len(red)
+    avg_blue = sum(elos[len(red):]) / len(blue)
+    pug_id = db.add_pug(red, blue, 'default', avg_red, avg_blue, server_id=server_id)
+
+    # report_winner: look the PUG up, then process_winner
+    db.get_recent_pugs(server_id, 20)
+    db.update_pug_winner(pug_id, 'red')
+    db.is_per_mode_elo_enabled('default')
+    for uid in red:
+        db.update_player_stats(uid, server_id, won=True)
+    for uid in blue:
+        db.update_player_stats(uid, server_id, won=False)
+
+    expected_red = 1 / (1 + 10 ** ((avg_blue - avg_red) / 400))
+    for uid in red:
+        player = db.get_player(uid, server_id)
+        db.update_player_elo(uid, server_id, player['elo'] + 32 * (1 - expected_red))
+    for uid in blue:
+        player = db.get_player(uid, server_id)
+        db.update_player_elo(uid, server_id, player['elo'] + 32 * (0 - (1 - expected_red)))
+
+    # Result embed reads every player again
+    for uid in red + blue:
+        db.get_player(uid, server_id)
+
+
+def bench_pool(args):
+    """Per-call overhead of one-connection-per-call vs pooled WAL connections"""
+    workdir = tempfile.mkdtemp(prefix='pug_bench_')
+    try:
+        results = {}
+        for label, pooled in (('per-call connect', False), ('pooled (WAL)', True)):
+            random.seed(1)
+            db = DatabaseManager(os.path.join(workdir, f"{label.split()[0]}.db"), pooled=pooled)
+            db.add_game_mode('default', 'Default', TEAM_SIZE)
+            player_ids = make_players(db, TEAM_SIZE)
+            counter = CountingDatabase(db)
+
+            winner_workload(counter, player_ids)  # Warm-up
+            counter.calls = 0
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                winner_workload(counter, player_ids)
+            elapsed = time.perf_counter() - start
+
+            results[label] = (elapsed, counter.calls, db.pool.opened if db.pool else counter.calls)
+            db.close()
+
+        print(f"Winner-processing workload: {args.rounds} reports, 4v4")
+        print(f"{'mode':<20}{'total s':>10}{'per report ms':>16}{'per call us':>14}{'connections':>13}")
+        for label, (elapsed, calls, opened) in results.items():
+            print(f"{label:<20}{elapsed:>10.3f}{elapsed / args.rounds * 1000:>16.2f}"
+                  f"{elapsed / calls * 1e6:>14.1f}{opened:>13}")
+
+        baseline = results['per-call connect'][0]
+        pooled = results['pooled (WAL)'][0]
+        print(f"\nSpeed-up: {baseline / pooled:.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def naive_leaderboard_position(db, discord_id, server_id=SERVER_ID):
+    """The pre-index rank lookup: load every player, filter, sort and scan"""
+    players = [p for p in db.get_all_players(server_id)
+               if not 1000 <= int(p['discord_id']) < 2000]
+    players.sort(key=lambda p: p['elo'], reverse=True)
+    for i, player in enumerate(players):
+        if player['discord_id'] == str(discord_id):
+            return i + 1, len(players)
+    return None, len(players)
+
+
+def bench_leaderboard(args):
+    """Rank lookups: full sort per call vs the bisect rank index"""
+    workdir = tempfile.mkdtemp(prefix='pug_bench_')
+    try:
+        random.seed(1)
+        db_path = os.path.join(workdir, 'leaderboard.db')
+        db = DatabaseManager(db_path, pooled=True)
+        
+        # Bulk-load synthetic players directly; register_player would dominate setup
+        conn = sqlite3.connect(db_path)
+        conn.executemany('''
+            INSERT INTO players (discord_id, server_id, wins, losses, total_pugs, elo, registered)
+            VALUES (?, ?, 0, 0, 0, ?, 1)
+        ''', [(str(100000000000000000 + i), SERVER_ID, random.uniform(700, 1800))
+              for i in range(args.players)])
+        conn.commit()
+        conn.close()
+        
+        ids = [str(100000000000000000 + random.randrange(args.players)) for _ in range(args.lookups)]
+        
+        start = time.perf_counter()
+        for discord_id in ids:
+            naive_leaderboard_position(db, discord_id)
+        naive = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        db.get_leaderboard_position(ids[0], SERVER_ID)
+        build = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for discord_id in ids:
+            db.get_leaderboard_position(discord_id, SERVER_ID)
+        indexed = time.perf_counter() - start
+        
+        # Rating changes reposition one key each
+        start = time.perf_counter()
+        for discord_id in ids:
+            db.update_player_elo(discord_id, SERVER_ID, random.uniform(700, 1800))
+        updates = time.perf_counter() - start
+        
+        for discord_id in ids[:20]:
+            assert db.get_leaderboard_position(discord_id, SERVER_ID)['position'] == \
+                naive_leaderboard_position(db, discord_id)[0]
+        db.close()
+        
+        print(f"Leaderboard rank lookups: {args.players} players, {args.lookups} lookups")
+        print(f"{'operation':<28}{'total s':>10}{'per call us':>14}")
+        print(f"{'full sort per lookup':<28}{naive:>10.3f}{naive / args.lookups * 1e6:>14.1f}")
+        print(f"{'rank index build (once)':<28}{build:>10.3f}{build * 1e6:>14.1f}")
+        print(f"{'rank index lookup':<28}{indexed:>10.3f}{indexed / args.lookups * 1e6:>14.1f}")
+        print(f"{'ELO update + reposition':<28}{updates:>10.3f}{updates / args.lookups * 1e6:>14.1f}")
+        print(f"\nSpeed-up per lookup: {naive / indexed:.0f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def legacy_mode_result(conn, discord_id, server_id, mode_name, won, new_elo):
+    """The pre-upsert per-mode write: stats read/update, then peak read and INSERT OR REPLACE"""
+    cursor = conn.cursor()
+    key = (discord_id, server_id, mode_name)
+    
+    cursor.execute('''
+        INSERT OR IGNORE INTO player_mode_elos (discord_id, server_id, mode_name, elo, peak_elo)
+        VALUES (?, ?, ?, 1000, 1000)
+    ''', key)
+    cursor.execute('''
+        SELECT wins, losses, current_streak, best_win_streak, best_loss_streak
+        FROM player_mode_elos WHERE discord_id = ? AND server_id = ? AND mode_name = ?
+    ''', key)
+    wins, losses, streak, best_win, best_loss = cursor.fetchone()
+    streak, best_win, best_loss = DatabaseManager._apply_streak(streak, best_win, best_loss,
+                                                                'win' if won else 'loss')
+    cursor.execute('''
+        UPDATE player_mode_elos
+        SET wins = ?, losses = ?, current_streak = ?, best_win_streak = ?, best_loss_streak = ?
+        WHERE discord_id = ? AND server_id = ? AND mode_name = ?
+    ''', (wins + won, losses + (not won), streak, best_win, best_loss, *key))
+    conn.commit()
+    
+    cursor.execute('''
+        SELECT peak_elo FROM player_mode_elos
+        WHERE discord_id = ? AND server_id = ? AND mode_name = ?
+    ''', key)
+    peak_elo = max(cursor.fetchone()[0], new_elo)
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO player_mode_elos
+        (discord_id, server_id, mode_name, elo, peak_elo, wins, losses, current_streak, best_win_streak, best_loss_streak, last_updated)
+        VALUES (?, ?, ?, ?, ?,
+            {', '.join(f"COALESCE((SELECT {column} FROM player_mode_elos WHERE discord_id = ? AND server_id = ? AND mode_name = ?), 0)"
+                       for column in ('wins', 'losses', 'current_streak', 'best_win_streak', 'best_loss_streak'))},
+            CURRENT_TIMESTAMP)
+    ''', (*key, new_elo, peak_elo, *key * 5))
+    conn.commit()
+
+
+def upsert_mode_result(conn, discord_id, server_id, mode_name, won, new_elo):
+    """One MODE_RESULT_UPSERT per result, as settle_pug writes it (streaks are computed in memory beforehand)"""
+    conn.execute(DatabaseManager.MODE_RESULT_UPSERT,
+                 (discord_id, server_id, mode_name, new_elo, new_elo, int(won), int(not won),
+                  1 if won else -1, int(won), int(not won)))
+    conn.commit()
+
+
+def bench_mode_elo(args):
+    """Per-mode result writes: legacy INSERT OR REPLACE path vs one UPSERT"""
+    workdir = tempfile.mkdtemp(prefix='pug_bench_')
+    try:
+        random.seed(1)
+        players = [str(100000000000000000 + i) for i in range(500)]
+        writes = [(random.choice(players), random.random() < 0.5, random.uniform(700, 1800))
+                  for _ in range(args.writes)]
+        
+        results = {}
+        for label, write in (('legacy (7 lookups + REPLACE)', legacy_mode_result),
+                             ('ON CONFLICT DO UPDATE', upsert_mode_result)):
+            db_path = os.path.join(workdir, f"{write.__name__}.db")
+            DatabaseManager(db_path).close()
+            conn = sqlite3.connect(db_path)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            
+            start = time.perf_counter()
+            for discord_id, won, new_elo in writes:
+                write(conn, discord_id, SERVER_ID, 'ctf', won, new_elo)
+            results[label] = time.perf_counter() - start
+            conn.close()
+        
+        print(f"Per-mode rating writes: {args.writes} results over 500 players (commit per write)")
+        print(f"{'path':<32}{'total s':>10}{'per write us':>15}")
+        for label, elapsed in results.items():
+            print(f"{label:<32}{elapsed:>10.3f}{elapsed / args.writes * 1e6:>15.1f}")
+        legacy, upsert = results.values()
+        print(f"\nSpeed-up: {legacy / upsert:.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def legacy_all_players(db, server_id=SERVER_ID):
+    """The pre-record get_all_players: one dict per row with per-field length checks"""
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT discord_id, server_id, discord_name, display_name,
+               wins, losses, total_pugs, elo, peak_elo,
+               ut2k4_player_name, ut2k4_last_scraped, current_streak, registered,
+               best_win_streak, best_loss_streak
+        FROM players
+        WHERE server_id = ?
+    ''', (server_id,))
+    players = []
+    for row in cursor.fetchall():
+        players.append({
+            'discord_id': row[0],
+            'server_id': row[1],
+            'discord_name': row[2],
+            'display_name': row[3],
+            'wins': row[4],
+            'losses': row[5],
+            'total_pugs': row[6],
+            'elo': row[7],
+            'peak_elo': row[8] if len(row) > 8 else row[7],
+            'ut2k4_player_name': row[9] if len(row) > 9 else None,
+            'ut2k4_last_scraped': row[10] if len(row) > 10 else None,
+            'current_streak': row[11] if len(row) > 11 else 0,
+            'registered': row[12] if len(row) > 12 else 0,
+            'best_win_streak': row[13] if len(row) > 13 else 0,
+            'best_loss_streak': row[14] if len(row) > 14 else 0
+        })
+    conn.close()
+    return players
+
+
+def measure(read, rounds=5):
+    """(best wall time of `rounds` reads, bytes held by one read's result)"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        read()
+        best = min(best, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    result = read()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, held
+
+
+def bench_records(args):
+    """get_all_players: per-row dicts vs __slots__ Player records"""
+    workdir = tempfile.mkdtemp(prefix='pug_bench_')
+    try:
+        print(f"{'players':>8}  {'rows as':<16}{'best ms':>10}{'held MB':>10}{'bytes/row':>11}")
+        for count in args.players:
+            random.seed(1)
+            db_path = os.path.join(workdir, f"records{count}.db")
+            db = DatabaseManager(db_path, pooled=True)
+            conn = sqlite3.connect(db_path)
+            conn.executemany('''
+                INSERT INTO players (discord_id, server_id, discord_name, display_name,
+                                     wins, losses, total_pugs, elo, peak_elo, registered)
+                VALUES (?, ?, ?, ?, 0, 0, 0, ?, ?, 1)
+            ''', [(str(100000000000000000 + i), SERVER_ID, f"user{i}", f"Player{i}",
+                   elo, elo) for i, elo in ((i, random.uniform(700, 1800)) for i in range(count))])
+            conn.commit()
+            conn.close()
+            
+            results = {'dict': measure(lambda: legacy_all_players(db)),
+                       'Player record': measure(lambda: db.get_all_players(SERVER_ID))}
+            assert legacy_all_players(db)[:50] == db.get_all_players(SERVER_ID)[:50]
+            db.close()
+            
+            for label, (best, held) in results.items():
+                print(f"{count:>8}  {label:<16}{best * 1000:>10.1f}{held / 2**20:>10.1f}{held / count:>11.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DatabaseManager benchmarks")
+    sub = parser.add_subparsers(dest='benchmark', required=True)
+
+    pool = sub.add_parser('pool', help=bench_pool.__doc__)
+    pool.add_argument('--rounds', type=int, default=200)
+    pool.set_defaults(func=bench_pool)
+    
+    leaderboard = sub.add_parser('leaderboard', help=bench_leaderboard.__doc__)
+    leaderboard.add_argument('--players', type=int, default=50000)
+    leaderboard.add_argument('--lookups', type=int, default=20)
+    leaderboard.set_defaults(func=bench_leaderboard)
+    
+    mode_elo = sub.add_parser('mode-elo', help=bench_mode_elo.__doc__)
+    mode_elo.add_argument('--writes', type=int, default=5000)
+    mode_elo.set_defaults(func=bench_mode_elo)
+    
+    records = sub.add_parser('records', help=bench_records.__doc__)
+    records.add_argument('--players', type=int, nargs='+', default=[10000, 100000])
+    records.set_defaults(func=bench_records)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
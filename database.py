@@ -10,435 +10,244 @@ Bot made for Competitive Gaming Communities to use for Pick Up Games (PUGs)
 Any questions? Please message fallacy on Discord.
 """
 
+import asyncio
+import atexit
+import concurrent.futures
+import os
+import queue
+import re
 import sqlite3
+import threading
 from datetime import datetime
-from typing import Optional, List, Dict, Tuple
+from itertools import groupby
+from typing import Optional, List, Dict, Tuple, Iterator, Iterable
 import json
 
+from migrations import run_migrations
+from leaderboard_index import LeaderboardIndex
+from rating_store import RatingStore
+from records import ModeRating, Player, PugRecord
+
+# Pragmas applied to every pooled connection.
+# WAL lets readers run alongside the writer, and synchronous=NORMAL only
+# fsyncs at checkpoints instead of on every commit (still crash-safe in WAL).
+POOL_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000),      # 16 MB page cache (negative value = KiB)
+    ('mmap_size', 268435456),    # 256 MB memory-mapped reads
+    ('temp_store', 'MEMORY'),
+)
+
+class ConnectionPool:
+    """Pool of long-lived SQLite connections shared by the whole process
+    
+    Connections are opened lazily, tuned once with POOL_PRAGMAS and handed
+    back to the pool instead of being closed. Each checkout gets its own
+    connection, so nested DatabaseManager calls behave exactly like they did
+    with one sqlite3.connect() per call.
+    """
+    
+    def __init__(self, db_path: str, max_idle: int = 4, pragmas=POOL_PRAGMAS):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.pragmas = pragmas
+        self.opened = 0  # Total connections opened (for benchmarks/diagnostics)
+        self._idle = []
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # check_same_thread=False: a connection may be checked out by any thread,
+        # the pool guarantees only one holder at a time
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name} = {value}")
+        self.opened += 1
+        return conn
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Check out an idle connection, opening a new one if none is free"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+    
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool"""
+        # Same semantics as sqlite3 close(): uncommitted work is discarded
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = None
+        conn.set_trace_callback(None)
+        
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+    
+    def close(self):
+        """Close every idle connection (call on shutdown)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+class PooledConnection:
+    """sqlite3.Connection proxy whose close() hands the connection back to the pool"""
+    
+    __slots__ = ('_conn', '_pool')
+    
+    def __init__(self, conn: sqlite3.Connection, pool: ConnectionPool):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_pool', pool)
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+    
+    def __enter__(self):
+        return self._conn.__enter__()
+    
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+    
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            object.__setattr__(self, '_conn', None)
+
+class ModeRegistry:
+    """In-process cache of game_modes, mode_aliases and bot_settings
+    
+    Each section is loaded with one query on first use and kept until a
+    DatabaseManager mutator invalidates it, so configuration lookups on the
+    queue hot path do not touch SQLite.
+    """
+    
+    SECTIONS = ('modes', 'aliases', 'settings')
+    
+    def __init__(self, loader):
+        """
+        Args:
+            loader: Callable taking a section name and returning its data
+        """
+        self._loader = loader
+        self._data = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+    
+    def get(self, section: str) -> Dict:
+        """Cached contents of a section, loading it if needed (treat as read-only)"""
+        data = self._data.get(section)
+        if data is None:
+            with self._lock:
+                generation = self._generation
+            data = self._loader(section)
+            with self._lock:
+                # Don't cache a load that raced with an invalidation
+                if generation == self._generation:
+                    self._data[section] = data
+        return data
+    
+    def invalidate(self, *sections: str):
+        """Drop the given sections (all of them if none are given)"""
+        with self._lock:
+            self._generation += 1
+            for section in sections or self.SECTIONS:
+                self._data.pop(section, None)
+
 class DatabaseManager:
-    def __init__(self, db_path='pug_data.db'):
+    persistent = True  # Data survives restarts (see storage.StorageBackend)
+    
+    def __init__(self, db_path='pug_data.db', pooled: bool = False, pool_size: int = 4,
+                 rating_cache_size: int = 5000, archive_path: str = None):
+        """
+        Args:
+            db_path: SQLite database file
+            pooled: Reuse long-lived WAL connections instead of opening one per call
+            pool_size: Maximum number of idle connections kept open in pooled mode
+            rating_cache_size: Maximum number of ratings kept in the write-behind RatingStore
+            archive_path: Cold-storage database for old PUGs (pug_archive.db next to db_path if None)
+        """
         self.db_path = db_path
+        self.archive_path = archive_path or os.path.join(os.path.dirname(os.path.abspath(db_path)),
+                                                         'pug_archive.db')
+        self.pool = ConnectionPool(db_path, max_idle=pool_size) if pooled else None
+        self.profiler = None  # QueryProfiler while profiling is attached (see profiler.py)
+        self.modes = ModeRegistry(self._load_config_section)
+        self.ratings = RatingStore(self, capacity=rating_cache_size)
+        self.leaderboard = LeaderboardIndex(self)
+        self._archive_misses = set()  # (watermark, where, params) the archive had nothing for
+        self._archive_misses_through = None
+        self.ratings.listeners.append(self.leaderboard)
         self.init_database()
+        
+        # Pending rating changes must reach the disk even if close() is never called
+        atexit.register(self.close)
     
     def get_connection(self):
-        """Get a database connection"""
-        return sqlite3.connect(self.db_path)
-    
-    def init_database(self):
-        """Initialize the database schema"""
+        """Get a database connection
+        
+        In pooled mode the returned connection goes back to the pool on close().
+        """
+        if self.pool:
+            conn = PooledConnection(self.pool.acquire(), self.pool)
+        else:
+            conn = sqlite3.connect(self.db_path)
+        if self.profiler:
+            conn = self.profiler.connection(conn)
+        return conn
+    
+    def close(self):
+        """Flush pending rating changes and release pooled connections"""
+        self.ratings.close()
+        if self.pool:
+            self.pool.close()
+    
+    def flush(self):
+        """Write pending (write-behind) rating changes to the database now"""
+        self.ratings.flush()
+    
+    def _load_config_section(self, section: str) -> Dict:
+        """Read one ModeRegistry section from the database"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Players table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS players (
-                discord_id TEXT,
-                server_id TEXT,
-                discord_name TEXT,
-                display_name TEXT,
-                wins INTEGER DEFAULT 0,
-                losses INTEGER DEFAULT 0,
-                total_pugs INTEGER DEFAULT 0,
-                elo REAL DEFAULT 1000,
-                ut2k4_player_name TEXT,
-                ut2k4_last_scraped TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (discord_id, server_id)
-            )
-        ''')
-        
-        # Migration: Add discord_name and display_name columns if they don't exist
-        try:
-            cursor.execute("SELECT discord_name FROM players LIMIT 1")
-        except:
-            print("⚠️  Adding discord_name and display_name columns to players table...")
-            cursor.execute("ALTER TABLE players ADD COLUMN discord_name TEXT")
-            cursor.execute("ALTER TABLE players ADD COLUMN display_name TEXT")
-            conn.commit()
-            print("✅ Added discord_name and display_name columns")
-        
-        # Migration: Add server_id to players if it doesn't exist
-        try:
-            cursor.execute("SELECT server_id FROM players LIMIT 1")
-        except:
-            # Column doesn't exist, need to migrate
-            print("⚠️  Migrating players table to add server_id...")
-            print("   This migration PRESERVES all existing player data!")
-            
-            # Get existing players with ALL columns
-            cursor.execute("SELECT * FROM players")
-            old_players = cursor.fetchall()
-            
-            # Get column names
-            cursor.execute("PRAGMA table_info(players)")
-            old_columns = [col[1] for col in cursor.fetchall()]
-            
-            print(f"   Found {len(old_players)} players to migrate...")
-            
-            # Rename old table
-            cursor.execute("ALTER TABLE players RENAME TO players_old")
-            
-            # Create new table with server_id
-            cursor.execute('''
-                CREATE TABLE players (
-                    discord_id TEXT,
-                    server_id TEXT,
-                    discord_name TEXT,
-                    display_name TEXT,
-                    wins INTEGER DEFAULT 0,
-                    losses INTEGER DEFAULT 0,
-                    total_pugs INTEGER DEFAULT 0,
-                    elo REAL DEFAULT 1000,
-                    ut2k4_player_name TEXT,
-                    ut2k4_last_scraped TEXT,
-                    peak_elo REAL,
-                    current_streak INTEGER DEFAULT 0,
-                    best_win_streak INTEGER DEFAULT 0,
-                    best_loss_streak INTEGER DEFAULT 0,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (discord_id, server_id)
-                )
-            ''')
-            
-            # Migrate data - need to assign a default server_id
-            # Use 'default' as server_id for all existing players
-            print("   Migrating player data with server_id='default'...")
-            
-            # Build insert based on old columns
-            for old_player in old_players:
-                # Map old columns to values
-                player_dict = dict(zip(old_columns, old_player))
-                
-                cursor.execute('''
-                    INSERT INTO players 
-                    (discord_id, server_id, discord_name, display_name, wins, losses, total_pugs, 
-                     elo, ut2k4_player_name, ut2k4_last_scraped, peak_elo, current_streak, 
-                     best_win_streak, best_loss_streak, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    player_dict.get('discord_id'),
-                    'default',  # Default server_id for migrated players
-                    player_dict.get('discord_name'),
-                    player_dict.get('display_name'),
-                    player_dict.get('wins', 0),
-                    player_dict.get('losses', 0),
-                    player_dict.get('total_pugs', 0),
-                    player_dict.get('elo', 1000),
-                    player_dict.get('ut2k4_player_name'),
-                    player_dict.get('ut2k4_last_scraped'),
-                    player_dict.get('peak_elo', player_dict.get('elo', 1000)),
-                    player_dict.get('current_streak', 0),
-                    player_dict.get('best_win_streak', 0),
-                    player_dict.get('best_loss_streak', 0),
-                    player_dict.get('created_at')
-                ))
-            
-            # Drop old table
-            cursor.execute("DROP TABLE players_old")
-            
-            conn.commit()
-            print(f"✅ Players table migrated successfully!")
-            print(f"   {len(old_players)} players migrated with server_id='default'")
-            print(f"   All ELOs, stats, and player data PRESERVED!")
-
-        # Migration: Add current_streak column if it doesn't exist
-        try:
-            cursor.execute("SELECT current_streak FROM players LIMIT 1")
-        except:
-            print("⚠️  Adding current_streak column to players table...")
-            cursor.execute("ALTER TABLE players ADD COLUMN current_streak INTEGER DEFAULT 0")
-            conn.commit()
-            print("✅ Added current_streak column")
-        
-        # Migration: Add peak_elo column if it doesn't exist
-        try:
-            cursor.execute("SELECT peak_elo FROM players LIMIT 1")
-        except:
-            print("⚠️  Adding peak_elo column to players table...")
-            cursor.execute("ALTER TABLE players ADD COLUMN peak_elo REAL DEFAULT 1000")
-            # Update existing players' peak_elo to their current ELO
-            cursor.execute("UPDATE players SET peak_elo = elo WHERE peak_elo IS NULL OR peak_elo < elo")
-            conn.commit()
-            print("✅ Added peak_elo column")
-        
-        # Migration already completed - peak_elo values have been reset
-        # Skipping to avoid UNIQUE constraint error
-        reset_done = True  # Force skip
-        
-        # if not reset_done:
-        #     print("⚠️  Resetting all peak_elo values to current ELO (one-time fix)...")
-        #     cursor.execute("UPDATE players SET peak_elo = elo")
-        #     fixed_count = cursor.rowcount
-        #     cursor.execute("INSERT INTO migrations (name) VALUES ('reset_peak_v2')")
-        #     conn.commit()
-        #     print(f"✅ Reset peak_elo for {fixed_count} player(s) - will track correctly going forward")
-        
-        # Migration: Add registered column if it doesn't exist
-        try:
-            cursor.execute("SELECT registered FROM players LIMIT 1")
-        except:
-            print("⚠️  Adding registered column to players table...")
-            cursor.execute("ALTER TABLE players ADD COLUMN registered INTEGER DEFAULT 0")
-            # Mark existing players (who have played PUGs) as registered
-            cursor.execute("UPDATE players SET registered = 1 WHERE total_pugs > 0")
-            conn.commit()
-            print("✅ Added registered column")
-        
-        # Migration: Add best_win_streak column if it doesn't exist
-        try:
-            cursor.execute("SELECT best_win_streak FROM players LIMIT 1")
-        except:
-            print("⚠️  Adding best_win_streak column to players table...")
-            cursor.execute("ALTER TABLE players ADD COLUMN best_win_streak INTEGER DEFAULT 0")
-            conn.commit()
-            print("✅ Added best_win_streak column")
-        
-        # Migration: Add best_loss_streak column if it doesn't exist
-        try:
-            cursor.execute("SELECT best_loss_streak FROM players LIMIT 1")
-        except:
-            print("⚠️  Adding best_loss_streak column to players table...")
-            cursor.execute("ALTER TABLE players ADD COLUMN best_loss_streak INTEGER DEFAULT 0")
-            conn.commit()
-            print("✅ Added best_loss_streak column")
-        
-        # PUGs table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pugs (
-                pug_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                game_mode TEXT NOT NULL,
-                winner TEXT,
-                avg_red_elo REAL,
-                avg_blue_elo REAL,
-                status TEXT DEFAULT 'active',
-                tiebreaker_map TEXT,
-                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Migration: Add status column if it doesn't exist (for existing databases)
-        try:
-            cursor.execute("SELECT status FROM pugs LIMIT 1")
-        except:
-            # Column doesn't exist, add it
-            cursor.execute("ALTER TABLE pugs ADD COLUMN status TEXT DEFAULT 'active'")
-            conn.commit()
-            print("✅ Database migration: Added 'status' column to pugs table")
-        
-        # Migration: Add tiebreaker_map column if it doesn't exist
-        try:
-            cursor.execute("SELECT tiebreaker_map FROM pugs LIMIT 1")
-        except:
-            cursor.execute("ALTER TABLE pugs ADD COLUMN tiebreaker_map TEXT")
-            conn.commit()
-            print("✅ Database migration: Added 'tiebreaker_map' column to pugs table")
-        
-        # Migration: Add captain columns if they don't exist
-        try:
-            cursor.execute("SELECT red_captain FROM pugs LIMIT 1")
-        except:
-            cursor.execute("ALTER TABLE pugs ADD COLUMN red_captain TEXT")
-            conn.commit()
-            print("✅ Database migration: Added 'red_captain' column to pugs table")
-        
-        try:
-            cursor.execute("SELECT blue_captain FROM pugs LIMIT 1")
-        except:
-            cursor.execute("ALTER TABLE pugs ADD COLUMN blue_captain TEXT")
-            conn.commit()
-            print("✅ Database migration: Added 'blue_captain' column to pugs table")
-        
-        # PUG teams table (many-to-many relationship)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pug_teams (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pug_id INTEGER NOT NULL,
-                discord_id TEXT NOT NULL,
-                team TEXT NOT NULL,
-                FOREIGN KEY (pug_id) REFERENCES pugs (pug_id),
-                FOREIGN KEY (discord_id) REFERENCES players (discord_id)
-            )
-        ''')
-        
-        # Timeouts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS timeouts (
-                discord_id TEXT PRIMARY KEY,
-                timeout_end TEXT NOT NULL,
-                FOREIGN KEY (discord_id) REFERENCES players (discord_id)
-            )
-        ''')
-        
-        # PUG Admins table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pug_admins (
-                discord_id TEXT,
-                server_id TEXT,
-                PRIMARY KEY (discord_id, server_id)
-            )
-        ''')
-        
-        # Migration: Add server_id column if it doesn't exist
-        try:
-            cursor.execute("SELECT server_id FROM pug_admins LIMIT 1")
-        except:
-            # Column doesn't exist, need to migrate
-            print("⚠️  Migrating pug_admins table to add server_id...")
-            
-            # Get existing admins
-            cursor.execute("SELECT discord_id FROM pug_admins")
-            old_admins = cursor.fetchall()
-            
-            print(f"   Found {len(old_admins)} admins to migrate...")
-            
-            # Rename old table
-            cursor.execute("ALTER TABLE pug_admins RENAME TO pug_admins_old")
-            
-            # Create new table
+        if section == 'modes':
             cursor.execute('''
-                CREATE TABLE pug_admins (
-                    discord_id TEXT,
-                    server_id TEXT,
-                    PRIMARY KEY (discord_id, server_id)
-                )
+                SELECT mode_name, display_name, team_size, description,
+                       per_mode_elo_enabled, elo_prefix, tiebreaker_enabled
+                FROM game_modes
+                ORDER BY team_size DESC
             ''')
-            
-            # Re-add old admins with default server_id
-            print("   Migrating admins with server_id='default'...")
-            for admin in old_admins:
-                cursor.execute('''
-                    INSERT INTO pug_admins (discord_id, server_id)
-                    VALUES (?, ?)
-                ''', (admin[0], 'default'))
-            
-            # Drop old table
-            cursor.execute("DROP TABLE pug_admins_old")
-            
-            conn.commit()
-            print(f"✅ Database migration: Added 'server_id' to pug_admins table")
-            print(f"   {len(old_admins)} admins migrated with server_id='default'")
-            print(f"   All admin permissions PRESERVED!")
-        
-        # Game Modes table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS game_modes (
-                mode_name TEXT PRIMARY KEY,
-                display_name TEXT NOT NULL,
-                team_size INTEGER NOT NULL,
-                description TEXT,
-                per_mode_elo_enabled INTEGER DEFAULT 0,
-                elo_prefix TEXT,
-                tiebreaker_enabled INTEGER DEFAULT 1
-            )
-        ''')
-        
-        # Migration: Add elo_prefix column if it doesn't exist
-        try:
-            cursor.execute("SELECT elo_prefix FROM game_modes LIMIT 1")
-        except:
-            cursor.execute("ALTER TABLE game_modes ADD COLUMN elo_prefix TEXT")
-            conn.commit()
-            print("✅ Database migration: Added 'elo_prefix' column to game_modes table")
-        
-        # Migration: Add per_mode_elo_enabled column if it doesn't exist
-        try:
-            cursor.execute("SELECT per_mode_elo_enabled FROM game_modes LIMIT 1")
-        except:
-            cursor.execute("ALTER TABLE game_modes ADD COLUMN per_mode_elo_enabled INTEGER DEFAULT 0")
-            conn.commit()
-            print("✅ Database migration: Added 'per_mode_elo_enabled' column to game_modes table")
-        
-        # Migration: Add tiebreaker_enabled column if it doesn't exist
-        try:
-            cursor.execute("SELECT tiebreaker_enabled FROM game_modes LIMIT 1")
-        except:
-            cursor.execute("ALTER TABLE game_modes ADD COLUMN tiebreaker_enabled INTEGER DEFAULT 1")
-            conn.commit()
-            print("✅ Database migration: Added 'tiebreaker_enabled' column to game_modes table")
-        
-        # Mode Aliases table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS mode_aliases (
-                alias TEXT PRIMARY KEY,
-                mode_name TEXT NOT NULL,
-                FOREIGN KEY (mode_name) REFERENCES game_modes(mode_name) ON DELETE CASCADE
-            )
-        ''')
-        
-        # Player Mode ELOs table - separate ELO per mode per player
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS player_mode_elos (
-                discord_id TEXT,
-                server_id TEXT,
-                mode_name TEXT,
-                elo REAL DEFAULT 1000,
-                wins INTEGER DEFAULT 0,
-                losses INTEGER DEFAULT 0,
-                peak_elo REAL DEFAULT 1000,
-                current_streak INTEGER DEFAULT 0,
-                best_win_streak INTEGER DEFAULT 0,
-                best_loss_streak INTEGER DEFAULT 0,
-                last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (discord_id, server_id, mode_name),
-                FOREIGN KEY (mode_name) REFERENCES game_modes(mode_name) ON DELETE CASCADE
-            )
-        ''')
-        
-        # Maps table - store maps per mode/prefix
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS maps (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                server_id TEXT NOT NULL,
-                mode_prefix TEXT NOT NULL,
-                map_name TEXT NOT NULL,
-                added_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(server_id, mode_prefix, map_name)
-            )
-        ''')
-        
-        # Map cooldowns table - track recently used maps per server
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS map_cooldowns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                server_id TEXT NOT NULL,
-                mode_prefix TEXT NOT NULL,
-                map_name TEXT NOT NULL,
-                used_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Bot Settings table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bot_settings (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL
-            )
-        ''')
-        
-        # NOTE: No default game modes are created
-        # Admins must create game modes with .addmode command
-        # Example: .addmode 4v4 8 (creates a 4v4 mode with 8 total players)
-        
-        # Initialize scraping setting
-        cursor.execute('''
-            INSERT OR IGNORE INTO bot_settings (key, value)
-            VALUES ('scraping_enabled', 'false')
-        ''')
-        
-        # Initialize per-mode ELO setting
-        cursor.execute('''
-            INSERT OR IGNORE INTO bot_settings (key, value)
-            VALUES ('per_mode_elo_enabled', 'false')
-        ''')
-        
-        # Initialize pug counter
-        cursor.execute('''
-            INSERT OR IGNORE INTO bot_settings (key, value)
-            VALUES ('pug_counter', '0')
-        ''')
+            data = {row[0]: {
+                'name': row[1],
+                'team_size': row[2],
+                'description': row[3],
+                'per_mode_elo_enabled': row[4] == 1,
+                'elo_prefix': row[5] or None,
+                'tiebreaker_enabled': row[6] == 1 if row[6] is not None else True
+            } for row in cursor.fetchall()}
+        elif section == 'aliases':
+            cursor.execute('SELECT alias, mode_name FROM mode_aliases')
+            data = dict(cursor.fetchall())
+        else:
+            cursor.execute('SELECT key, value FROM bot_settings')
+            data = dict(cursor.fetchall())
         
-        conn.commit()
         conn.close()
+        return data
+    
+    def init_database(self):
+        """Initialize the database schema (applies pending migrations)"""
+        conn = self.get_connection()
+        try:
+            run_migrations(conn)
+        finally:
+            conn.close()
     
     # Player operations
     def get_player(self, discord_id: str, server_id: str = None) -> Dict:
@@ -450,33 +259,19 @@ class DatabaseManager:
         if not server_id:
             raise ValueError("server_id is required for get_player")
         
-        cursor.execute('''
-            SELECT discord_id, server_id, discord_name, display_name, 
-                   wins, losses, total_pugs, elo, 
-                   ut2k4_player_name, ut2k4_last_scraped, current_streak, registered, peak_elo
+        cursor.row_factory = Player.row_factory
+        cursor.execute(f'''
+            SELECT {Player.COLUMNS}
             FROM players 
             WHERE discord_id = ? AND server_id = ?
         ''', (str(discord_id), str(server_id)))
-        row = cursor.fetchone()
+        player = cursor.fetchone()
         
-        if row:
-            player = {
-                'discord_id': row[0],
-                'server_id': row[1],
-                'discord_name': row[2],
-                'display_name': row[3],
-                'wins': row[4],
-                'losses': row[5],
-                'total_pugs': row[6],
-                'elo': row[7],
-                'ut2k4_player_name': row[8],
-                'ut2k4_last_scraped': row[9],
-                'current_streak': row[10] if len(row) > 10 else 0,
-                'registered': row[11] if len(row) > 11 else 0,
-                'peak_elo': row[12] if len(row) > 12 else row[7]
-            }
-        else:
-            player = None
+        if player is not None:
+            # Unflushed rating changes take precedence over the row
+            cached = self.ratings.peek(server_id, discord_id)
+            if cached:
+                player.update(cached)
         
         conn.close()
         return player
@@ -507,22 +302,11 @@ class DatabaseManager:
             VALUES (?, ?, ?, ?, 0, 0, 0, 1000, 0, 1, NULL)
         ''', (str(discord_id), str(server_id), discord_name, display_name))
         conn.commit()
+        self.ratings.invalidate(server_id, [discord_id])
         
-        player = {
-            'discord_id': str(discord_id),
-            'server_id': str(server_id),
-            'discord_name': discord_name,
-            'display_name': display_name,
-            'wins': 0,
-            'losses': 0,
-            'total_pugs': 0,
-            'elo': 1000.0,
-            'ut2k4_player_name': None,
-            'ut2k4_last_scraped': None,
-            'current_streak': 0,
-            'registered': 1,
-            'peak_elo': None
-        }
+        player = Player(str(discord_id), str(server_id), discord_name, display_name,
+                        wins=0, losses=0, total_pugs=0, elo=1000.0, peak_elo=None,
+                        current_streak=0, registered=1, best_win_streak=0, best_loss_streak=0)
         
         conn.close()
         return player
@@ -587,81 +371,146 @@ class DatabaseManager:
             cursor.execute('DELETE FROM players WHERE discord_id = ? AND server_id = ?', 
                           (str(discord_id), str(server_id)))
             conn.commit()
+            self.ratings.invalidate(server_id, [discord_id])
         
         conn.close()
         return exists
     
-    def update_player_stats(self, discord_id: str, server_id: str, won: bool):
-        """Update player win/loss stats and streak (server-scoped)"""
+    def delete_players(self, server_id: str, discord_ids: List[str] = None) -> int:
+        """Delete several players of a server in one transaction (every player if discord_ids is None)
+        
+        Returns:
+            int: Number of players deleted
+        """
+        server_id = str(server_id)
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Get current streak and best streaks
-        cursor.execute('''
-            SELECT current_streak, best_win_streak, best_loss_streak 
-            FROM players 
-            WHERE discord_id = ? AND server_id = ?
-        ''', (str(discord_id), str(server_id)))
-        result = cursor.fetchone()
-        current_streak = result[0] if result and result[0] is not None else 0
-        best_win_streak = result[1] if result and len(result) > 1 and result[1] is not None else 0
-        best_loss_streak = result[2] if result and len(result) > 2 and result[2] is not None else 0
+        if discord_ids is None:
+            cursor.execute('DELETE FROM players WHERE server_id = ?', (server_id,))
+            deleted = cursor.rowcount
+        else:
+            deleted = 0
+            for discord_id in discord_ids:
+                cursor.execute('DELETE FROM players WHERE discord_id = ? AND server_id = ?',
+                               (str(discord_id), server_id))
+                deleted += cursor.rowcount
+        conn.commit()
+        conn.close()
+        
+        self.ratings.invalidate(server_id, None if discord_ids is None else list(discord_ids))
+        return deleted
+    
+    # Counters reset_player_stats may clear
+    RESETTABLE_STATS = ('wins', 'losses', 'total_pugs')
+    
+    def reset_player_stats(self, server_id: str, fields: Tuple[str, ...] = ('wins', 'losses')) -> int:
+        """Set the given counters (of RESETTABLE_STATS) to 0 for every player of a server
+        
+        Returns:
+            int: Number of players reset
+        """
+        invalid = [field for field in fields if field not in self.RESETTABLE_STATS]
+        if invalid or not fields:
+            raise ValueError(f"Can't reset {', '.join(invalid) or 'nothing'}")
+        
+        server_id = str(server_id)
+        self.ratings.flush()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            UPDATE players
+            SET {', '.join(f'{field} = 0' for field in fields)}
+            WHERE server_id = ?
+        ''', (server_id,))
+        affected = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        self.ratings.invalidate(server_id)
+        return affected
+    
+    def update_player_stats(self, discord_id: str, server_id: str, won: bool):
+        """Update player win/loss stats and streak (server-scoped, write-behind)"""
+        player = self.ratings.get(server_id, discord_id)
+        if not player:
+            return
+        
+        current_streak = player['current_streak'] or 0
+        best_win_streak = player['best_win_streak'] or 0
+        best_loss_streak = player['best_loss_streak'] or 0
         
         if won:
             # Win: increment positive streak or start new one
             new_streak = current_streak + 1 if current_streak >= 0 else 1
             
             # Update best win streak if this is a new record
-            new_best_win = max(best_win_streak, new_streak)
-            
-            cursor.execute('''
-                UPDATE players 
-                SET wins = wins + 1, 
-                    total_pugs = total_pugs + 1, 
-                    current_streak = ?,
-                    best_win_streak = ?
-                WHERE discord_id = ? AND server_id = ?
-            ''', (new_streak, new_best_win, str(discord_id), str(server_id)))
+            self.ratings.update(server_id, discord_id,
+                                wins=player['wins'] + 1,
+                                total_pugs=player['total_pugs'] + 1,
+                                current_streak=new_streak,
+                                best_win_streak=max(best_win_streak, new_streak))
         else:
             # Loss: decrement negative streak or start new one
             new_streak = current_streak - 1 if current_streak <= 0 else -1
             
             # Update best loss streak if this is a new record (stored as positive number)
-            new_best_loss = max(best_loss_streak, abs(new_streak))
-            
-            cursor.execute('''
-                UPDATE players 
-                SET losses = losses + 1, 
-                    total_pugs = total_pugs + 1, 
-                    current_streak = ?,
-                    best_loss_streak = ?
-                WHERE discord_id = ? AND server_id = ?
-            ''', (new_streak, new_best_loss, str(discord_id), str(server_id)))
-        
-        conn.commit()
-        conn.close()
+            self.ratings.update(server_id, discord_id,
+                                losses=player['losses'] + 1,
+                                total_pugs=player['total_pugs'] + 1,
+                                current_streak=new_streak,
+                                best_loss_streak=max(best_loss_streak, abs(new_streak)))
     
     def update_player_elo(self, discord_id: str, server_id: str, new_elo: float):
-        """Update player ELO and peak ELO if new high (server-scoped)"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Update player ELO and peak ELO if new high (server-scoped, write-behind)"""
+        player = self.ratings.get(server_id, discord_id)
+        if not player:
+            return
         
-        # Update ELO and peak_elo
         # If peak_elo is NULL (first game), set it to new_elo
         # Otherwise, only update if new_elo is higher
-        cursor.execute('''
-            UPDATE players 
-            SET elo = ?,
-                peak_elo = CASE 
-                    WHEN peak_elo IS NULL THEN ?
-                    WHEN ? > peak_elo THEN ? 
-                    ELSE peak_elo 
-                END
-            WHERE discord_id = ? AND server_id = ?
-        ''', (new_elo, new_elo, new_elo, new_elo, str(discord_id), str(server_id)))
+        peak_elo = player['peak_elo']
+        if peak_elo is None or new_elo > peak_elo:
+            peak_elo = new_elo
         
-        conn.commit()
-        conn.close()
+        self.ratings.update(server_id, discord_id, elo=new_elo, peak_elo=peak_elo)
+    
+    def set_player_peak_elo(self, discord_id: str, server_id: str, peak_elo: float) -> bool:
+        """Admin override of a player's peak ELO (written immediately)
+        
+        Returns False if the player doesn't exist.
+        """
+        if not self.ratings.update(server_id, discord_id, peak_elo=peak_elo):
+            return False
+        self.ratings.flush()
+        return True
+    
+    def get_player_elo(self, discord_id: str, server_id: str, mode_name: str = None) -> Optional[float]:
+        """ELO a player is matched with in a mode, served from the rating store
+        
+        The mode's own pool (its elo_prefix, if set) when the mode has per-mode
+        ELO enabled, otherwise the global rating.
+        
+        Returns:
+            float: The rating, or None for a global lookup of an unknown player
+        """
+        pool = self._elo_pool(mode_name)
+        record = self.ratings.get(server_id, discord_id, pool)
+        return record['elo'] if record else None
+    
+    def get_player_elos(self, discord_ids: Iterable[str], server_id: str, mode_name: str = None) -> Dict[str, Optional[float]]:
+        """get_player_elo for a whole queue: the ELO pool is resolved once and every
+        rating the store doesn't hold yet is loaded with a single IN query
+        
+        Returns:
+            dict: {discord_id as given: rating, or None for a global lookup of an unknown player}
+        """
+        discord_ids = list(discord_ids)
+        pool = self._elo_pool(mode_name)
+        records = self.ratings.get_many(server_id, discord_ids, pool)
+        return {discord_id: records[str(discord_id)]['elo'] if str(discord_id) in records else None
+                for discord_id in discord_ids}
     
     def update_ut2k4_info(self, discord_id: str, server_id: str, ut2k4_name: str):
         """Update player's UT2K4 name (server-scoped)"""
@@ -684,239 +533,886 @@ class DatabaseManager:
         Returns True if successful, False otherwise.
         """
         try:
+            # Update only the total_pugs field (False if the player doesn't exist)
+            return self.ratings.update(server_id, discord_id, total_pugs=total_pugs)
+        except Exception as e:
+            print(f"Error updating player total_pugs: {e}")
+            return False
+    
+    def _elo_pool(self, mode_name: str = None) -> Optional[str]:
+        """ELO pool of a mode: its effective mode if per-mode ELO is on, else global (None)"""
+        if mode_name and self.is_per_mode_elo_enabled(mode_name):
+            return self.get_effective_mode_for_elo(mode_name)
+        return None
+    
+    def get_leaderboard_position(self, discord_id: str, server_id: str, mode_name: str = None) -> Dict:
+        """Player's leaderboard standing from the in-memory rank index (O(log n))
+        
+        Simulation players are never ranked. Ties are ordered by discord_id.
+        
+        Args:
+            discord_id: Player's Discord ID
+            server_id: Server ID
+            mode_name: Rank within this mode's ELO pool (global leaderboard if None
+                       or the mode has no per-mode ELO)
+            
+        Returns:
+            dict: {'position': 1-based rank or None if unranked, 'total': ranked players,
+                   'percentile': % of players ranked below or None}
+        """
+        pool = self._elo_pool(mode_name)
+        with self.ratings.lock:
+            board = self.leaderboard.board(server_id, pool)
+            return {
+                'position': board.rank(discord_id),
+                'total': len(board),
+                'percentile': board.percentile(discord_id)
+            }
+    
+    def get_leaderboard_neighbours(self, discord_id: str, server_id: str, mode_name: str = None,
+                                   radius: int = 2) -> List[Dict]:
+        """Players ranked within `radius` places of a player (including the player)
+        
+        Returns:
+            list: [{'position', 'discord_id', 'elo'}] in rank order, empty if unranked
+        """
+        pool = self._elo_pool(mode_name)
+        with self.ratings.lock:
+            neighbours = self.leaderboard.board(server_id, pool).neighbours(discord_id, radius)
+        return [{'position': position, 'discord_id': neighbour_id, 'elo': elo}
+                for position, neighbour_id, elo in neighbours]
+    
+    def get_all_players(self, server_id: str = None) -> List[Player]:
+        """Get all players, optionally filtered by server"""
+        self.ratings.flush()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.row_factory = Player.row_factory
+        
+        if server_id:
+            cursor.execute(f'''
+                SELECT {Player.COLUMNS}
+                FROM players 
+                WHERE server_id = ?
+            ''', (str(server_id),))
+        else:
+            cursor.execute(f'SELECT {Player.COLUMNS} FROM players')
+        
+        players = cursor.fetchall()
+        conn.close()
+        return players
+    
+    # Columns bulk_merge_players can import, with the type each value is parsed as
+    BULK_COLUMNS = {'elo': float, 'total_pugs': int}
+    
+    @classmethod
+    def _parse_bulk_rows(cls, rows: List[tuple], column: str, add: bool = False) -> Tuple[Dict, List[tuple]]:
+        """Validate bulk_merge_players rows
+        
+        Rows repeating a Discord ID are added up when `add` is set; when values
+        replace the current one, only the first row is used and the others are errors.
+        
+        Returns:
+            tuple: ({discord_id: parsed value} in input order, [(discord_id, error message)])
+        """
+        if column not in cls.BULK_COLUMNS:
+            raise ValueError(f"Column '{column}' can't be bulk imported")
+        parse = cls.BULK_COLUMNS[column]
+        
+        valid = {}
+        errors = []
+        for discord_id, value in rows:
+            discord_id = str(discord_id).strip()
+            if not discord_id.isdigit():
+                errors.append((discord_id, "Invalid Discord ID: must be numeric"))
+                continue
+            if discord_id in valid and not add:
+                errors.append((discord_id, "Duplicate row (only the first one is used)"))
+                continue
+            try:
+                valid[discord_id] = valid.get(discord_id, 0) + parse(value)
+            except (TypeError, ValueError):
+                errors.append((discord_id, f"Invalid {column} value '{value}'"))
+        return valid, errors
+    
+    def bulk_merge_players(self, server_id: str, rows: List[tuple], column: str = 'elo',
+                           add: bool = False, create_missing: bool = True, dry_run: bool = False) -> Dict:
+        """Merge (discord_id, value) rows into one players column in a single transaction
+        
+        Valid rows are loaded into a temp table and applied with one
+        INSERT ... SELECT ... ON CONFLICT DO UPDATE statement.
+        
+        Args:
+            server_id: Server the players belong to
+            rows: (discord_id, value) tuples
+            column: Column to set, one of BULK_COLUMNS ('elo' or 'total_pugs')
+            add: Add the value to the current one instead of replacing it (rows
+                 repeating a Discord ID add up)
+            create_missing: Create players that don't exist yet (otherwise they are errors)
+            dry_run: Validate and compute the results, then roll back
+            
+        Returns:
+            dict: {'applied': [{'discord_id', 'name', 'old', 'new', 'created'}],
+                   'errors': [(discord_id, message)]} in input order
+        """
+        valid, errors = self._parse_bulk_rows(rows, column, add)
+        server_id = str(server_id)
+        
+        applied = []
+        if not valid:
+            return {'applied': applied, 'errors': errors}
+        
+        # The merge reads and writes players directly
+        self.ratings.flush()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS import_rows (
+                    discord_id TEXT PRIMARY KEY,
+                    value REAL
+                )
+            ''')
+            cursor.execute('DELETE FROM temp.import_rows')
+            cursor.executemany('INSERT INTO temp.import_rows (discord_id, value) VALUES (?, ?)',
+                               valid.items())
+            
+            # Current values, to report old -> new and find missing players
+            cursor.execute(f'''
+                SELECT i.discord_id, p.discord_id IS NOT NULL, p.{column},
+                       COALESCE(p.display_name, p.discord_name)
+                FROM temp.import_rows i
+                LEFT JOIN players p ON p.discord_id = i.discord_id AND p.server_id = ?
+            ''', (server_id,))
+            current = {row[0]: row[1:] for row in cursor.fetchall()}
+            
+            missing = []
+            for discord_id, value in valid.items():
+                exists, old, name = current[discord_id]
+                if not exists and not create_missing:
+                    missing.append(discord_id)
+                    errors.append((discord_id, "Player not found"))
+                    continue
+                new = (old or 0) + value if add and exists else value
+                applied.append({'discord_id': discord_id, 'name': name, 'old': old if exists else None,
+                                'new': new, 'created': not exists})
+            
+            if missing:
+                cursor.executemany('DELETE FROM temp.import_rows WHERE discord_id = ?',
+                                   [(discord_id,) for discord_id in missing])
+            
+            if dry_run:
+                conn.rollback()
+            else:
+                # New players start from the same defaults as before; only `column` comes from the import
+                values = {'wins': '0', 'losses': '0', 'total_pugs': '0', 'elo': '1000'}
+                values[column] = 'value'
+                update = f"{column} + excluded.{column}" if add else f"excluded.{column}"
+                cursor.execute(f'''
+                    INSERT INTO players (discord_id, server_id, {', '.join(values)})
+                    SELECT discord_id, ?, {', '.join(values.values())}
+                    FROM temp.import_rows
+                    WHERE true
+                    ON CONFLICT (discord_id, server_id) DO UPDATE SET {column} = {update}
+                ''', (server_id,))
+                cursor.execute('DELETE FROM temp.import_rows')
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        if not dry_run:
+            self.ratings.invalidate(server_id)
+        
+        return {'applied': applied, 'errors': errors}
+    
+    def bulk_update_elos(self, server_id: str, elo_updates: List[tuple]) -> tuple:
+        """
+        Bulk update ELOs for a server (creates players that don't exist yet)
+        elo_updates: List of (discord_id, new_elo) tuples
+        Returns: (success_count, error_count, errors_list)
+        """
+        result = self.bulk_merge_players(server_id, elo_updates, 'elo')
+        errors = [f"Discord ID {discord_id}: {message}" for discord_id, message in result['errors']]
+        return (len(result['applied']), len(errors), errors)
+    
+    # PUG operations
+    def add_pug(self, red_team: List[str], blue_team: List[str], game_mode: str, 
+                avg_red_elo: float, avg_blue_elo: float, tiebreaker_map: str = None,
+                red_captain: str = None, blue_captain: str = None, server_id: str = None) -> int:
+        """Add a new PUG and return the pug_id"""
+        server_id = str(server_id) if server_id else None
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # Insert PUG
+        cursor.execute('''
+            INSERT INTO pugs (game_mode, avg_red_elo, avg_blue_elo, tiebreaker_map, red_captain, blue_captain, server_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (game_mode, avg_red_elo, avg_blue_elo, tiebreaker_map, 
+              str(red_captain) if red_captain else None, 
+              str(blue_captain) if blue_captain else None,
+              server_id))
+        
+        pug_id = cursor.lastrowid
+        
+        # Insert team members
+        cursor.executemany('''
+            INSERT INTO pug_teams (pug_id, discord_id, team, server_id)
+            VALUES (?, ?, ?, ?)
+        ''', [(pug_id, str(discord_id), 'red', server_id) for discord_id in red_team] +
+              [(pug_id, str(discord_id), 'blue', server_id) for discord_id in blue_team])
+        
+        self._bump_server_counters(cursor, pug_id, pugs=1)
+        
+        conn.commit()
+        conn.close()
+        
+        # Return the pug_id which serves as the PUG number
+        return pug_id
+    
+    def update_pug_winner(self, pug_id: int, winner: str):
+        """Update PUG winner"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            self._set_pug_winner(cursor, pug_id, winner)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def _set_pug_winner(self, cursor, pug_id: int, winner: Optional[str]):
+        """Store a PUG's winner and keep its decided counter in step (caller commits)
+        
+        Raises:
+            ValueError: The PUG isn't in the pugs table (archived or unknown), so the
+                        caller's transaction must roll back instead of settling ratings
+        """
+        cursor.execute('SELECT winner FROM pugs WHERE pug_id = ?', (pug_id,))
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError(f"PUG {pug_id} is archived or doesn't exist and can't be settled")
+        cursor.execute('UPDATE pugs SET winner = ? WHERE pug_id = ?', (winner, pug_id))
+        
+        decided = (winner is not None) - (row[0] is not None)
+        if decided:
+            self._bump_server_counters(cursor, pug_id, decided=decided)
+    
+    def _bump_server_counters(self, cursor, pug_id: int, pugs: int = 0, decided: int = 0, killed: int = 0):
+        """Adjust the cached counters of a PUG's server and mode (caller commits)"""
+        cursor.execute('''
+            INSERT INTO server_counters (server_id, game_mode, pugs, decided, killed)
+            SELECT server_id, game_mode, ?, ?, ?
+            FROM pugs
+            WHERE pug_id = ? AND server_id IS NOT NULL
+            ON CONFLICT (server_id, game_mode) DO UPDATE SET
+                pugs = pugs + excluded.pugs,
+                decided = decided + excluded.decided,
+                killed = killed + excluded.killed
+        ''', (pugs, decided, killed, pug_id))
+    
+    # One statement per per-mode result: creates the row or applies the result to it.
+    # Parameters: discord_id, server_id, mode_name, elo, peak_elo, wins (+), losses (+),
+    # current_streak, best_win_streak, best_loss_streak
+    # A new row starts from 0 wins/losses, so an undo (-1) can't take it below that
+    MODE_RESULT_UPSERT = '''
+        INSERT INTO player_mode_elos (discord_id, server_id, mode_name, elo, peak_elo, wins, losses,
+                                      current_streak, best_win_streak, best_loss_streak)
+        VALUES (?, ?, ?, ?, ?, MAX(0, ?), MAX(0, ?), ?, ?, ?)
+        ON CONFLICT (discord_id, server_id, mode_name) DO UPDATE SET
+            elo = excluded.elo,
+            peak_elo = MAX(COALESCE(peak_elo, excluded.peak_elo), excluded.peak_elo),
+            wins = wins + excluded.wins,
+            losses = losses + excluded.losses,
+            current_streak = excluded.current_streak,
+            best_win_streak = excluded.best_win_streak,
+            best_loss_streak = excluded.best_loss_streak,
+            last_updated = CURRENT_TIMESTAMP
+    '''
+    
+    @staticmethod
+    def _apply_streak(current_streak: int, best_win_streak: int, best_loss_streak: int, result: Optional[str]) -> tuple:
+        """Advance a (current, best win, best loss) streak triple by one 'win' or 'loss' (None = unchanged)"""
+        current_streak = current_streak or 0
+        best_win_streak = best_win_streak or 0
+        best_loss_streak = best_loss_streak or 0
+        
+        if result == 'win':
+            current_streak = current_streak + 1 if current_streak >= 0 else 1
+            best_win_streak = max(best_win_streak, current_streak)
+        elif result == 'loss':
+            current_streak = current_streak - 1 if current_streak <= 0 else -1
+            best_loss_streak = max(best_loss_streak, abs(current_streak))
+        
+        return current_streak, best_win_streak, best_loss_streak
+    
+    def settle_pug(self, pug_id: int, winner: Optional[str], per_player_deltas: Dict[str, Dict],
+                   server_id: str, elo_pool: str = None) -> Dict[str, Dict]:
+        """Apply a match result (or its reversal) in a single transaction
+        
+        Replaces the update_pug_winner / update_player_stats / update_player_elo
+        sequence with one read and one executemany per table, so a result costs
+        one commit and either applies completely or not at all.
+        
+        Args:
+            pug_id: The PUG being settled
+            winner: Value stored in pugs.winner ('red', 'blue', 'split', or None to clear it)
+            per_player_deltas: {discord_id: delta} where delta may contain
+                'elo' (rating change), 'wins', 'losses', 'total_pugs' (counter changes)
+                and 'streak' ('win', 'loss' or None to leave streaks untouched)
+            server_id: Server the players belong to
+            elo_pool: Effective mode name when the mode uses per-mode ELO, None for global ELO.
+                      Per-mode ELO and mode win/loss stats go to player_mode_elos;
+                      global win/loss/PUG counters are always updated.
+        
+        Returns:
+            dict: {discord_id: {'old': elo, 'new': elo, 'change': change}}
+        """
+        server_id = str(server_id)
+        deltas = {str(uid): delta for uid, delta in per_player_deltas.items()}
+        ids = list(deltas)
+        placeholders = ','.join('?' * len(ids))
+        
+        # Settlement reads and writes the tables directly. Hold the store's lock from the
+        # flush to the invalidate so no cached record changes in between (it would be
+        # flushed over the settled rows)
+        with self.ratings.lock:
+            # Write back pending changes first
+            self.ratings.flush()
+            
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            # Update only the total_pugs field
-            cursor.execute('''
-                UPDATE players 
-                SET total_pugs = ?
-                WHERE discord_id = ? AND server_id = ?
-            ''', (total_pugs, str(discord_id), str(server_id)))
+            try:
+                # Take the write lock up front so the read-modify-write below is atomic
+                cursor.execute('BEGIN IMMEDIATE')
+            
+                cursor.execute(f'''
+                    SELECT discord_id, elo, current_streak, best_win_streak, best_loss_streak
+                    FROM players
+                    WHERE server_id = ? AND discord_id IN ({placeholders})
+                ''', (server_id, *ids))
+                players = {row[0]: row for row in cursor.fetchall()}
+            
+                mode_rows = {}
+                if elo_pool:
+                    cursor.execute(f'''
+                        SELECT discord_id, elo, current_streak, best_win_streak, best_loss_streak, peak_elo
+                        FROM player_mode_elos
+                        WHERE server_id = ? AND mode_name = ? AND discord_id IN ({placeholders})
+                    ''', (server_id, elo_pool, *ids))
+                    mode_rows = {row[0]: row for row in cursor.fetchall()}
             
-            # Check if any row was actually updated
-            if cursor.rowcount == 0:
+                elo_changes = {}
+                player_updates = []
+                mode_updates = []
+            
+                for uid, delta in deltas.items():
+                    wins = delta.get('wins', 0)
+                    losses = delta.get('losses', 0)
+                    streak_result = delta.get('streak')
+            
+                    _, player_elo, *player_streaks = players.get(uid, (uid, 1000, 0, 0, 0))
+                    player_streaks = self._apply_streak(*player_streaks, streak_result)
+            
+                    if elo_pool:
+                        # Players without a mode row yet start from 1000 (see MODE_DEFAULTS)
+                        _, old_elo, *mode_streaks, old_peak = mode_rows.get(uid, (uid, 1000, 0, 0, 0, 1000))
+                        new_elo = old_elo + delta.get('elo', 0)
+                        mode_updates.append((uid, server_id, elo_pool, new_elo, max(old_peak or new_elo, new_elo),
+                                             wins, losses, *self._apply_streak(*mode_streaks, streak_result)))
+                        new_player_elo = player_elo
+                    else:
+                        old_elo = player_elo
+                        new_elo = new_player_elo = old_elo + delta.get('elo', 0)
+            
+                    player_updates.append((new_player_elo, new_player_elo, new_player_elo, new_player_elo,
+                                           wins, losses, delta.get('total_pugs', 0), *player_streaks,
+                                           uid, server_id))
+                    elo_changes[uid] = {'old': old_elo, 'new': new_elo, 'change': new_elo - old_elo}
+            
+                self._set_pug_winner(cursor, pug_id, winner)
+            
+                cursor.executemany('''
+                    UPDATE players
+                    SET elo = ?,
+                        peak_elo = CASE
+                            WHEN peak_elo IS NULL THEN ?
+                            WHEN ? > peak_elo THEN ?
+                            ELSE peak_elo
+                        END,
+                        wins = wins + ?,
+                        losses = losses + ?,
+                        total_pugs = total_pugs + ?,
+                        current_streak = ?,
+                        best_win_streak = ?,
+                        best_loss_streak = ?
+                    WHERE discord_id = ? AND server_id = ?
+                ''', player_updates)
+            
+                if mode_updates:
+                    cursor.executemany(self.MODE_RESULT_UPSERT, mode_updates)
+            
+                # Append-only rating history (a reversal appends compensating rows, flagged)
+                cursor.executemany('''
+                    INSERT INTO elo_history (pug_id, server_id, discord_id, pool, elo_before, elo_after, reversal)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [(pug_id, server_id, uid, elo_pool or 'global', change['old'], change['new'], winner is None)
+                      for uid, change in elo_changes.items()])
+            
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
                 conn.close()
-                return False
+            
+            self.ratings.invalidate(server_id, ids)
+        return elo_changes
+    
+    def delete_pug(self, pug_id: int):
+        """Mark a PUG as killed (don't actually delete it)"""
+        self._set_pug_status(pug_id, 'killed')
+    
+    def restore_pug(self, pug_id: int):
+        """Restore a killed PUG to active"""
+        self._set_pug_status(pug_id, 'active')
+    
+    def _set_pug_status(self, pug_id: int, status: str):
+        """Change a PUG's status, keeping its server's killed counter in step"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT status FROM pugs WHERE pug_id = ?', (pug_id,))
+            row = cursor.fetchone()
+            
+            # Mark the PUG instead of deleting it
+            cursor.execute("UPDATE pugs SET status = ? WHERE pug_id = ?", (status, pug_id))
+            
+            killed = (status == 'killed') - (row is not None and row[0] == 'killed')
+            if killed:
+                self._bump_server_counters(cursor, pug_id, killed=killed)
             
             conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
             conn.close()
-            return True
-        except Exception as e:
-            print(f"Error updating player total_pugs: {e}")
-            return False
     
-    def get_all_players(self, server_id: str = None) -> List[Dict]:
-        """Get all players, optionally filtered by server"""
+    def get_server_counters(self, server_id: str) -> Dict:
+        """PUG and player counts for a server without loading any history
+        
+        PUG counts come from the server_counters cache maintained by add_pug,
+        settle_pug and the status changes; player counts are indexed COUNTs.
+        
+        Returns:
+            dict: total_pugs, decided_pugs, killed_pugs, pugs_by_mode ({game_mode: count}),
+                  total_players, active_players (played at least one PUG)
+        """
+        server_id = str(server_id)
+        self.ratings.flush()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT game_mode, pugs, decided, killed
+            FROM server_counters
+            WHERE server_id = ?
+        ''', (server_id,))
+        mode_rows = cursor.fetchall()
+        
+        cursor.execute('''
+            SELECT COUNT(*), COUNT(CASE WHEN total_pugs > 0 THEN 1 END)
+            FROM players
+            WHERE server_id = ?
+        ''', (server_id,))
+        total_players, active_players = cursor.fetchone()
+        
+        conn.close()
+        return {
+            'total_pugs': sum(row[1] for row in mode_rows),
+            'decided_pugs': sum(row[2] for row in mode_rows),
+            'killed_pugs': sum(row[3] for row in mode_rows),
+            'pugs_by_mode': {row[0]: row[1] for row in mode_rows if row[1]},
+            'total_players': total_players,
+            'active_players': active_players
+        }
+    
+    # Columns of a PUG row, followed by one roster member per joined row
+    PUG_COLUMNS = ('pug_id, game_mode, winner, avg_red_elo, avg_blue_elo, timestamp, status, '
+                   'tiebreaker_map, red_captain, blue_captain, server_id')
+    
+    @staticmethod
+    def _group_pug_rows(rows, archived: bool = False) -> List[PugRecord]:
+        """Build PugRecords from PUG rows joined to pug_teams, ordered by pug_id"""
+        pugs = []
+        for pug_id, group in groupby(rows, key=lambda r: r[0]):
+            group = list(group)
+            pugs.append(PugRecord(pug_id, pug_id, *group[0][1:11],
+                                  [r[11] for r in group if r[12] == 'red'],
+                                  [r[11] for r in group if r[12] == 'blue'],
+                                  archived))
+        return pugs
+    
+    def _select_pugs(self, where: str, params: list, limit: int) -> List[Dict]:
+        """Newest PUGs matching `where`, joined to their teams in a single query
+        
+        `where` may reference the PUG tables as {db}pugs / {db}pug_teams. The
+        archive is only queried when the hot tables can't fill `limit` and an
+        archived PUG could match (see _archive_may_match).
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        if server_id:
-            cursor.execute('''
-                SELECT discord_id, server_id, discord_name, display_name,
-                       wins, losses, total_pugs, elo, peak_elo,
-                       ut2k4_player_name, ut2k4_last_scraped, current_streak, registered,
-                       best_win_streak, best_loss_streak
-                FROM players 
-                WHERE server_id = ?
-            ''', (str(server_id),))
-        else:
-            cursor.execute('''
-                SELECT discord_id, server_id, discord_name, display_name,
-                       wins, losses, total_pugs, elo, peak_elo,
-                       ut2k4_player_name, ut2k4_last_scraped, current_streak, registered,
-                       best_win_streak, best_loss_streak
-                FROM players
-            ''')
-        
-        rows = cursor.fetchall()
-        
-        players = []
-        for row in rows:
-            players.append({
-                'discord_id': row[0],
-                'server_id': row[1],
-                'discord_name': row[2],
-                'display_name': row[3],
-                'wins': row[4],
-                'losses': row[5],
-                'total_pugs': row[6],
-                'elo': row[7],
-                'peak_elo': row[8] if len(row) > 8 else row[7],  # Default to current elo
-                'ut2k4_player_name': row[9] if len(row) > 9 else None,
-                'ut2k4_last_scraped': row[10] if len(row) > 10 else None,
-                'current_streak': row[11] if len(row) > 11 else 0,
-                'registered': row[12] if len(row) > 12 else 0,
-                'best_win_streak': row[13] if len(row) > 13 else 0,
-                'best_loss_streak': row[14] if len(row) > 14 else 0
-            })
+        pugs = self._query_pugs(cursor, '', where, params, limit)
+        if len(pugs) < limit and self._archive_may_match(where, params, pugs):
+            self._attach_archive(conn)
+            through = int(self.get_setting(self.ARCHIVE_WATERMARK))
+            archive_where = f"{where} AND pug_id <= ?" if where.strip() else "WHERE pug_id <= ?"
+            archived = self._query_pugs(cursor, 'archive.', archive_where, list(params) + [through],
+                                        limit - len(pugs))
+            if not archived:
+                self._archive_misses.add((through, where, tuple(params)))
+            pugs += archived
         
         conn.close()
-        return players
+        return pugs
     
-    def bulk_update_elos(self, server_id: str, elo_updates: List[tuple]) -> tuple:
+    def _archive_may_match(self, where: str, params: list, pugs: List[Dict]) -> bool:
+        """Whether the archive could hold more PUGs for a _select_pugs query
+        
+        Only PUGs up to the watermark are archived, so the archive is skipped
+        when the hot rows already reach below it, and for queries it has
+        answered with nothing since the last archive run (archived PUGs are
+        read-only, so that answer holds until the watermark moves).
         """
-        Bulk update ELOs for a server
-        elo_updates: List of (discord_id, new_elo) tuples
-        Returns: (success_count, error_count, errors_list)
+        watermark = self.get_setting(self.ARCHIVE_WATERMARK)
+        if watermark is None:
+            return False
+        through = int(watermark)
+        if pugs and pugs[-1]['pug_id'] <= through:
+            return False
+        
+        if self._archive_misses_through != through or len(self._archive_misses) >= self.ARCHIVE_MISS_LIMIT:
+            self._archive_misses = set()
+            self._archive_misses_through = through
+        return (through, where, tuple(params)) not in self._archive_misses
+    
+    def _query_pugs(self, cursor, db: str, where: str, params: list, limit: int) -> List[Dict]:
+        """_select_pugs against the hot tables (db='') or the archive (db='archive.')"""
+        cursor.execute(f'''
+            SELECT p.*, t.discord_id, t.team
+            FROM (
+                SELECT {self.PUG_COLUMNS}
+                FROM {db}pugs
+                {where.format(db=db)}
+                ORDER BY pug_id DESC
+                LIMIT ?
+            ) p
+            LEFT JOIN {db}pug_teams t ON t.pug_id = p.pug_id
+            ORDER BY p.pug_id DESC, t.id
+        ''', list(params) + [limit])
+        return self._group_pug_rows(cursor.fetchall(), archived=bool(db))
+    
+    def get_recent_pugs(self, server_id: str = None, limit: int = 3) -> List[Dict]:
+        """Get a server's recent PUGs (newest first) with their teams in a single query
+        
+        Args:
+            server_id: Server whose PUGs to return (all servers if None)
+            limit: Maximum number of PUGs
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        if server_id is None:
+            return self._select_pugs("", [], limit)
+        return self._select_pugs("WHERE server_id = ?", [str(server_id)], limit)
+    
+    def iter_pugs(self, server_id: str = None, before_id: int = None, page_size: int = 100) -> Iterator[Dict]:
+        """Stream PUGs newest first, one page at a time
         
-        success_count = 0
-        error_count = 0
-        errors = []
+        Uses keyset pagination on pug_id, so memory stays constant and no
+        connection is held between pages.
         
-        for discord_id, new_elo in elo_updates:
-            try:
-                # Validate that discord_id is numeric
-                if not str(discord_id).isdigit():
-                    error_count += 1
-                    errors.append(f"Invalid Discord ID '{discord_id}': must be numeric")
-                    continue
-                
-                # Check if player exists for this server
-                cursor.execute('SELECT discord_id FROM players WHERE discord_id = ? AND server_id = ?',
-                              (str(discord_id), str(server_id)))
-                if cursor.fetchone():
-                    # Update existing player
-                    cursor.execute('UPDATE players SET elo = ? WHERE discord_id = ? AND server_id = ?',
-                                  (float(new_elo), str(discord_id), str(server_id)))
-                    success_count += 1
-                else:
-                    # Create new player with this ELO
-                    cursor.execute('''
-                        INSERT INTO players (discord_id, server_id, wins, losses, total_pugs, elo)
-                        VALUES (?, ?, 0, 0, 0, ?)
-                    ''', (str(discord_id), str(server_id), float(new_elo)))
-                    success_count += 1
-            except Exception as e:
-                error_count += 1
-                errors.append(f"Discord ID {discord_id}: {str(e)}")
+        Args:
+            server_id: Server whose PUGs to return (all servers if None)
+            before_id: Start below this pug_id (from the newest PUG if None)
+            page_size: PUGs fetched per query
+        """
+        while True:
+            conditions = []
+            params = []
+            if before_id is not None:
+                conditions.append("pug_id < ?")
+                params.append(before_id)
+            if server_id is not None:
+                conditions.append("server_id = ?")
+                params.append(str(server_id))
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            
+            page = self._select_pugs(where, params, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            before_id = page[-1]['pug_id']
+    
+    def get_player_pugs(self, discord_id: str, server_id: str, limit: int = 10,
+                        before: int = None, with_result: bool = False) -> List[Dict]:
+        """Get a player's most recent PUGs on a server (newest first)
         
-        conn.commit()
-        conn.close()
+        Walks the pug_teams (discord_id, pug_id) index, so the cost does not
+        depend on how much history the server has.
         
-        return (success_count, error_count, errors)
+        Args:
+            discord_id: Player to look up
+            server_id: Server the PUGs were played on
+            limit: Maximum number of PUGs
+            before: Only PUGs with a pug_id below this (for paging)
+            with_result: Only PUGs that have a winner
+        """
+        join = "JOIN {db}pugs r ON r.pug_id = t.pug_id AND r.winner IS NOT NULL" if with_result else ""
+        before_clause = "AND t.pug_id < ?" if before is not None else ""
+        params = [str(discord_id), str(server_id)] + ([before] if before is not None else [])
+        
+        return self._select_pugs(f'''
+            WHERE pug_id IN (
+                SELECT t.pug_id
+                FROM {{db}}pug_teams t
+                {join}
+                WHERE t.discord_id = ? AND t.server_id = ? {before_clause}
+                ORDER BY t.pug_id DESC
+                LIMIT ?
+            )
+        ''', params + [limit], limit)
     
-    # PUG operations
-    def add_pug(self, red_team: List[str], blue_team: List[str], game_mode: str, 
-                avg_red_elo: float, avg_blue_elo: float, tiebreaker_map: str = None,
-                red_captain: str = None, blue_captain: str = None) -> int:
-        """Add a new PUG and return the pug_id"""
+    def get_last_pug_id(self, server_id: str = None) -> Optional[int]:
+        """Get the last PUG ID (of a server, or across all servers if None)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Insert PUG
-        cursor.execute('''
-            INSERT INTO pugs (game_mode, avg_red_elo, avg_blue_elo, tiebreaker_map, red_captain, blue_captain)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (game_mode, avg_red_elo, avg_blue_elo, tiebreaker_map, 
-              str(red_captain) if red_captain else None, 
-              str(blue_captain) if blue_captain else None))
-        
-        pug_id = cursor.lastrowid
-        
-        # Insert red team members
-        for discord_id in red_team:
-            cursor.execute('''
-                INSERT INTO pug_teams (pug_id, discord_id, team)
-                VALUES (?, ?, 'red')
-            ''', (pug_id, str(discord_id)))
+        where, params = ('WHERE server_id = ?', (str(server_id),)) if server_id is not None else ('', ())
+        cursor.execute(f'SELECT MAX(pug_id) FROM pugs {where}', params)
+        result = cursor.fetchone()[0]
         
-        # Insert blue team members
-        for discord_id in blue_team:
-            cursor.execute('''
-                INSERT INTO pug_teams (pug_id, discord_id, team)
-                VALUES (?, ?, 'blue')
-            ''', (pug_id, str(discord_id)))
+        # Every PUG of the server may be archived already
+        if result is None and self._attach_archive(conn):
+            cursor.execute(f'SELECT MAX(pug_id) FROM archive.pugs {where}', params)
+            result = cursor.fetchone()[0]
         
-        conn.commit()
         conn.close()
-        
-        # Return the pug_id which serves as the PUG number
-        return pug_id
+        return result
     
-    def update_pug_winner(self, pug_id: int, winner: str):
-        """Update PUG winner"""
+    # Cold storage (pugs/pug_teams rows older than the hot window live in pug_archive.db)
+    ARCHIVE_WATERMARK = 'archive_through_pug_id'  # bot_settings key: highest archived pug_id
+    ARCHIVE_MISS_LIMIT = 10000  # _select_pugs queries remembered as having no archived PUGs
+    
+    def _attach_archive(self, conn, create: bool = False) -> bool:
+        """ATTACH the archive as `archive` on this connection if any PUGs were archived
+        
+        Returns:
+            bool: True if archive.pugs can be queried
+        """
+        if not create and self.get_setting(self.ARCHIVE_WATERMARK) is None:
+            return False
+        try:
+            conn.execute('ATTACH DATABASE ? AS archive', (self.archive_path,))
+        except sqlite3.OperationalError as e:
+            # Pooled connections stay attached between calls
+            if 'already in use' not in str(e):
+                raise
+        return True
+    
+    def _ensure_archive_schema(self, cursor):
+        """Create archive.pugs / archive.pug_teams (and their indexes) from the live schema"""
+        for table in ('pugs', 'pug_teams'):
+            cursor.execute("SELECT type, sql FROM main.sqlite_master WHERE tbl_name = ? AND sql IS NOT NULL",
+                           (table,))
+            for kind, sql in cursor.fetchall():
+                if kind == 'table':
+                    sql = re.sub(r'^CREATE TABLE (IF NOT EXISTS )?"?(\w+)"?',
+                                 r'CREATE TABLE IF NOT EXISTS archive.\2', sql)
+                else:
+                    sql = re.sub(r'^CREATE (UNIQUE )?INDEX (IF NOT EXISTS )?"?(\w+)"?',
+                                 r'CREATE \1INDEX IF NOT EXISTS archive.\3', sql)
+                cursor.execute(sql)
+            
+            # Columns added to the live table by later migrations
+            cursor.execute(f"PRAGMA main.table_info({table})")
+            live = [(row[1], row[2]) for row in cursor.fetchall()]
+            cursor.execute(f"PRAGMA archive.table_info({table})")
+            archived = {row[1] for row in cursor.fetchall()}
+            for name, column_type in live:
+                if name not in archived:
+                    cursor.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {column_type}")
+    
+    def archive_pugs(self, older_than_days: float, batch_size: int = 500) -> Dict:
+        """Move PUGs older than `older_than_days` (and their teams) to the archive database
+        
+        PUGs are moved oldest first, in batches. Each batch is copied to the
+        archive and committed there before it is deleted from the hot tables
+        together with the watermark update, so an interruption can only leave
+        a duplicate that the next run overwrites, never lose a PUG. Archived
+        PUGs are read-only: history queries still return them, flagged 'archived'.
+        
+        Returns:
+            dict: {'archived': PUGs moved, 'through_pug_id': watermark, 'duration': seconds}
+        """
+        start = datetime.now()
         conn = self.get_connection()
         cursor = conn.cursor()
+        moved = 0
         
-        cursor.execute('UPDATE pugs SET winner = ? WHERE pug_id = ?', 
-                      (winner, pug_id))
+        try:
+            self._attach_archive(conn, create=True)
+            cursor.execute('BEGIN IMMEDIATE')
+            self._ensure_archive_schema(cursor)
+            conn.commit()
+            
+            # pug_ids grow with time, so everything up to the newest old PUG moves
+            cursor.execute("SELECT MAX(pug_id) FROM pugs WHERE timestamp < datetime('now', ?)",
+                           (f"-{older_than_days} days",))
+            target = cursor.fetchone()[0]
+            
+            columns = {}
+            for table in ('pugs', 'pug_teams'):
+                cursor.execute(f"PRAGMA main.table_info({table})")
+                columns[table] = ', '.join(row[1] for row in cursor.fetchall())
+            
+            while target is not None:
+                cursor.execute('SELECT pug_id FROM pugs WHERE pug_id <= ? ORDER BY pug_id LIMIT 1 OFFSET ?',
+                               (target, batch_size - 1))
+                row = cursor.fetchone()
+                through = min(row[0], target) if row else target
+                
+                cursor.execute('BEGIN IMMEDIATE')
+                for table in ('pugs', 'pug_teams'):
+                    cursor.execute(f'''
+                        INSERT OR REPLACE INTO archive.{table} ({columns[table]})
+                        SELECT {columns[table]} FROM main.{table} WHERE pug_id <= ?
+                    ''', (through,))
+                conn.commit()
+                
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute('DELETE FROM pug_teams WHERE pug_id <= ?', (through,))
+                cursor.execute('DELETE FROM pugs WHERE pug_id <= ?', (through,))
+                moved += cursor.rowcount
+                cursor.execute('INSERT OR REPLACE INTO bot_settings (key, value) VALUES (?, ?)',
+                               (self.ARCHIVE_WATERMARK, str(through)))
+                conn.commit()
+                self.modes.invalidate('settings')
+                
+                if through >= target:
+                    break
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         
-        conn.commit()
-        conn.close()
+        watermark = self.get_setting(self.ARCHIVE_WATERMARK)
+        return {'archived': moved,
+                'through_pug_id': int(watermark) if watermark is not None else None,
+                'duration': (datetime.now() - start).total_seconds()}
     
-    def delete_pug(self, pug_id: int):
-        """Mark a PUG as killed (don't actually delete it)"""
+    # Rating history (elo_history is written by settle_pug)
+    def get_pug_elo_changes(self, pug_id: int) -> Dict[str, Dict]:
+        """Rating change each player currently has from a PUG's result
+        
+        Returns:
+            dict: {discord_id: {'pool': 'global' or effective mode, 'change': ELO change}};
+                  empty if the PUG has no standing result in the history
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Mark the PUG as killed instead of deleting
-        cursor.execute("UPDATE pugs SET status = 'killed' WHERE pug_id = ?", (pug_id,))
+        # The standing result is each player's latest row, unless that row undid it
+        cursor.execute('''
+            SELECT discord_id, pool, elo_after - elo_before
+            FROM elo_history
+            WHERE id IN (SELECT MAX(id) FROM elo_history WHERE pug_id = ? GROUP BY discord_id, pool)
+              AND NOT reversal
+        ''', (pug_id,))
         
-        conn.commit()
+        changes = {row[0]: {'pool': row[1], 'change': row[2]} for row in cursor.fetchall()}
         conn.close()
+        return changes
     
-    def get_recent_pugs(self, limit: int = 3) -> List[Dict]:
-        """Get recent PUGs"""
+    def get_recent_elo_changes(self, discord_id: str, server_id: str, pool: str = 'global',
+                               limit: int = 10) -> List[Dict]:
+        """A player's rating change per PUG, newest first (reversed results left out)
+        
+        Args:
+            pool: 'global' or an effective mode name
+            
+        Returns:
+            list: [{'pug_id', 'change', 'elo_after', 'ts'}]
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # Each PUG's latest row for the player is its standing result, unless it undid it
         cursor.execute('''
-            SELECT pug_id, game_mode, winner, avg_red_elo, avg_blue_elo, timestamp, status, tiebreaker_map, red_captain, blue_captain
-            FROM pugs
+            SELECT pug_id, elo_after - elo_before, elo_after, ts
+            FROM elo_history
+            WHERE id IN (
+                SELECT MAX(id) FROM elo_history
+                WHERE server_id = ? AND discord_id = ? AND pool = ?
+                GROUP BY pug_id
+            )
+              AND NOT reversal
             ORDER BY pug_id DESC
             LIMIT ?
-        ''', (limit,))
-        
+        ''', (str(server_id), str(discord_id), pool, limit))
         rows = cursor.fetchall()
-        pugs = []
         
-        for row in rows:
-            pug_id = row[0]
-            
-            # Get team members
-            cursor.execute('''
-                SELECT discord_id, team 
-                FROM pug_teams 
-                WHERE pug_id = ?
-            ''', (pug_id,))
-            
-            team_rows = cursor.fetchall()
-            red_team = [r[0] for r in team_rows if r[1] == 'red']
-            blue_team = [r[0] for r in team_rows if r[1] == 'blue']
-            
-            pugs.append({
-                'pug_id': pug_id,
-                'number': pug_id,
-                'game_mode': row[1],
-                'winner': row[2],
-                'avg_red_elo': row[3],
-                'avg_blue_elo': row[4],
-                'timestamp': row[5],
-                'status': row[6] if len(row) > 6 else 'active',
-                'tiebreaker_map': row[7] if len(row) > 7 else None,
-                'red_captain': row[8] if len(row) > 8 else None,
-                'blue_captain': row[9] if len(row) > 9 else None,
-                'red_team': red_team,
-                'blue_team': blue_team
-            })
+        conn.close()
+        return [{'pug_id': pug_id, 'change': change, 'elo_after': elo_after, 'ts': ts}
+                for pug_id, change, elo_after, ts in rows]
+    
+    def get_elo_history(self, discord_id: str, server_id: str, pool: str = 'global',
+                        limit: int = 100) -> List[Dict]:
+        """A player's last `limit` rating changes in chronological order (for rating graphs)
+        
+        Returns:
+            list: [{'pug_id', 'elo_before', 'elo_after', 'ts'}], including reversal rows
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT pug_id, elo_before, elo_after, ts
+            FROM elo_history
+            WHERE server_id = ? AND discord_id = ? AND pool = ?
+            ORDER BY pug_id DESC, id DESC
+            LIMIT ?
+        ''', (str(server_id), str(discord_id), pool, limit))
         
+        history = [{'pug_id': row[0], 'elo_before': row[1], 'elo_after': row[2], 'ts': row[3]}
+                   for row in reversed(cursor.fetchall())]
         conn.close()
-        return pugs
+        return history
     
-    def get_last_pug_id(self) -> Optional[int]:
-        """Get the last PUG ID"""
+    def get_history_peak_elo(self, discord_id: str, server_id: str, pool: str = 'global') -> Optional[float]:
+        """Highest rating a player reached through settled PUGs (None without history)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT MAX(pug_id) FROM pugs')
-        result = cursor.fetchone()[0]
+        cursor.execute('''
+            SELECT MAX(elo_after) FROM elo_history
+            WHERE server_id = ? AND discord_id = ? AND pool = ?
+        ''', (str(server_id), str(discord_id), pool))
+        peak = cursor.fetchone()[0]
         
         conn.close()
-        return result
+        return peak
     
     # Timeout operations
     def add_timeout(self, discord_id: str, timeout_end: datetime):
@@ -1022,6 +1518,7 @@ class DatabaseManager:
             ''', (mode_name.lower(), display_name, team_size, description))
             conn.commit()
             conn.close()
+            self.modes.invalidate('modes')
             return True, None
         except sqlite3.IntegrityError:
             conn.close()
@@ -1044,48 +1541,28 @@ class DatabaseManager:
         
         conn.commit()
         conn.close()
+        self.modes.invalidate('modes')
         return True, None
     
     def get_game_mode(self, mode_name: str) -> Optional[Dict]:
         """Get a game mode"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT mode_name, display_name, team_size, description 
-            FROM game_modes 
-            WHERE mode_name = ?
-        ''', (mode_name.lower(),))
-        
-        row = cursor.fetchone()
-        conn.close()
+        mode = self.modes.get('modes').get(mode_name.lower())
         
-        if row:
+        if mode:
             return {
-                'name': row[1],  # display_name
-                'team_size': row[2],
-                'description': row[3]
+                'name': mode['name'],  # display_name
+                'team_size': mode['team_size'],
+                'description': mode['description']
             }
         return None
     
     def get_all_game_modes(self) -> Dict:
         """Get all game modes sorted by player count (descending)"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT mode_name, display_name, team_size, description FROM game_modes ORDER BY team_size DESC')
-        rows = cursor.fetchall()
-        
-        modes = {}
-        for row in rows:
-            modes[row[0]] = {
-                'name': row[1],
-                'team_size': row[2],
-                'description': row[3]
-            }
-        
-        conn.close()
-        return modes
+        return {mode_name: {
+            'name': mode['name'],
+            'team_size': mode['team_size'],
+            'description': mode['description']
+        } for mode_name, mode in self.modes.get('modes').items()}
     
     def remove_mode(self, mode_name: str) -> tuple[bool, str]:
         """Remove a game mode"""
@@ -1109,6 +1586,7 @@ class DatabaseManager:
             cursor.execute('DELETE FROM mode_aliases WHERE mode_name = ?', (mode_name,))
             conn.commit()
             conn.close()
+            self.modes.invalidate('modes', 'aliases')
             return True, None
         except Exception as e:
             conn.close()
@@ -1142,6 +1620,7 @@ class DatabaseManager:
             cursor.execute('INSERT INTO mode_aliases (alias, mode_name) VALUES (?, ?)', (alias, mode_name))
             conn.commit()
             conn.close()
+            self.modes.invalidate('aliases')
             return True, None
         except Exception as e:
             conn.close()
@@ -1160,42 +1639,21 @@ class DatabaseManager:
         cursor.execute('DELETE FROM mode_aliases WHERE alias = ?', (alias,))
         conn.commit()
         conn.close()
+        self.modes.invalidate('aliases')
         return True, None
     
     def get_mode_aliases(self, mode_name: str) -> list:
         """Get all aliases for a mode"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT alias FROM mode_aliases WHERE mode_name = ?', (mode_name,))
-        rows = cursor.fetchall()
-        
-        conn.close()
-        return [row[0] for row in rows]
+        return [alias for alias, target in self.modes.get('aliases').items() if target == mode_name]
     
     def resolve_mode_alias(self, name: str) -> str:
         """Resolve an alias to its actual mode name, or return the name if it's not an alias"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Check if it's an alias
-        cursor.execute('SELECT mode_name FROM mode_aliases WHERE alias = ?', (name,))
-        row = cursor.fetchone()
-        
-        conn.close()
-        return row[0] if row else name
+        return self.modes.get('aliases').get(name, name)
     
     # Bot Settings operations
     def get_setting(self, key: str) -> Optional[str]:
         """Get a bot setting"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT value FROM bot_settings WHERE key = ?', (key,))
-        row = cursor.fetchone()
-        
-        conn.close()
-        return row[0] if row else None
+        return self.modes.get('settings').get(key)
     
     def set_setting(self, key: str, value: str):
         """Set a bot setting"""
@@ -1209,6 +1667,7 @@ class DatabaseManager:
         
         conn.commit()
         conn.close()
+        self.modes.invalidate('settings')
     
     def is_scraping_enabled(self) -> bool:
         """Check if scraping is enabled"""
@@ -1231,19 +1690,8 @@ class DatabaseManager:
         """
         if mode_name:
             # Check mode-specific setting
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT per_mode_elo_enabled FROM game_modes WHERE mode_name = ?
-            ''', (mode_name,))
-            
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                return row[0] == 1
-            return False
+            mode = self.modes.get('modes').get(mode_name)
+            return mode['per_mode_elo_enabled'] if mode else False
         else:
             # Legacy: Check global setting (deprecated)
             value = self.get_setting('per_mode_elo_enabled')
@@ -1275,6 +1723,7 @@ class DatabaseManager:
         
         conn.commit()
         conn.close()
+        self.modes.invalidate('modes')
         return True, None
     
     def set_mode_elo_prefix(self, mode_name: str, elo_prefix: str) -> tuple[bool, str]:
@@ -1303,6 +1752,7 @@ class DatabaseManager:
         
         conn.commit()
         conn.close()
+        self.modes.invalidate('modes')
         return True, None
     
     def get_mode_elo_prefix(self, mode_name: str) -> Optional[str]:
@@ -1314,14 +1764,8 @@ class DatabaseManager:
         Returns:
             str or None: The ELO prefix if set, None otherwise
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT elo_prefix FROM game_modes WHERE mode_name = ?', (mode_name,))
-        row = cursor.fetchone()
-        
-        conn.close()
-        return row[0] if row and row[0] else None
+        mode = self.modes.get('modes').get(mode_name)
+        return mode['elo_prefix'] if mode else None
     
     def get_effective_mode_for_elo(self, mode_name: str) -> str:
         """Get the effective mode name for ELO purposes
@@ -1343,133 +1787,42 @@ class DatabaseManager:
     
     def get_modes_with_per_mode_elo(self) -> list:
         """Get list of modes that have per-mode ELO enabled"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT mode_name FROM game_modes WHERE per_mode_elo_enabled = 1
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [row[0] for row in rows]
+        return [mode_name for mode_name, mode in self.modes.get('modes').items()
+                if mode['per_mode_elo_enabled']]
     
     def set_per_mode_elo_enabled(self, enabled: bool):
         """Enable or disable per-mode ELO (deprecated - kept for compatibility)"""
         self.set_setting('per_mode_elo_enabled', 'true' if enabled else 'false')
     
-    def get_player_mode_elo(self, discord_id: str, server_id: str, mode_name: str) -> Dict:
-        """Get player's ELO for a specific mode"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT elo, wins, losses, peak_elo, current_streak, best_win_streak, best_loss_streak
-            FROM player_mode_elos
-            WHERE discord_id = ? AND server_id = ? AND mode_name = ?
-        ''', (discord_id, server_id, mode_name))
-        
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {
-                'elo': row[0],
-                'wins': row[1],
-                'losses': row[2],
-                'peak_elo': row[3],
-                'current_streak': row[4],
-                'best_win_streak': row[5],
-                'best_loss_streak': row[6]
-            }
-        else:
-            # Return default values if not found
-            return {
-                'elo': 1000,
-                'wins': 0,
-                'losses': 0,
-                'peak_elo': 1000,
-                'current_streak': 0,
-                'best_win_streak': 0,
-                'best_loss_streak': 0
-            }
+    def get_player_mode_elo(self, discord_id: str, server_id: str, mode_name: str) -> ModeRating:
+        """Get player's ELO for a specific mode (defaults if the player has none yet)"""
+        return ModeRating(**self.ratings.get(server_id, discord_id, mode_name))
     
     def init_player_mode_elo(self, discord_id: str, server_id: str, mode_name: str, starting_elo: float = 1000):
         """Initialize a player's ELO for a specific mode"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR IGNORE INTO player_mode_elos 
-            (discord_id, server_id, mode_name, elo, peak_elo)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (discord_id, server_id, mode_name, starting_elo, starting_elo))
-        
-        conn.commit()
-        conn.close()
+        if not self.ratings.exists(server_id, discord_id, mode_name):
+            self.ratings.update(server_id, discord_id, mode_name, elo=starting_elo, peak_elo=starting_elo)
     
     def update_player_mode_elo(self, discord_id: str, server_id: str, mode_name: str, new_elo: float):
-        """Update player's ELO for a specific mode"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Get current peak ELO
-        cursor.execute('''
-            SELECT peak_elo FROM player_mode_elos
-            WHERE discord_id = ? AND server_id = ? AND mode_name = ?
-        ''', (discord_id, server_id, mode_name))
-        
-        row = cursor.fetchone()
-        peak_elo = row[0] if row else new_elo
-        
-        # Update peak if new ELO is higher
-        if new_elo > peak_elo:
+        """Update player's ELO for a specific mode (write-behind)"""
+        if self.ratings.exists(server_id, discord_id, mode_name):
+            # Update peak if new ELO is higher
+            peak_elo = max(self.ratings.get(server_id, discord_id, mode_name)['peak_elo'], new_elo)
+        else:
             peak_elo = new_elo
         
-        # Upsert (insert or update)
-        cursor.execute('''
-            INSERT OR REPLACE INTO player_mode_elos 
-            (discord_id, server_id, mode_name, elo, peak_elo, wins, losses, current_streak, best_win_streak, best_loss_streak, last_updated)
-            VALUES (
-                ?, ?, ?, ?, ?,
-                COALESCE((SELECT wins FROM player_mode_elos WHERE discord_id = ? AND server_id = ? AND mode_name = ?), 0),
-                COALESCE((SELECT losses FROM player_mode_elos WHERE discord_id = ? AND server_id = ? AND mode_name = ?), 0),
-                COALESCE((SELECT current_streak FROM player_mode_elos WHERE discord_id = ? AND server_id = ? AND mode_name = ?), 0),
-                COALESCE((SELECT best_win_streak FROM player_mode_elos WHERE discord_id = ? AND server_id = ? AND mode_name = ?), 0),
-                COALESCE((SELECT best_loss_streak FROM player_mode_elos WHERE discord_id = ? AND server_id = ? AND mode_name = ?), 0),
-                CURRENT_TIMESTAMP
-            )
-        ''', (discord_id, server_id, mode_name, new_elo, peak_elo,
-              discord_id, server_id, mode_name,
-              discord_id, server_id, mode_name,
-              discord_id, server_id, mode_name,
-              discord_id, server_id, mode_name,
-              discord_id, server_id, mode_name))
-        
-        conn.commit()
-        conn.close()
+        self.ratings.update(server_id, discord_id, mode_name, elo=new_elo, peak_elo=peak_elo)
     
     def update_player_mode_stats(self, discord_id: str, server_id: str, mode_name: str, won: bool):
-        """Update player's win/loss stats for a specific mode"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        """Update player's win/loss stats for a specific mode (write-behind)"""
         # Initialize if doesn't exist
         self.init_player_mode_elo(discord_id, server_id, mode_name)
         
         # Get current stats
-        cursor.execute('''
-            SELECT wins, losses, current_streak, best_win_streak, best_loss_streak
-            FROM player_mode_elos
-            WHERE discord_id = ? AND server_id = ? AND mode_name = ?
-        ''', (discord_id, server_id, mode_name))
-        
-        row = cursor.fetchone()
-        if not row:
-            wins, losses, current_streak, best_win_streak, best_loss_streak = 0, 0, 0, 0, 0
-        else:
-            wins, losses, current_streak, best_win_streak, best_loss_streak = row
+        stats = self.ratings.get(server_id, discord_id, mode_name)
+        wins, losses = stats['wins'], stats['losses']
+        current_streak = stats['current_streak']
+        best_win_streak, best_loss_streak = stats['best_win_streak'], stats['best_loss_streak']
         
         if won:
             wins += 1
@@ -1482,14 +1835,29 @@ class DatabaseManager:
             if abs(current_streak) > best_loss_streak:
                 best_loss_streak = abs(current_streak)
         
-        cursor.execute('''
-            UPDATE player_mode_elos
-            SET wins = ?, losses = ?, current_streak = ?, best_win_streak = ?, best_loss_streak = ?
-            WHERE discord_id = ? AND server_id = ? AND mode_name = ?
-        ''', (wins, losses, current_streak, best_win_streak, best_loss_streak, discord_id, server_id, mode_name))
+        self.ratings.update(server_id, discord_id, mode_name,
+                            wins=wins, losses=losses, current_streak=current_streak,
+                            best_win_streak=best_win_streak, best_loss_streak=best_loss_streak)
+    
+    def update_player_mode_result(self, discord_id: str, server_id: str, mode_name: str, won: bool, new_elo: float):
+        """Record one mode result: win/loss, streaks, ELO and peak in a single write
         
-        conn.commit()
-        conn.close()
+        Equivalent to update_player_mode_stats followed by update_player_mode_elo,
+        but journals one change, so the flush writes the row with one upsert.
+        """
+        stats = self.ratings.get(server_id, discord_id, mode_name)
+        current_streak, best_win_streak, best_loss_streak = self._apply_streak(
+            stats['current_streak'], stats['best_win_streak'], stats['best_loss_streak'],
+            'win' if won else 'loss')
+        
+        self.ratings.update(server_id, discord_id, mode_name,
+                            elo=new_elo,
+                            peak_elo=max(stats['peak_elo'], new_elo),
+                            wins=stats['wins'] + (1 if won else 0),
+                            losses=stats['losses'] + (0 if won else 1),
+                            current_streak=current_streak,
+                            best_win_streak=best_win_streak,
+                            best_loss_streak=best_loss_streak)
     
     def set_player_mode_elo(self, discord_id: str, server_id: str, mode_name: str, new_elo: float):
         """Admin function to set a player's ELO for a specific mode"""
@@ -1508,13 +1876,14 @@ class DatabaseManager:
         conn.close()
         return True, None
     
-    def get_all_player_mode_elos(self, discord_id: str, server_id: str) -> Dict:
+    def get_all_player_mode_elos(self, discord_id: str, server_id: str) -> Dict[str, ModeRating]:
         """Get all mode-specific ELOs for a player"""
+        self.ratings.flush()
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT mode_name, elo, wins, losses, peak_elo
+        cursor.execute(f'''
+            SELECT mode_name, {ModeRating.COLUMNS}
             FROM player_mode_elos
             WHERE discord_id = ? AND server_id = ?
             ORDER BY elo DESC
@@ -1523,16 +1892,7 @@ class DatabaseManager:
         rows = cursor.fetchall()
         conn.close()
         
-        result = {}
-        for row in rows:
-            result[row[0]] = {
-                'elo': row[1],
-                'wins': row[2],
-                'losses': row[3],
-                'peak_elo': row[4]
-            }
-        
-        return result
+        return {row[0]: ModeRating(*row[1:]) for row in rows}
 
     
     # Map management operations
@@ -1679,18 +2039,13 @@ class DatabaseManager:
         
         conn.commit()
         conn.close()
+        self.modes.invalidate('modes')
         return True, None
     
     def is_tiebreaker_enabled(self, mode_name: str) -> bool:
         """Check if tiebreaker is enabled for a mode"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT tiebreaker_enabled FROM game_modes WHERE mode_name = ?', (mode_name,))
-        row = cursor.fetchone()
-        
-        conn.close()
-        return row[0] == 1 if row and row[0] is not None else True  # Default to enabled
+        mode = self.modes.get('modes').get(mode_name)
+        return mode['tiebreaker_enabled'] if mode else True  # Default to enabled
     
     def validate_mode_for_maps(self, mode_prefix: str) -> tuple:
         """Validate that a mode/prefix exists and is properly configured for maps
@@ -1698,25 +2053,18 @@ class DatabaseManager:
         Returns:
             tuple: (is_valid: bool, error_message: str or None, effective_prefix: str or None)
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        modes = self.modes.get('modes')
         
         # Check if this is an actual mode name
-        cursor.execute('SELECT mode_name, elo_prefix FROM game_modes WHERE mode_name = ?', (mode_prefix,))
-        mode_row = cursor.fetchone()
+        mode = modes.get(mode_prefix)
         
-        if mode_row:
+        if mode:
             # It's a mode name - check if it has a prefix or use the mode name itself
-            mode_name, elo_prefix = mode_row
-            effective_prefix = elo_prefix if elo_prefix else mode_name
-            conn.close()
+            effective_prefix = mode['elo_prefix'] if mode['elo_prefix'] else mode_prefix
             return True, None, effective_prefix
         
         # Not a direct mode match - check if it's used as a prefix by any modes
-        cursor.execute('SELECT COUNT(*) FROM game_modes WHERE elo_prefix = ?', (mode_prefix,))
-        count = cursor.fetchone()[0]
-        
-        conn.close()
+        count = sum(1 for mode in modes.values() if mode['elo_prefix'] == mode_prefix)
         
         if count > 0:
             # It's a valid prefix used by modes
@@ -1822,3 +2170,61 @@ class DatabaseManager:
         conn.close()
         
         return [(prefix, count) for prefix, count in rows]
+
+
+class AsyncDatabaseManager:
+    """Awaitable facade over DatabaseManager
+    
+    Every call is queued to one dedicated DB worker thread and awaited from the
+    event loop, so slow disk writes or large reads never stall the gateway
+    heartbeat. Queries run one at a time in submission order, which also
+    matches SQLite's single-writer model.
+    
+    Usage:
+        async_db = AsyncDatabaseManager(db_manager)
+        player = await async_db.get_player(discord_id, server_id)
+        elo = await async_db.run(some_sync_helper, arg1, arg2)
+    """
+    
+    def __init__(self, db: DatabaseManager, thread_name: str = 'db-worker'):
+        self.db = db
+        self._requests = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._worker, name=thread_name, daemon=True)
+        self._thread.start()
+    
+    def _worker(self):
+        while True:
+            request = self._requests.get()
+            if request is None:  # Shutdown sentinel
+                return
+            
+            future, func, args, kwargs = request
+            if not future.set_running_or_notify_cancel():
+                continue  # Caller gave up before the query started
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+    
+    def run(self, func, *args, **kwargs) -> asyncio.Future:
+        """Run any synchronous callable on the DB worker thread and await its result"""
+        future = concurrent.futures.Future()
+        self._requests.put((future, func, args, kwargs))
+        return asyncio.wrap_future(future)
+    
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            return self.run(attr, *args, **kwargs)
+        call.__name__ = name
+        return call
+    
+    def close(self):
+        """Finish queued requests and stop the worker thread"""
+        self._requests.put(None)
+        self._thread.join()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - Leaderboard Index
+
+In-memory, per-server and per-ELO-pool rank index.
+
+Each (server_id, pool) leaderboard is a sorted array of (-elo, discord_id)
+keys maintained with bisect, so rank, percentile and neighbour lookups are
+O(log n) and a rating change only moves one key. A leaderboard is built
+from SQLite on first use (one indexed query) and kept current by the
+RatingStore: every ELO write repositions the player, targeted invalidations
+re-read the affected players and server-wide invalidations drop the index.
+
+Ties are ordered by discord_id, matching idx_players_server_elo.
+"""
+
+import bisect
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def is_simulation_player(discord_id) -> bool:
+    """Fake players created by .simulate use IDs 1000-1999 and are never ranked"""
+    try:
+        return 1000 <= int(discord_id) < 2000
+    except (ValueError, TypeError):
+        return False
+
+
+class RankIndex:
+    """Sorted ratings of one leaderboard with O(log n) rank queries
+
+    Usage:
+        index = RankIndex({'1': 1200.0, '2': 950.0})
+        index.rank('1')           # 1
+        index.update('2', 1300)   # Moves one key
+    """
+
+    def __init__(self, ratings: Dict[str, float] = None):
+        self._elos: Dict[str, float] = {}
+        self._keys: List[Tuple[float, str]] = []
+        if ratings:
+            self._elos = {str(discord_id): float(elo) for discord_id, elo in ratings.items()}
+            self._keys = sorted((-elo, discord_id) for discord_id, elo in self._elos.items())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, discord_id):
+        return str(discord_id) in self._elos
+
+    def update(self, discord_id: str, elo: float):
+        """Insert a player or move them to their new rating"""
+        discord_id = str(discord_id)
+        self.remove(discord_id)
+        self._elos[discord_id] = float(elo)
+        bisect.insort(self._keys, (-float(elo), discord_id))
+
+    def remove(self, discord_id: str):
+        """Drop a player (no-op if not ranked)"""
+        discord_id = str(discord_id)
+        elo = self._elos.pop(discord_id, None)
+        if elo is not None:
+            del self._keys[bisect.bisect_left(self._keys, (-elo, discord_id))]
+
+    def rank(self, discord_id: str) -> Optional[int]:
+        """1-based position, or None if the player is not ranked"""
+        discord_id = str(discord_id)
+        elo = self._elos.get(discord_id)
+        if elo is None:
+            return None
+        return bisect.bisect_left(self._keys, (-elo, discord_id)) + 1
+
+    def percentile(self, discord_id: str) -> Optional[float]:
+        """Percentage of ranked players below this player (100.0 for the top of a 1-player board)"""
+        rank = self.rank(discord_id)
+        if rank is None:
+            return None
+        if len(self._keys) == 1:
+            return 100.0
+        return (len(self._keys) - rank) / (len(self._keys) - 1) * 100
+
+    def neighbours(self, discord_id: str, radius: int = 2) -> List[Tuple[int, str, float]]:
+        """Players ranked within `radius` places of this player, as (rank, discord_id, elo)"""
+        rank = self.rank(discord_id)
+        if rank is None:
+            return []
+        start = max(0, rank - 1 - radius)
+        return [(start + i + 1, key[1], -key[0])
+                for i, key in enumerate(self._keys[start:rank + radius])]
+
+
+class LeaderboardIndex:
+    """RankIndex per (server_id, pool), built lazily from the database
+
+    pool is None for the global leaderboard (players table) or an effective
+    mode name for a per-mode leaderboard (player_mode_elos).
+    """
+
+    def __init__(self, db, exclude=is_simulation_player):
+        """
+        Args:
+            db: DatabaseManager used to build leaderboards
+            exclude: Predicate on discord_id for players left off every leaderboard
+        """
+        self.db = db
+        self.exclude = exclude
+        self._boards: Dict[Tuple[str, Optional[str]], RankIndex] = {}
+        self._lock = db.ratings.lock  # Shared so rating writes and rank reads never interleave
+
+    def _query(self, server_id: str, pool: Optional[str], discord_ids: List[str] = None) -> Dict[str, float]:
+        """Read ratings of a whole leaderboard (or only `discord_ids`) with one query"""
+        if pool is None:
+            sql = 'SELECT discord_id, elo FROM players WHERE server_id = ?'
+            params = [server_id]
+        else:
+            sql = 'SELECT discord_id, elo FROM player_mode_elos WHERE server_id = ? AND mode_name = ?'
+            params = [server_id, pool]
+        if discord_ids is not None:
+            sql += f" AND discord_id IN ({','.join('?' * len(discord_ids))})"
+            params.extend(discord_ids)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows = {discord_id: elo for discord_id, elo in cursor.fetchall()
+                if elo is not None and not self.exclude(discord_id)}
+        conn.close()
+        return rows
+
+    def board(self, server_id: str, pool: Optional[str] = None) -> RankIndex:
+        """The leaderboard of a server/pool, building it on first use"""
+        key = (str(server_id), pool)
+        with self._lock:
+            board = self._boards.get(key)
+            if board is None:
+                # Pending writes must be on disk before the build reads them
+                self.db.ratings.flush()
+                board = RankIndex(self._query(key[0], pool))
+                self._boards[key] = board
+            return board
+
+    def position(self, discord_id: str, server_id: str, pool: Optional[str] = None) -> Tuple[Optional[int], int]:
+        """(rank or None, number of ranked players)"""
+        with self._lock:
+            board = self.board(server_id, pool)
+            return board.rank(discord_id), len(board)
+
+    def rating_changed(self, server_id: str, discord_id: str, pool: Optional[str], elo: float):
+        """Reposition a player in an already built leaderboard"""
+        with self._lock:
+            board = self._boards.get((str(server_id), pool))
+            if board is not None and not self.exclude(discord_id):
+                board.update(discord_id, elo)
+
+    def ratings_invalidated(self, server_id: str = None, discord_ids: Iterable[str] = None):
+        """Re-read the given players, or drop whole leaderboards when no players are given"""
+        with self._lock:
+            if server_id is None or discord_ids is None:
+                for key in list(self._boards):
+                    if server_id is None or key[0] == str(server_id):
+                        del self._boards[key]
+                return
+
+            ids = [str(discord_id) for discord_id in discord_ids]
+            if not ids:
+                return
+            for (board_server, pool), board in self._boards.items():
+                if board_server != str(server_id):
+                    continue
+                current = self._query(board_server, pool, ids)
+                for discord_id in ids:
+                    if discord_id in current:
+                        board.update(discord_id, current[discord_id])
+                    else:
+                        board.remove(discord_id)
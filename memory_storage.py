@@ -0,0 +1,680 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - In-Memory Storage Backend
+
+InMemoryDatabase implements storage.StorageBackend with plain Python
+containers. Nothing is written to disk and nothing survives a restart:
+it exists so load tests and benchmarks can drive the bot's matchmaking
+and settlement paths without measuring SQLite.
+
+Semantics follow DatabaseManager (same defaults, validation messages,
+ordering and record types); pure functions of the mode/settings registry
+are shared with it outright. Every public method runs under one RLock,
+since the bot calls the store from both the event loop and the
+AsyncDatabaseManager worker thread. Returned records are copies.
+"""
+
+import functools
+import inspect
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from database import DatabaseManager
+from leaderboard_index import RankIndex, is_simulation_player
+from rating_store import MODE_DEFAULTS
+from records import ModeRating, Player, PugRecord
+
+# bot_settings rows created by the initial migration
+DEFAULT_SETTINGS = {
+    'scraping_enabled': 'false',
+    'per_mode_elo_enabled': 'false',
+    'pug_counter': '0'
+}
+
+
+def _copy(record):
+    """Independent copy of a record (rosters included)"""
+    copy = type(record)(*record.values())
+    if isinstance(copy, PugRecord):
+        copy.red_team = list(copy.red_team)
+        copy.blue_team = list(copy.blue_team)
+    return copy
+
+
+def _now() -> str:
+    """Timestamp in SQLite's CURRENT_TIMESTAMP format"""
+    return datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _synchronized(cls):
+    """Run every public method of cls under the instance lock
+
+    Generators (iter_pugs) are skipped: they take the lock per page
+    themselves, so a slow consumer never blocks other callers.
+    """
+    def locked(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.lock:
+                return func(self, *args, **kwargs)
+        return wrapper
+
+    for name, func in list(vars(cls).items()):
+        if not name.startswith('_') and inspect.isfunction(func) and not inspect.isgeneratorfunction(func):
+            setattr(cls, name, locked(func))
+    return cls
+
+
+class _Registry:
+    """ModeRegistry stand-in whose sections are the live tables"""
+
+    def __init__(self):
+        self.sections = {'modes': {}, 'aliases': {}, 'settings': dict(DEFAULT_SETTINGS)}
+
+    def get(self, section: str) -> Dict:
+        return self.sections[section]
+
+    def sort_modes(self):
+        """Keep modes ordered by team size (descending), as game_modes is read"""
+        modes = self.sections['modes']
+        self.sections['modes'] = dict(sorted(modes.items(), key=lambda item: -item[1]['team_size']))
+
+
+@_synchronized
+class InMemoryDatabase:
+    """StorageBackend kept entirely in memory (nothing is persisted)
+
+    Usage:
+        db = InMemoryDatabase()
+        db.register_player('123', 'server')
+        pug_id = db.add_pug(['123'], ['456'], '1v1', 1000, 1000, server_id='server')
+    """
+
+    persistent = False
+    archive_path = None  # archive_pugs has nothing to move
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.profiler = None  # QueryProfiler while one is attached (method timings only)
+        self.modes = _Registry()
+        self._players: Dict[Tuple[str, str], Player] = {}  # (server_id, discord_id)
+        self._mode_ratings: Dict[Tuple[str, str, str], ModeRating] = {}  # (server_id, discord_id, pool)
+        self._pugs: Dict[int, PugRecord] = {}  # pug_id ascending
+        self._next_pug_id = 1
+        self._counters: Dict[Tuple[str, str], List[int]] = {}  # (server_id, game_mode): [pugs, decided, killed]
+        self._history: List[tuple] = []  # (id, pug_id, server_id, discord_id, pool, elo_before, elo_after, ts, reversal)
+        self._timeouts: Dict[str, datetime] = {}
+        self._admins: Dict[Tuple[str, str], None] = {}  # (server_id, discord_id), insertion ordered
+        self._maps: Dict[Tuple[str, str], List[str]] = {}  # (server_id, mode_prefix): map names
+        self._cooldowns: Dict[Tuple[str, str], List[str]] = {}  # (server_id, mode_prefix): oldest first
+
+    def close(self):
+        """Nothing to release"""
+
+    def flush(self):
+        """Nothing is written behind"""
+
+    # Player operations
+    def get_player(self, discord_id: str, server_id: str = None) -> Optional[Player]:
+        """Get player (server-scoped) - does NOT auto-create"""
+        if not server_id:
+            raise ValueError("server_id is required for get_player")
+        player = self._players.get((str(server_id), str(discord_id)))
+        return _copy(player) if player is not None else None
+
+    def register_player(self, discord_id: str, server_id: str, discord_name: str = None,
+                        display_name: str = None) -> Player:
+        """Register a new player (creates with registered=1, elo needs to be set by admin)"""
+        key = (str(server_id), str(discord_id))
+        player = self._players.get(key)
+        if player is None:
+            player = self._players[key] = Player(
+                key[1], key[0], discord_name, display_name, wins=0, losses=0, total_pugs=0,
+                elo=1000.0, current_streak=0, registered=1, best_win_streak=0, best_loss_streak=0)
+        player.registered = 1
+        return _copy(player)
+
+    def player_exists(self, discord_id: str, server_id: str) -> bool:
+        """Check if a player is registered without creating them"""
+        return (str(server_id), str(discord_id)) in self._players
+
+    def find_player_by_name(self, server_id: str, name: str) -> Optional[str]:
+        """Discord ID of the player with this Discord username or display name (case-insensitive)"""
+        name = name.lower()
+        for (player_server, discord_id), player in self._players.items():
+            if player_server == str(server_id) and name in ((player.discord_name or '').lower(),
+                                                            (player.display_name or '').lower()):
+                return discord_id
+        return None
+
+    def delete_player(self, discord_id: str, server_id: str) -> bool:
+        """Delete a player; False if they didn't exist"""
+        return self._players.pop((str(server_id), str(discord_id)), None) is not None
+
+    def delete_players(self, server_id: str, discord_ids: List[str] = None) -> int:
+        """Delete several players of a server (every player if discord_ids is None)"""
+        server_id = str(server_id)
+        if discord_ids is None:
+            keys = [key for key in self._players if key[0] == server_id]
+        else:
+            keys = [(server_id, str(discord_id)) for discord_id in discord_ids]
+        return sum(self._players.pop(key, None) is not None for key in keys)
+
+    def reset_player_stats(self, server_id: str, fields: Tuple[str, ...] = ('wins', 'losses')) -> int:
+        """Set the given counters (of RESETTABLE_STATS) to 0 for every player of a server"""
+        invalid = [field for field in fields if field not in DatabaseManager.RESETTABLE_STATS]
+        if invalid or not fields:
+            raise ValueError(f"Can't reset {', '.join(invalid) or 'nothing'}")
+
+        players = self._server_players(server_id)
+        for player in players:
+            player.update({field: 0 for field in fields})
+        return len(players)
+
+    def _server_players(self, server_id: str) -> List[Player]:
+        return [player for (player_server, _), player in self._players.items() if player_server == str(server_id)]
+
+    def update_player_elo(self, discord_id: str, server_id: str, new_elo: float):
+        """Update player ELO and peak ELO if new high"""
+        player = self._players.get((str(server_id), str(discord_id)))
+        if player is None:
+            return
+        player.elo = new_elo
+        if player.peak_elo is None or new_elo > player.peak_elo:
+            player.peak_elo = new_elo
+
+    def set_player_peak_elo(self, discord_id: str, server_id: str, peak_elo: float) -> bool:
+        """Admin override of a player's peak ELO; False if the player doesn't exist"""
+        player = self._players.get((str(server_id), str(discord_id)))
+        if player is None:
+            return False
+        player.peak_elo = peak_elo
+        return True
+
+    def get_player_elo(self, discord_id: str, server_id: str, mode_name: str = None) -> Optional[float]:
+        """ELO a player is matched with in a mode (None for a global lookup of an unknown player)"""
+        pool = self._elo_pool(mode_name)
+        if pool is None:
+            player = self._players.get((str(server_id), str(discord_id)))
+            return player.elo if player is not None else None
+        rating = self._mode_ratings.get((str(server_id), str(discord_id), pool))
+        return rating.elo if rating is not None else MODE_DEFAULTS['elo']
+
+    def get_player_elos(self, discord_ids: Iterable[str], server_id: str, mode_name: str = None) -> Dict[str, Optional[float]]:
+        """get_player_elo for several players, keyed by the ids as given"""
+        pool = self._elo_pool(mode_name)
+        elos = {}
+        for discord_id in discord_ids:
+            if pool is None:
+                player = self._players.get((str(server_id), str(discord_id)))
+                elos[discord_id] = player.elo if player is not None else None
+            else:
+                rating = self._mode_ratings.get((str(server_id), str(discord_id), pool))
+                elos[discord_id] = rating.elo if rating is not None else MODE_DEFAULTS['elo']
+        return elos
+
+    def update_ut2k4_info(self, discord_id: str, server_id: str, ut2k4_name: str):
+        """Update player's UT2K4 name"""
+        player = self._players.get((str(server_id), str(discord_id)))
+        if player is not None:
+            player.ut2k4_player_name = ut2k4_name
+            player.ut2k4_last_scraped = datetime.now().isoformat()
+
+    def update_player_total_pugs(self, discord_id: str, server_id: str, total_pugs: int) -> bool:
+        """Update player's total PUG count; False if the player doesn't exist"""
+        player = self._players.get((str(server_id), str(discord_id)))
+        if player is None:
+            return False
+        player.total_pugs = total_pugs
+        return True
+
+    def get_all_players(self, server_id: str = None) -> List[Player]:
+        """Get all players, optionally filtered by server"""
+        if server_id:
+            return [_copy(player) for player in self._server_players(server_id)]
+        return [_copy(player) for player in self._players.values()]
+
+    def get_leaderboard_position(self, discord_id: str, server_id: str, mode_name: str = None) -> Dict:
+        """Player's leaderboard standing (see DatabaseManager.get_leaderboard_position)
+
+        The rank index is built per call; the memory backend keeps no leaderboards.
+        """
+        server_id = str(server_id)
+        pool = self._elo_pool(mode_name)
+        if pool is None:
+            ratings = {player.discord_id: player.elo for player in self._server_players(server_id)}
+        else:
+            ratings = {key[1]: rating.elo for key, rating in self._mode_ratings.items()
+                       if key[0] == server_id and key[2] == pool}
+        board = RankIndex({uid: elo for uid, elo in ratings.items()
+                           if elo is not None and not is_simulation_player(uid)})
+        return {
+            'position': board.rank(discord_id),
+            'total': len(board),
+            'percentile': board.percentile(discord_id)
+        }
+
+    def bulk_merge_players(self, server_id: str, rows: List[tuple], column: str = 'elo',
+                           add: bool = False, create_missing: bool = True, dry_run: bool = False) -> Dict:
+        """Merge (discord_id, value) rows into one player column (see DatabaseManager.bulk_merge_players)"""
+        valid, errors = DatabaseManager._parse_bulk_rows(rows, column, add)
+        server_id = str(server_id)
+
+        applied = []
+        for discord_id, value in valid.items():
+            player = self._players.get((server_id, discord_id))
+            if player is None and not create_missing:
+                errors.append((discord_id, "Player not found"))
+                continue
+            old = player[column] if player is not None else None
+            new = (old or 0) + value if add and player is not None else value
+            applied.append({'discord_id': discord_id,
+                            'name': player.display_name or player.discord_name if player is not None else None,
+                            'old': old, 'new': new, 'created': player is None})
+
+        if not dry_run:
+            for change in applied:
+                key = (server_id, change['discord_id'])
+                if change['created']:
+                    # Same defaults as a players row inserted without them
+                    self._players[key] = Player(key[1], key[0], wins=0, losses=0, total_pugs=0, elo=1000.0,
+                                                peak_elo=1000.0, current_streak=0, registered=0,
+                                                best_win_streak=0, best_loss_streak=0)
+                self._players[key][column] = DatabaseManager.BULK_COLUMNS[column](change['new'])
+
+        return {'applied': applied, 'errors': errors}
+
+    bulk_update_elos = DatabaseManager.bulk_update_elos
+
+    # PUG operations
+    def add_pug(self, red_team: List[str], blue_team: List[str], game_mode: str,
+                avg_red_elo: float, avg_blue_elo: float, tiebreaker_map: str = None,
+                red_captain: str = None, blue_captain: str = None, server_id: str = None) -> int:
+        """Add a new PUG and return the pug_id"""
+        pug_id = self._next_pug_id
+        self._next_pug_id += 1
+        self._pugs[pug_id] = PugRecord(
+            pug_id, pug_id, game_mode, None, avg_red_elo, avg_blue_elo, _now(), 'active', tiebreaker_map,
+            str(red_captain) if red_captain else None, str(blue_captain) if blue_captain else None,
+            str(server_id) if server_id else None,
+            [str(discord_id) for discord_id in red_team], [str(discord_id) for discord_id in blue_team],
+            False)
+        self._bump_server_counters(pug_id, pugs=1)
+        return pug_id
+
+    def _bump_server_counters(self, pug_id: int, pugs: int = 0, decided: int = 0, killed: int = 0):
+        pug = self._pugs.get(pug_id)
+        if pug is None or pug.server_id is None:
+            return
+        counters = self._counters.setdefault((pug.server_id, pug.game_mode), [0, 0, 0])
+        counters[0] += pugs
+        counters[1] += decided
+        counters[2] += killed
+
+    def _set_pug_winner(self, pug_id: int, winner: Optional[str]):
+        pug = self._pugs.get(pug_id)
+        if pug is None:
+            raise ValueError(f"PUG {pug_id} is archived or doesn't exist and can't be settled")
+        decided = (winner is not None) - (pug.winner is not None)
+        pug.winner = winner
+        if decided:
+            self._bump_server_counters(pug_id, decided=decided)
+
+    def settle_pug(self, pug_id: int, winner: Optional[str], per_player_deltas: Dict[str, Dict],
+                   server_id: str, elo_pool: str = None) -> Dict[str, Dict]:
+        """Apply a match result or its reversal (see DatabaseManager.settle_pug)
+
+        Returns:
+            dict: {discord_id: {'old': elo, 'new': elo, 'change': change}}
+        """
+        # First, so an unknown PUG raises before any rating changes
+        self._set_pug_winner(pug_id, winner)
+        server_id = str(server_id)
+        apply_streak = DatabaseManager._apply_streak
+        elo_changes = {}
+
+        for uid, delta in per_player_deltas.items():
+            uid = str(uid)
+            wins = delta.get('wins', 0)
+            losses = delta.get('losses', 0)
+            streak_result = delta.get('streak')
+
+            player = self._players.get((server_id, uid))
+            player_elo = player.elo if player is not None else 1000
+
+            if elo_pool:
+                key = (server_id, uid, elo_pool)
+                rating = self._mode_ratings.get(key)
+                mode_wins, mode_losses = wins, losses
+                if rating is None:
+                    # Like the SQL upsert: a new row can't be undone below 0 wins/losses
+                    rating = self._mode_ratings[key] = ModeRating(**MODE_DEFAULTS)
+                    mode_wins, mode_losses = max(0, wins), max(0, losses)
+                old_elo = rating.elo
+                new_elo = old_elo + delta.get('elo', 0)
+                rating.update(elo=new_elo, peak_elo=max(rating.peak_elo or new_elo, new_elo),
+                              wins=rating.wins + mode_wins, losses=rating.losses + mode_losses)
+                rating.current_streak, rating.best_win_streak, rating.best_loss_streak = apply_streak(
+                    rating.current_streak, rating.best_win_streak, rating.best_loss_streak, streak_result)
+                new_player_elo = player_elo
+            else:
+                old_elo = player_elo
+                new_elo = new_player_elo = old_elo + delta.get('elo', 0)
+
+            if player is not None:
+                player.elo = new_player_elo
+                if player.peak_elo is None or new_player_elo > player.peak_elo:
+                    player.peak_elo = new_player_elo
+                player.wins += wins
+                player.losses += losses
+                player.total_pugs += delta.get('total_pugs', 0)
+                player.current_streak, player.best_win_streak, player.best_loss_streak = apply_streak(
+                    player.current_streak, player.best_win_streak, player.best_loss_streak, streak_result)
+            elo_changes[uid] = {'old': old_elo, 'new': new_elo, 'change': new_elo - old_elo}
+
+        # Append-only rating history (a reversal appends compensating rows, flagged)
+        ts = _now()
+        for uid, change in elo_changes.items():
+            self._history.append((len(self._history) + 1, pug_id, server_id, uid, elo_pool or 'global',
+                                  change['old'], change['new'], ts, winner is None))
+        return elo_changes
+
+    def delete_pug(self, pug_id: int):
+        """Mark a PUG as killed (don't actually delete it)"""
+        self._set_pug_status(pug_id, 'killed')
+
+    def restore_pug(self, pug_id: int):
+        """Restore a killed PUG to active"""
+        self._set_pug_status(pug_id, 'active')
+
+    def _set_pug_status(self, pug_id: int, status: str):
+        pug = self._pugs.get(pug_id)
+        if pug is None:
+            return
+        killed = (status == 'killed') - (pug.status == 'killed')
+        pug.status = status
+        if killed:
+            self._bump_server_counters(pug_id, killed=killed)
+
+    def get_server_counters(self, server_id: str) -> Dict:
+        """PUG and player counts for a server (see DatabaseManager.get_server_counters)"""
+        server_id = str(server_id)
+        mode_rows = [(game_mode, *counters) for (counter_server, game_mode), counters in self._counters.items()
+                     if counter_server == server_id]
+        players = self._server_players(server_id)
+        return {
+            'total_pugs': sum(row[1] for row in mode_rows),
+            'decided_pugs': sum(row[2] for row in mode_rows),
+            'killed_pugs': sum(row[3] for row in mode_rows),
+            'pugs_by_mode': {row[0]: row[1] for row in mode_rows if row[1]},
+            'total_players': len(players),
+            'active_players': sum(1 for player in players if player.total_pugs > 0)
+        }
+
+    def _newest_pugs(self, matches, limit: int, before_id: int = None) -> List[PugRecord]:
+        """Copies of the newest `limit` PUGs for which matches(pug) is true"""
+        pugs = []
+        for pug_id in reversed(self._pugs):
+            if len(pugs) >= limit:
+                break
+            if before_id is not None and pug_id >= before_id:
+                continue
+            pug = self._pugs[pug_id]
+            if matches(pug):
+                pugs.append(_copy(pug))
+        return pugs
+
+    def get_recent_pugs(self, server_id: str = None, limit: int = 3) -> List[PugRecord]:
+        """Get a server's recent PUGs (newest first) with their teams"""
+        return self._newest_pugs(lambda pug: server_id is None or pug.server_id == str(server_id), limit)
+
+    def iter_pugs(self, server_id: str = None, before_id: int = None,
+                  page_size: int = 100) -> Iterator[PugRecord]:
+        """Stream PUGs newest first, one page at a time (the lock is held per page)"""
+        while True:
+            with self.lock:
+                page = self._newest_pugs(lambda pug: server_id is None or pug.server_id == str(server_id),
+                                         page_size, before_id)
+            yield from page
+            if len(page) < page_size:
+                return
+            before_id = page[-1]['pug_id']
+
+    def get_player_pugs(self, discord_id: str, server_id: str, limit: int = 10,
+                        before: int = None, with_result: bool = False) -> List[PugRecord]:
+        """Get a player's most recent PUGs on a server (newest first)"""
+        discord_id = str(discord_id)
+        return self._newest_pugs(
+            lambda pug: (pug.server_id == str(server_id)
+                         and (discord_id in pug.red_team or discord_id in pug.blue_team)
+                         and (not with_result or pug.winner is not None)),
+            limit, before)
+
+    def archive_pugs(self, older_than_days: float, batch_size: int = 500) -> Dict:
+        """No cold storage in memory: nothing is ever archived"""
+        return {'archived': 0, 'through_pug_id': None, 'duration': 0.0}
+
+    # Rating history
+    def get_pug_elo_changes(self, pug_id: int) -> Dict[str, Dict]:
+        """Rating change each player currently has from a PUG's result"""
+        latest = {}
+        for _, row_pug_id, _, discord_id, pool, before, after, _, reversal in self._history:
+            if row_pug_id == pug_id:
+                latest[(discord_id, pool)] = (after - before, reversal)
+        # The standing result is each player's latest row, unless that row undid it
+        return {discord_id: {'pool': pool, 'change': change}
+                for (discord_id, pool), (change, reversal) in latest.items() if not reversal}
+
+    def get_recent_elo_changes(self, discord_id: str, server_id: str, pool: str = 'global',
+                               limit: int = 10) -> List[Dict]:
+        """A player's rating change per PUG, newest first (reversed results left out)"""
+        latest = {}
+        for _, pug_id, row_server, row_discord, row_pool, before, after, ts, reversal in self._history:
+            if (row_server, row_discord, row_pool) == (str(server_id), str(discord_id), pool):
+                latest[pug_id] = ({'pug_id': pug_id, 'change': after - before, 'elo_after': after, 'ts': ts}, reversal)
+        return [change for pug_id, (change, reversal) in sorted(latest.items(), reverse=True) if not reversal][:limit]
+
+    # Timeout operations
+    def add_timeout(self, discord_id: str, timeout_end: datetime):
+        """Add a timeout for a player"""
+        self._timeouts[str(discord_id)] = timeout_end
+
+    def is_timed_out(self, discord_id: str) -> Tuple[bool, Optional[datetime]]:
+        """Check if player is timed out (an expired timeout is removed)"""
+        timeout_end = self._timeouts.get(str(discord_id))
+        if timeout_end is None:
+            return False, None
+        if datetime.now() < timeout_end:
+            return True, timeout_end
+        del self._timeouts[str(discord_id)]
+        return False, None
+
+    # PUG Admin operations
+    def add_pug_admin(self, discord_id: str, server_id: str):
+        """Add a PUG admin for a specific server"""
+        self._admins[(str(server_id), str(discord_id))] = None
+
+    def remove_pug_admin(self, discord_id: str, server_id: str):
+        """Remove a PUG admin from a specific server"""
+        self._admins.pop((str(server_id), str(discord_id)), None)
+
+    def is_pug_admin(self, discord_id: str, server_id: str) -> bool:
+        """Check if user is a PUG admin on a specific server"""
+        return (str(server_id), str(discord_id)) in self._admins
+
+    def get_pug_admins(self, server_id: str = None) -> List[str]:
+        """Get all PUG admins (of a specific server)"""
+        return [discord_id for admin_server, discord_id in self._admins
+                if not server_id or admin_server == str(server_id)]
+
+    # Game Mode operations
+    def add_game_mode(self, mode_name: str, display_name: str, team_size: int,
+                      description: str = "") -> Tuple[bool, Optional[str]]:
+        """Add a game mode"""
+        if team_size < 2 or team_size % 2 != 0:
+            return False, "Team size must be an even number of at least 2!"
+        modes = self.modes.get('modes')
+        if mode_name.lower() in modes:
+            return False, "Game mode already exists!"
+        modes[mode_name.lower()] = {
+            'name': display_name,
+            'team_size': team_size,
+            'description': description,
+            'per_mode_elo_enabled': False,
+            'elo_prefix': None,
+            'tiebreaker_enabled': True
+        }
+        self.modes.sort_modes()
+        return True, None
+
+    def remove_mode(self, mode_name: str) -> Tuple[bool, Optional[str]]:
+        """Remove a game mode and its aliases"""
+        if mode_name not in self.modes.get('modes'):
+            return False, f"Mode '{mode_name}' does not exist!"
+        if mode_name == 'default':
+            return False, "Cannot remove the default mode!"
+        del self.modes.get('modes')[mode_name]
+        aliases = self.modes.get('aliases')
+        for alias in [alias for alias, target in aliases.items() if target == mode_name]:
+            del aliases[alias]
+        return True, None
+
+    def add_mode_alias(self, alias: str, mode_name: str) -> Tuple[bool, Optional[str]]:
+        """Add an alias for a game mode"""
+        modes, aliases = self.modes.get('modes'), self.modes.get('aliases')
+        if mode_name not in modes:
+            return False, f"Mode '{mode_name}' does not exist!"
+        if alias in aliases:
+            return False, f"Alias '{alias}' already exists!"
+        if alias in modes:
+            return False, f"'{alias}' is already a mode name!"
+        aliases[alias] = mode_name
+        return True, None
+
+    def remove_mode_alias(self, alias: str) -> Tuple[bool, Optional[str]]:
+        """Remove a mode alias"""
+        if self.modes.get('aliases').pop(alias, None) is None:
+            return False, f"Alias '{alias}' does not exist!"
+        return True, None
+
+    def set_setting(self, key: str, value: str):
+        """Set a bot setting"""
+        self.modes.get('settings')[key] = value
+
+    def _set_mode_field(self, mode_name: str, field: str, value) -> Tuple[bool, Optional[str]]:
+        mode = self.modes.get('modes').get(mode_name)
+        if mode is None:
+            return False, f"Mode '{mode_name}' does not exist!"
+        mode[field] = value
+        return True, None
+
+    def set_per_mode_elo_for_mode(self, mode_name: str, enabled: bool) -> Tuple[bool, Optional[str]]:
+        """Enable or disable per-mode ELO for a specific mode"""
+        return self._set_mode_field(mode_name, 'per_mode_elo_enabled', bool(enabled))
+
+    def set_mode_elo_prefix(self, mode_name: str, elo_prefix: str) -> Tuple[bool, Optional[str]]:
+        """Set the ELO prefix for a mode (for grouping modes with same prefix)"""
+        return self._set_mode_field(mode_name, 'elo_prefix', elo_prefix.lower() if elo_prefix else None)
+
+    def set_tiebreaker_enabled(self, mode_name: str, enabled: bool) -> tuple:
+        """Enable or disable tiebreaker for a specific mode"""
+        return self._set_mode_field(mode_name, 'tiebreaker_enabled', bool(enabled))
+
+    # Reads of the mode/settings registry behave exactly as in DatabaseManager
+    get_game_mode = DatabaseManager.get_game_mode
+    get_all_game_modes = DatabaseManager.get_all_game_modes
+    get_mode_aliases = DatabaseManager.get_mode_aliases
+    resolve_mode_alias = DatabaseManager.resolve_mode_alias
+    get_setting = DatabaseManager.get_setting
+    is_scraping_enabled = DatabaseManager.is_scraping_enabled
+    set_scraping_enabled = DatabaseManager.set_scraping_enabled
+    is_per_mode_elo_enabled = DatabaseManager.is_per_mode_elo_enabled
+    get_mode_elo_prefix = DatabaseManager.get_mode_elo_prefix
+    get_effective_mode_for_elo = DatabaseManager.get_effective_mode_for_elo
+    get_modes_with_per_mode_elo = DatabaseManager.get_modes_with_per_mode_elo
+    is_tiebreaker_enabled = DatabaseManager.is_tiebreaker_enabled
+    validate_mode_for_maps = DatabaseManager.validate_mode_for_maps
+    _elo_pool = DatabaseManager._elo_pool
+
+    # Per-mode ratings
+    def get_player_mode_elo(self, discord_id: str, server_id: str, mode_name: str) -> ModeRating:
+        """Get player's ELO for a specific mode (defaults if the player has none yet)"""
+        rating = self._mode_ratings.get((str(server_id), str(discord_id), mode_name))
+        return _copy(rating) if rating is not None else ModeRating(**MODE_DEFAULTS)
+
+    def set_player_mode_elo(self, discord_id: str, server_id: str, mode_name: str,
+                            new_elo: float) -> Tuple[bool, Optional[str]]:
+        """Admin function to set a player's ELO for a specific mode"""
+        if mode_name not in self.modes.get('modes'):
+            return False, f"Mode '{mode_name}' does not exist!"
+        key = (str(server_id), str(discord_id), mode_name)
+        rating = self._mode_ratings.get(key)
+        if rating is None:
+            rating = self._mode_ratings[key] = ModeRating(**dict(MODE_DEFAULTS, peak_elo=new_elo))
+        rating.elo = new_elo
+        rating.peak_elo = max(rating.peak_elo, new_elo)
+        return True, None
+
+    def get_all_player_mode_elos(self, discord_id: str, server_id: str) -> Dict[str, ModeRating]:
+        """Get all mode-specific ELOs for a player (highest first)"""
+        ratings = [(key[2], rating) for key, rating in self._mode_ratings.items()
+                   if key[:2] == (str(server_id), str(discord_id))]
+        ratings.sort(key=lambda item: -item[1].elo)
+        return {pool: _copy(rating) for pool, rating in ratings}
+
+    # Map management operations
+    def add_map(self, server_id: str, mode_prefix: str, map_name: str) -> tuple:
+        """Add a map to a mode's map pool"""
+        maps = self._maps.setdefault((str(server_id), mode_prefix.lower()), [])
+        if map_name in maps:
+            return False, f"Map '{map_name}' already exists for {mode_prefix}!"
+        maps.append(map_name)
+        return True, None
+
+    def remove_map(self, server_id: str, mode_prefix: str, map_name: str) -> tuple:
+        """Remove a map from a mode's map pool (case-insensitive)"""
+        maps = self._maps.get((str(server_id), mode_prefix.lower()), [])
+        remaining = [name for name in maps if name.lower() != map_name.lower()]
+        if len(remaining) == len(maps):
+            return False, f"Map '{map_name}' not found for {mode_prefix}!"
+        maps[:] = remaining
+        return True, None
+
+    def get_maps_for_mode(self, server_id: str, mode_prefix: str) -> list:
+        """Get all maps for a specific mode/prefix"""
+        return sorted(self._maps.get((str(server_id), mode_prefix.lower()), []))
+
+    def get_all_maps_grouped(self, server_id: str) -> dict:
+        """Get all maps grouped by mode prefix"""
+        return {prefix: sorted(maps) for (map_server, prefix), maps in sorted(self._maps.items())
+                if map_server == str(server_id) and maps}
+
+    def add_map_to_cooldown(self, server_id: str, mode_prefix: str, map_name: str):
+        """Add a map to the cooldown list"""
+        self._cooldowns.setdefault((str(server_id), mode_prefix.lower()), []).append(map_name)
+
+    def get_maps_on_cooldown(self, server_id: str, mode_prefix: str, cooldown_count: int = 3) -> list:
+        """Get the most recently used maps (on cooldown)"""
+        used = self._cooldowns.get((str(server_id), mode_prefix.lower()), [])
+        return used[::-1][:cooldown_count]
+
+    def clear_old_cooldowns(self, server_id: str, mode_prefix: str, keep_count: int = 10):
+        """Clear old cooldown entries"""
+        used = self._cooldowns.get((str(server_id), mode_prefix.lower()))
+        if used:
+            del used[:max(0, len(used) - keep_count)]
+
+    def remove_all_maps(self, server_id: str, mode_prefix: str) -> tuple:
+        """Remove all maps from a mode's map pool
+
+        Returns:
+            tuple: (success: bool, count: int)
+        """
+        return True, len(self._maps.pop((str(server_id), mode_prefix.lower()), []))
+
+    def find_map_prefixes(self, server_id: str, search_term: str = None) -> list:
+        """Find all map prefixes with their map counts, optionally filtered by search term"""
+        return [(prefix, len(maps)) for (map_server, prefix), maps in sorted(self._maps.items())
+                if map_server == str(server_id) and maps
+                and (not search_term or search_term.lower() in prefix.lower())]
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - Schema Migrations
+
+Ordered, versioned schema migrations. The applied version is recorded in the
+schema_version table, so starting the bot on an up-to-date database costs a
+single query. Each pending migration runs in its own transaction.
+
+To add a migration, append a function decorated with @migration(<next version>,
+"<description>") at the bottom of this file. Never edit or renumber a
+migration that has already shipped.
+"""
+
+import sqlite3
+import time
+from typing import Callable, List, Tuple
+
+# (version, description, function) in ascending version order
+MIGRATIONS: List[Tuple[int, str, Callable]] = []
+
+
+def migration(version: int, description: str):
+    """Register a schema migration
+    
+    Args:
+        version: Schema version this migration brings the database to
+        description: Short human-readable summary shown in the startup log
+    """
+    def register(func):
+        if MIGRATIONS and version <= MIGRATIONS[-1][0]:
+            raise ValueError(f"Migration {version} registered out of order (latest is {MIGRATIONS[-1][0]})")
+        MIGRATIONS.append((version, description, func))
+        return func
+    return register
+
+
+def latest_version() -> int:
+    """Version the database will be at once every migration has run"""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def get_schema_version(conn) -> int:
+    """Current schema version (0 for databases that predate schema_version)"""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def run_migrations(conn) -> int:
+    """Apply every pending migration in order
+    
+    Each migration runs in its own transaction together with its
+    schema_version row, so a failure leaves the database at the last
+    version that applied cleanly.
+    
+    Args:
+        conn: Open SQLite connection
+    
+    Returns:
+        The schema version after migrating
+    """
+    current = get_schema_version(conn)
+    target = latest_version()
+    if current >= target:
+        return current
+    
+    print(f"⚙️  Migrating database schema from v{current} to v{target}...")
+    for version, description, func in MIGRATIONS:
+        if version <= current:
+            continue
+        
+        start = time.perf_counter()
+        conn.execute("BEGIN")
+        try:
+            cursor = conn.cursor()
+            func(cursor)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                           (version, description))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Migration {version} ({description}) failed, rolled back: {e}")
+            raise
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"✅ Migration {version}: {description} ({elapsed_ms:.1f} ms)")
+        current = version
+    
+    return current
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+
+@migration(1, "baseline schema")
+def _baseline_schema(cursor):
+    """Create the v2.1 schema, upgrading any pre-versioning database in place
+    
+    Databases created before schema_version existed may be at any point of the
+    old column-probe chain, so this migration keeps those probes. It runs once.
+    """
+    # Players table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS players (
+            discord_id TEXT,
+            server_id TEXT,
+            discord_name TEXT,
+            display_name TEXT,
+            wins INTEGER DEFAULT 0,
+            losses INTEGER DEFAULT 0,
+            total_pugs INTEGER DEFAULT 0,
+            elo REAL DEFAULT 1000,
+            ut2k4_player_name TEXT,
+            ut2k4_last_scraped TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (discord_id, server_id)
+        )
+    ''')
+    
+    # Migration: Add discord_name and display_name columns if they don't exist
+    try:
+        cursor.execute("SELECT discord_name FROM players LIMIT 1")
+    except:
+        print("⚠️  Adding discord_name and display_name columns to players table...")
+        cursor.execute("ALTER TABLE players ADD COLUMN discord_name TEXT")
+        cursor.execute("ALTER TABLE players ADD COLUMN display_name TEXT")
+        print("✅ Added discord_name and display_name columns")
+    
+    # Migration: Add server_id to players if it doesn't exist
+    try:
+        cursor.execute("SELECT server_id FROM players LIMIT 1")
+    except:
+        # Column doesn't exist, need to migrate
+        print("⚠️  Migrating players table to add server_id...")
+        print("   This migration PRESERVES all existing player data!")
+        
+        # Get existing players with ALL columns
+        cursor.execute("SELECT * FROM players")
+        old_players = cursor.fetchall()
+        
+        # Get column names
+        cursor.execute("PRAGMA table_info(players)")
+        old_columns = [col[1] for col in cursor.fetchall()]
+        
+        print(f"   Found {len(old_players)} players to migrate...")
+        
+        # Rename old table
+        cursor.execute("ALTER TABLE players RENAME TO players_old")
+        
+        # Create new table with server_id
+        cursor.execute('''
+            CREATE TABLE players (
+                discord_id TEXT,
+                server_id TEXT,
+                discord_name TEXT,
+                display_name TEXT,
+                wins INTEGER DEFAULT 0,
+                losses INTEGER DEFAULT 0,
+                total_pugs INTEGER DEFAULT 0,
+                elo REAL DEFAULT 1000,
+                ut2k4_player_name TEXT,
+                ut2k4_last_scraped TEXT,
+                peak_elo REAL,
+                current_streak INTEGER DEFAULT 0,
+                best_win_streak INTEGER DEFAULT 0,
+                best_loss_streak INTEGER DEFAULT 0,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (discord_id, server_id)
+            )
+        ''')
+        
+        # Migrate data - need to assign a default server_id
+        # Use 'default' as server_id for all existing players
+        print("   Migrating player data with server_id='default'...")
+        
+        # Build insert based on old columns
+        for old_player in old_players:
+            # Map old columns to values
+            player_dict = dict(zip(old_columns, old_player))
+            
+            cursor.execute('''
+                INSERT INTO players 
+                (discord_id, server_id, discord_name, display_name, wins, losses, total_pugs, 
+                 elo, ut2k4_player_name, ut2k4_last_scraped, peak_elo, current_streak, 
+                 best_win_streak, best_loss_streak, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                player_dict.get('discord_id'),
+                'default',  # Default server_id for migrated players
+                player_dict.get('discord_name'),
+                player_dict.get('display_name'),
+                player_dict.get('wins', 0),
+                player_dict.get('losses', 0),
+                player_dict.get('total_pugs', 0),
+                player_dict.get('elo', 1000),
+                player_dict.get('ut2k4_player_name'),
+                player_dict.get('ut2k4_last_scraped'),
+                player_dict.get('peak_elo', player_dict.get('elo', 1000)),
+                player_dict.get('current_streak', 0),
+                player_dict.get('best_win_streak', 0),
+                player_dict.get('best_loss_streak', 0),
+                player_dict.get('created_at')
+            ))
+        
+        # Drop old table
+        cursor.execute("DROP TABLE players_old")
+        
+        print(f"✅ Players table migrated successfully!")
+        print(f"   {len(old_players)} players migrated with server_id='default'")
+        print(f"   All ELOs, stats, and player data PRESERVED!")
+
+    # Migration: Add current_streak column if it doesn't exist
+    try:
+        cursor.execute("SELECT current_streak FROM players LIMIT 1")
+    except:
+        print("⚠️  Adding current_streak column to players table...")
+        cursor.execute("ALTER TABLE players ADD COLUMN current_streak INTEGER DEFAULT 0")
+        print("✅ Added current_streak column")
+    
+    # Migration: Add peak_elo column if it doesn't exist
+    try:
+        cursor.execute("SELECT peak_elo FROM players LIMIT 1")
+    except:
+        print("⚠️  Adding peak_elo column to players table...")
+        cursor.execute("ALTER TABLE players ADD COLUMN peak_elo REAL DEFAULT 1000")
+        # Update existing players' peak_elo to their current ELO
+        cursor.execute("UPDATE players SET peak_elo = elo WHERE peak_elo IS NULL OR peak_elo < elo")
+        print("✅ Added peak_elo column")
+    
+    # Migration: Add registered column if it doesn't exist
+    try:
+        cursor.execute("SELECT registered FROM players LIMIT 1")
+    except:
+        print("⚠️  Adding registered column to players table...")
+        cursor.execute("ALTER TABLE players ADD COLUMN registered INTEGER DEFAULT 0")
+        # Mark existing players (who have played PUGs) as registered
+        cursor.execute("UPDATE players SET registered = 1 WHERE total_pugs > 0")
+        print("✅ Added registered column")
+    
+    # Migration: Add best_win_streak column if it doesn't exist
+    try:
+        cursor.execute("SELECT best_win_streak FROM players LIMIT 1")
+    except:
+        print("⚠️  Adding best_win_streak column to players table...")
+        cursor.execute("ALTER TABLE players ADD COLUMN best_win_streak INTEGER DEFAULT 0")
+        print("✅ Added best_win_streak column")
+    
+    # Migration: Add best_loss_streak column if it doesn't exist
+    try:
+        cursor.execute("SELECT best_loss_streak FROM players LIMIT 1")
+    except:
+        print("⚠️  Adding best_loss_streak column to players table...")
+        cursor.execute("ALTER TABLE players ADD COLUMN best_loss_streak INTEGER DEFAULT 0")
+        print("✅ Added best_loss_streak column")
+    
+    # PUGs table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pugs (
+            pug_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_mode TEXT NOT NULL,
+            winner TEXT,
+            avg_red_elo REAL,
+            avg_blue_elo REAL,
+            status TEXT DEFAULT 'active',
+            tiebreaker_map TEXT,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Migration: Add status column if it doesn't exist (for existing databases)
+    try:
+        cursor.execute("SELECT status FROM pugs LIMIT 1")
+    except:
+        # Column doesn't exist, add it
+        cursor.execute("ALTER TABLE pugs ADD COLUMN status TEXT DEFAULT 'active'")
+        print("✅ Database migration: Added 'status' column to pugs table")
+    
+    # Migration: Add tiebreaker_map column if it doesn't exist
+    try:
+        cursor.execute("SELECT tiebreaker_map FROM pugs LIMIT 1")
+    except:
+        cursor.execute("ALTER TABLE pugs ADD COLUMN tiebreaker_map TEXT")
+        print("✅ Database migration: Added 'tiebreaker_map' column to pugs table")
+    
+    # Migration: Add captain columns if they don't exist
+    try:
+        cursor.execute("SELECT red_captain FROM pugs LIMIT 1")
+    except:
+        cursor.execute("ALTER TABLE pugs ADD COLUMN red_captain TEXT")
+        print("✅ Database migration: Added 'red_captain' column to pugs table")
+    
+    try:
+        cursor.execute("SELECT blue_captain FROM pugs LIMIT 1")
+    except:
+        cursor.execute("ALTER TABLE pugs ADD COLUMN blue_captain TEXT")
+        print("✅ Database migration: Added 'blue_captain' column to pugs table")
+    
+    # PUG teams table (many-to-many relationship)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pug_teams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pug_id INTEGER NOT NULL,
+            discord_id TEXT NOT NULL,
+            team TEXT NOT NULL,
+            FOREIGN KEY (pug_id) REFERENCES pugs (pug_id),
+            FOREIGN KEY (discord_id) REFERENCES players (discord_id)
+        )
+    ''')
+    
+    # Timeouts table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS timeouts (
+            discord_id TEXT PRIMARY KEY,
+            timeout_end TEXT NOT NULL,
+            FOREIGN KEY (discord_id) REFERENCES players (discord_id)
+        )
+    ''')
+    
+    # PUG Admins table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pug_admins (
+            discord_id TEXT,
+            server_id TEXT,
+            PRIMARY KEY (discord_id, server_id)
+        )
+    ''')
+    
+    # Migration: Add server_id column if it doesn't exist
+    try:
+        cursor.execute("SELECT server_id FROM pug_admins LIMIT 1")
+    except:
+        # Column doesn't exist, need to migrate
+        print("⚠️  Migrating pug_admins table to add server_id...")
+        
+        # Get existing admins
+        cursor.execute("SELECT discord_id FROM pug_admins")
+        old_admins = cursor.fetchall()
+        
+        print(f"   Found {len(old_admins)} admins to migrate...")
+        
+        # Rename old table
+        cursor.execute("ALTER TABLE pug_admins RENAME TO pug_admins_old")
+        
+        # Create new table
+        cursor.execute('''
+            CREATE TABLE pug_admins (
+                discord_id TEXT,
+                server_id TEXT,
+                PRIMARY KEY (discord_id, server_id)
+            )
+        ''')
+        
+        # Re-add old admins with default server_id
+        print("   Migrating admins with server_id='default'...")
+        for admin in old_admins:
+            cursor.execute('''
+                INSERT INTO pug_admins (discord_id, server_id)
+                VALUES (?, ?)
+            ''', (admin[0], 'default'))
+        
+        # Drop old table
+        cursor.execute("DROP TABLE pug_admins_old")
+        
+        print(f"✅ Database migration: Added 'server_id' to pug_admins table")
+        print(f"   {len(old_admins)} admins migrated with server_id='default'")
+        print(f"   All admin permissions PRESERVED!")
+    
+    # Game Modes table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS game_modes (
+            mode_name TEXT PRIMARY KEY,
+            display_name TEXT NOT NULL,
+            team_size INTEGER NOT NULL,
+            description TEXT,
+            per_mode_elo_enabled INTEGER DEFAULT 0,
+            elo_prefix TEXT,
+            tiebreaker_enabled INTEGER DEFAULT 1
+        )
+    ''')
+    
+    # Migration: Add elo_prefix column if it doesn't exist
+    try:
+        cursor.execute("SELECT elo_prefix FROM game_modes LIMIT 1")
+    except:
+        cursor.execute("ALTER TABLE game_modes ADD COLUMN elo_prefix TEXT")
+        print("✅ Database migration: Added 'elo_prefix' column to game_modes table")
+    
+    # Migration: Add per_mode_elo_enabled column if it doesn't exist
+    try:
+        cursor.execute("SELECT per_mode_elo_enabled FROM game_modes LIMIT 1")
+    except:
+        cursor.execute("ALTER TABLE game_modes ADD COLUMN per_mode_elo_enabled INTEGER DEFAULT 0")
+        print("✅ Database migration: Added 'per_mode_elo_enabled' column to game_modes table")
+    
+    # Migration: Add tiebreaker_enabled column if it doesn't exist
+    try:
+        cursor.execute("SELECT tiebreaker_enabled FROM game_modes LIMIT 1")
+    except:
+        cursor.execute("ALTER TABLE game_modes ADD COLUMN tiebreaker_enabled INTEGER DEFAULT 1")
+        print("✅ Database migration: Added 'tiebreaker_enabled' column to game_modes table")
+    
+    # Mode Aliases table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mode_aliases (
+            alias TEXT PRIMARY KEY,
+            mode_name TEXT NOT NULL,
+            FOREIGN KEY (mode_name) REFERENCES game_modes(mode_name) ON DELETE CASCADE
+        )
+    ''')
+    
+    # Player Mode ELOs table - separate ELO per mode per player
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_mode_elos (
+            discord_id TEXT,
+            server_id TEXT,
+            mode_name TEXT,
+            elo REAL DEFAULT 1000,
+            wins INTEGER DEFAULT 0,
+            losses INTEGER DEFAULT 0,
+            peak_elo REAL DEFAULT 1000,
+            current_streak INTEGER DEFAULT 0,
+            best_win_streak INTEGER DEFAULT 0,
+            best_loss_streak INTEGER DEFAULT 0,
+            last_updated TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (discord_id, server_id, mode_name),
+            FOREIGN KEY (mode_name) REFERENCES game_modes(mode_name) ON DELETE CASCADE
+        )
+    ''')
+    
+    # Maps table - store maps per mode/prefix
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            server_id TEXT NOT NULL,
+            mode_prefix TEXT NOT NULL,
+            map_name TEXT NOT NULL,
+            added_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(server_id, mode_prefix, map_name)
+        )
+    ''')
+    
+    # Map cooldowns table - track recently used maps per server
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS map_cooldowns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            server_id TEXT NOT NULL,
+            mode_prefix TEXT NOT NULL,
+            map_name TEXT NOT NULL,
+            used_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Bot Settings table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+    
+    # NOTE: No default game modes are created
+    # Admins must create game modes with .addmode command
+    # Example: .addmode 4v4 8 (creates a 4v4 mode with 8 total players)
+    
+    # Initialize scraping setting
+    cursor.execute('''
+        INSERT OR IGNORE INTO bot_settings (key, value)
+        VALUES ('scraping_enabled', 'false')
+    ''')
+    
+    # Initialize per-mode ELO setting
+    cursor.execute('''
+        INSERT OR IGNORE INTO bot_settings (key, value)
+        VALUES ('per_mode_elo_enabled', 'false')
+    ''')
+    
+    # Initialize pug counter
+    cursor.execute('''
+        INSERT OR IGNORE INTO bot_settings (key, value)
+        VALUES ('pug_counter', '0')
+    ''')
+
+
+@migration(2, "secondary indexes")
+def _secondary_indexes(cursor):
+    """Indexes for the hot access paths (see test_query_plans.py)"""
+    # PUG rosters: by PUG for history, by player for per-player history
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pug_teams_pug ON pug_teams (pug_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pug_teams_player ON pug_teams (discord_id, pug_id)")
+    
+    # Leaderboards and rank lookups (covering for ID + ELO reads)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_players_server_elo ON players (server_id, elo DESC, discord_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_player_mode_elos_leaderboard ON player_mode_elos (server_id, mode_name, elo DESC)")
+    
+    # Map cooldowns are read newest-first per server/mode
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_map_cooldowns_recent ON map_cooldowns (server_id, mode_prefix, used_at)")
+    
+    # Mode configuration lookups that are not by primary key
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_game_modes_elo_prefix ON game_modes (elo_prefix)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_mode_aliases_mode ON mode_aliases (mode_name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pug_admins_server ON pug_admins (server_id)")
+
+
+@migration(3, "server_id on pugs and pug_teams")
+def _pug_server_id(cursor):
+    """Scope PUG history to a server
+    
+    Existing PUGs are assigned the server most of their participants are
+    registered on.
+    """
+    cursor.execute("ALTER TABLE pugs ADD COLUMN server_id TEXT")
+    cursor.execute("ALTER TABLE pug_teams ADD COLUMN server_id TEXT")
+    
+    cursor.execute('''
+        UPDATE pugs SET server_id = (
+            SELECT pl.server_id
+            FROM pug_teams t
+            JOIN players pl ON pl.discord_id = t.discord_id
+            WHERE t.pug_id = pugs.pug_id
+            GROUP BY pl.server_id
+            ORDER BY COUNT(*) DESC, pl.server_id
+            LIMIT 1
+        )
+    ''')
+    cursor.execute('''
+        UPDATE pug_teams SET server_id = (
+            SELECT server_id FROM pugs WHERE pugs.pug_id = pug_teams.pug_id
+        )
+    ''')
+    
+    cursor.execute("SELECT COUNT(*) FROM pugs WHERE server_id IS NULL")
+    unassigned = cursor.fetchone()[0]
+    if unassigned:
+        print(f"⚠️  {unassigned} PUG(s) have no registered participants and were left without a server")
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pugs_server ON pugs (server_id, pug_id)")
+
+
+@migration(4, "server_counters cache")
+def _server_counters(cursor):
+    """Per-server, per-mode PUG counts kept up to date by DatabaseManager"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS server_counters (
+            server_id TEXT NOT NULL,
+            game_mode TEXT NOT NULL,
+            pugs INTEGER DEFAULT 0,
+            decided INTEGER DEFAULT 0,
+            killed INTEGER DEFAULT 0,
+            PRIMARY KEY (server_id, game_mode)
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO server_counters (server_id, game_mode, pugs, decided, killed)
+        SELECT server_id, game_mode, COUNT(*), COUNT(winner), SUM(status = 'killed')
+        FROM pugs
+        WHERE server_id IS NOT NULL
+        GROUP BY server_id, game_mode
+    ''')
+
+
+@migration(5, "elo_history table")
+def _elo_history(cursor):
+    """Append-only record of every rating change made by settlement
+    
+    pool is 'global' for the players table or the effective mode name for
+    per-mode ELO. Undoing a result appends compensating rows (flagged by
+    migration 7). Ratings from before this table are not backfilled.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS elo_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pug_id INTEGER NOT NULL,
+            server_id TEXT NOT NULL,
+            discord_id TEXT NOT NULL,
+            pool TEXT NOT NULL,
+            elo_before REAL NOT NULL,
+            elo_after REAL NOT NULL,
+            ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_elo_history_player ON elo_history (server_id, discord_id, pool, pug_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_elo_history_pug ON elo_history (pug_id)")
+
+
+@migration(6, "pugs timestamp index for archival")
+def _pugs_timestamp_index(cursor):
+    """archive_pugs finds the newest PUG older than the hot window by timestamp"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pugs_timestamp ON pugs (timestamp)")
+
+
+@migration(7, "elo_history reversal flag")
+def _elo_history_reversal(cursor):
+    """Mark the rows written by undoing a result
+    
+    The standing result of a PUG is each player's latest row unless it is a
+    reversal. Row-count parity got this wrong for PUGs settled before
+    elo_history existed, whose first row is an undo. Only latest rows are
+    read, so only they are backfilled: a reversal if the PUG has no winner
+    now, or (archived PUGs, no longer in pugs) if the row count is even.
+    """
+    cursor.execute("ALTER TABLE elo_history ADD COLUMN reversal INTEGER NOT NULL DEFAULT 0")
+    cursor.execute('''
+        UPDATE elo_history SET reversal = 1
+        WHERE id IN (
+            SELECT MAX(h.id)
+            FROM elo_history h
+            LEFT JOIN pugs p ON p.pug_id = h.pug_id
+            GROUP BY h.pug_id, h.discord_id, h.pool
+            HAVING CASE WHEN MAX(p.pug_id) IS NULL THEN COUNT(*) % 2 = 0 ELSE MAX(p.winner) IS NULL END
+        )
+    ''')
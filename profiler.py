@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - Query Profiler
+
+Opt-in instrumentation of a DatabaseManager.
+
+While attached, every public DatabaseManager method is wrapped with a timer
+and every connection it opens gets a sqlite3 trace callback, so the profiler
+sees each SQL statement as it starts. Statements are grouped by their
+normalized text (literals replaced by ?). A statement's latency runs from
+its trace callback to the next statement on the same thread or the end of
+the method that issued it, so it includes fetching its rows. Rows returned
+are counted by a thin cursor proxy.
+
+Only the most recent `samples` latencies per method/statement are kept for
+percentiles; counts and totals cover everything since the last reset.
+Nothing is wrapped or traced until attach() is called.
+"""
+
+import asyncio
+import functools
+import inspect
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List
+
+# Literals substituted into traced SQL, replaced by ? when grouping statements
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Methods that are never timed (they are called by the instrumentation itself)
+NOT_PROFILED = {'get_connection', 'close'}
+
+
+def normalize_sql(sql: str) -> str:
+    """Statement text with literals as ? and IN lists collapsed, for grouping"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (?, ...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class LatencyStats:
+    """Call count, total time, rows and a window of recent latencies"""
+
+    __slots__ = ('calls', 'total', 'max', 'rows', 'samples')
+
+    def __init__(self, samples: int):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=samples)
+
+    def add(self, elapsed: float, rows: int = 0):
+        self.calls += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.rows += rows
+        self.samples.append(elapsed)
+
+    def summary(self) -> Dict:
+        """{'calls', 'total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'rows'}"""
+        ordered = sorted(self.samples)
+
+        def percentile(p):
+            # Nearest rank over the sample window
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))] * 1000
+
+        return {
+            'calls': self.calls,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total / self.calls * 1000 if self.calls else 0.0,
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99),
+            'max_ms': self.max * 1000,
+            'rows': self.rows
+        }
+
+
+class ProfiledCursor:
+    """sqlite3.Cursor proxy that counts fetched rows for the profiler"""
+
+    __slots__ = ('_cursor', '_profiler')
+
+    def __init__(self, cursor, profiler):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_profiler', profiler)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def execute(self, *args):
+        self._cursor.execute(*args)
+        return self
+
+    def executemany(self, *args):
+        self._cursor.executemany(*args)
+        return self
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._profiler.count_rows(1)
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._profiler.count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._profiler.count_rows(len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._profiler.count_rows(1)
+            yield row
+
+
+class ProfiledConnection:
+    """Connection proxy handing out ProfiledCursors (close() reaches the real connection)"""
+
+    __slots__ = ('_conn', '_profiler')
+
+    def __init__(self, conn, profiler):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_profiler', profiler)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def cursor(self, *args):
+        return ProfiledCursor(self._conn.cursor(*args), self._profiler)
+
+    def execute(self, *args):
+        return ProfiledCursor(self._conn.execute(*args), self._profiler)
+
+    def executemany(self, *args):
+        return ProfiledCursor(self._conn.executemany(*args), self._profiler)
+
+
+class QueryProfiler:
+    """Per-method and per-statement latency statistics for one DatabaseManager
+
+    Usage:
+        profiler = QueryProfiler()
+        profiler.attach(db_manager)
+        ...
+        print(profiler.format_report())
+        profiler.detach()
+    """
+
+    def __init__(self, samples: int = 1000):
+        """
+        Args:
+            samples: Recent latencies kept per method/statement for percentiles
+        """
+        self.samples = samples
+        self.db = None
+        self.started = datetime.now()
+        self.methods: Dict[str, LatencyStats] = {}
+        self.statements: Dict[str, LatencyStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self.db is not None
+
+    def attach(self, db):
+        """Start profiling `db`: wrap its public methods and trace its connections"""
+        if self.db is not None:
+            raise RuntimeError("Profiler is already attached")
+        for name, method in inspect.getmembers(db, inspect.ismethod):
+            if not name.startswith('_') and name not in NOT_PROFILED:
+                setattr(db, name, self._wrap(name, method))
+        db.profiler = self
+        self.db = db
+
+    def detach(self):
+        """Stop profiling (collected statistics are kept until reset())"""
+        db, self.db = self.db, None
+        if db is None:
+            return
+        db.profiler = None
+        for name in [name for name, value in vars(db).items() if getattr(value, '__profiled__', False)]:
+            delattr(db, name)
+
+    def reset(self):
+        """Drop all collected statistics"""
+        with self._lock:
+            self.methods.clear()
+            self.statements.clear()
+            self.started = datetime.now()
+
+    def _wrap(self, name, method):
+        @functools.wraps(method)
+        def profiled(*args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = method(*args, **kwargs)
+                if inspect.isgenerator(result):
+                    # iter_pugs & co. do their work while being consumed
+                    result = self._profile_generator(name, result, start)
+                return result
+            finally:
+                if not inspect.isgenerator(result):
+                    self._end_statement()
+                    self._record(self.methods, name, time.perf_counter() - start, self._result_rows(result))
+        profiled.__profiled__ = True
+        return profiled
+
+    def _profile_generator(self, name, generator, start):
+        rows = 0
+        try:
+            for item in generator:
+                rows += 1
+                yield item
+        finally:
+            self._end_statement()
+            self._record(self.methods, name, time.perf_counter() - start, rows)
+
+    @staticmethod
+    def _result_rows(result) -> int:
+        """Rows a method returned: list length, 0 for None, otherwise 1"""
+        if isinstance(result, (list, tuple)):
+            return len(result)
+        return 0 if result is None else 1
+
+    def _record(self, table: Dict[str, LatencyStats], key: str, elapsed: float, rows: int = 0):
+        with self._lock:
+            stats = table.get(key)
+            if stats is None:
+                stats = table[key] = LatencyStats(self.samples)
+            stats.add(elapsed, rows)
+
+    def connection(self, conn):
+        """Trace a connection handed out by DatabaseManager.get_connection"""
+        conn.set_trace_callback(self._trace)
+        return ProfiledConnection(conn, self)
+
+    def _trace(self, sql: str):
+        """Trace callback: a statement starts, so the previous one on this thread ended"""
+        now = time.perf_counter()
+        self._end_statement(now)
+        self._local.statement = [normalize_sql(sql), now, 0]
+
+    def _end_statement(self, now: float = None):
+        statement = getattr(self._local, 'statement', None)
+        if statement is not None:
+            self._local.statement = None
+            sql, start, rows = statement
+            self._record(self.statements, sql, (now or time.perf_counter()) - start, rows)
+
+    def count_rows(self, rows: int):
+        statement = getattr(self._local, 'statement', None)
+        if statement is not None:
+            statement[2] += rows
+
+    def report(self, top: int = 10, sort: str = 'total_ms') -> Dict[str, List]:
+        """Top methods and statements by `sort` (any LatencyStats.summary key)
+
+        Returns:
+            dict: {'since': datetime, 'methods': [(name, summary)], 'statements': [(sql, summary)]}
+        """
+        with self._lock:
+            methods = [(name, stats.summary()) for name, stats in self.methods.items()]
+            statements = [(sql, stats.summary()) for sql, stats in self.statements.items()]
+        methods.sort(key=lambda item: item[1][sort], reverse=True)
+        statements.sort(key=lambda item: item[1][sort], reverse=True)
+        return {'since': self.started, 'methods': methods[:top], 'statements': statements[:top]}
+
+    def format_report(self, top: int = 20, sort: str = 'total_ms') -> str:
+        """report() as a plain-text table"""
+        report = self.report(top, sort)
+        header = f"{'calls':>8}{'total ms':>11}{'mean':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}{'rows':>9}  "
+
+        def line(label, s):
+            return (f"{s['calls']:>8}{s['total_ms']:>11.1f}{s['mean_ms']:>8.2f}{s['p50_ms']:>8.2f}"
+                    f"{s['p95_ms']:>8.2f}{s['p99_ms']:>8.2f}{s['max_ms']:>8.2f}{s['rows']:>9}  {label}")
+
+        lines = [f"DB profile {datetime.now():%Y-%m-%d %H:%M:%S} (since {report['since']:%Y-%m-%d %H:%M:%S}, "
+                 f"top {top} by {sort})",
+                 "Methods:", header + "method"]
+        lines += [line(name, s) for name, s in report['methods']]
+        lines += ["Statements:", header + "sql"]
+        lines += [line(sql if len(sql) <= 160 else sql[:157] + '...', s) for sql, s in report['statements']]
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str, top: int = 20):
+        """Append format_report() to a log file"""
+        with open(path, 'a', encoding='utf-8') as log:
+            log.write(self.format_report(top) + "\n")
+
+    async def run_periodic(self, path: str, interval: float):
+        """Dump the report to `path` every `interval` seconds while attached, until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            if not self.enabled:
+                continue
+            try:
+                await asyncio.to_thread(self.dump, path)
+            except Exception as e:
+                print(f"❌ DB profile dump failed: {e}")
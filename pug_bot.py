@@ -17,12 +17,19 @@ Version: 2.1
 import discord
 from discord.ext import commands
 import asyncio
+import concurrent.futures
+import itertools
 import os
+import time
 from datetime import datetime, timedelta, timezone
 import random
 from typing import Optional, List, Dict, Tuple
-from database import DatabaseManager
+from database import AsyncDatabaseManager
+from storage import open_storage
 from scraper import ut2k4_scraper
+from snapshots import SnapshotManager
+from profiler import QueryProfiler
+from team_balancer import balance_top, greedy_split
 
 # ============================================================================
 # CUSTOMIZATION SECTION - Configure these for your game/community
@@ -52,6 +59,16 @@ bot = commands.Bot(command_prefix='.', intents=intents, help_command=None)
 CAPTAIN_WAIT_TIME = 10
 READY_CHECK_TIMEOUT = 60
 STARTING_ELO = 1000
+SNAPSHOT_INTERVAL_HOURS = 6  # Hot backups of pug_data.db into backups/ (0 = only via .snapshot)
+SNAPSHOT_KEEP = 7  # Number of snapshots retained
+DB_PROFILING = False  # Time every DatabaseManager call and SQL statement from startup (toggle with .dbprofile on/off)
+DB_PROFILE_LOG = 'db_profile.log'  # Profile reports are appended here while profiling is on
+DB_PROFILE_DUMP_MINUTES = 15  # How often the report is written to DB_PROFILE_LOG
+ARCHIVE_AFTER_DAYS = 180  # PUGs older than this move to pug_archive.db once a day (0 = only via .archivepugs)
+STORAGE_BACKEND = os.environ.get('PUG_STORAGE_BACKEND', 'sqlite')  # 'memory' keeps nothing on disk (load tests/benchmarks)
+AUTOPICK_TIME_LIMIT = 2.0  # Seconds autopick may search before using the best split found so far (0 = no limit)
+AUTOPICK_ALTERNATIVES = 5  # Balanced splits autopick keeps for .reroll, best first (1 = no rerolls)
+REROLL_WINDOW = 20  # Seconds players get to .reroll autopicked teams before the PUG is recorded (0 = record at once)
 
 # Bot state
 bot_enabled = True
@@ -87,8 +104,25 @@ leaderboard_auto_update_data = {}  # {server_id: {'channel_id': int, 'message_id
 # PUG count update backup for undo functionality
 pug_count_backup = {}  # {server_id: {discord_id: old_total_pugs}}
 
-# Initialize database
-db_manager = DatabaseManager('pug_data.db')
+# Initialize storage (sqlite is pooled: long-lived WAL connections reused for the whole process)
+db_manager = open_storage(STORAGE_BACKEND, 'pug_data.db', pooled=True)
+
+# Async facade - hot paths await queries on a dedicated DB thread instead of blocking the event loop
+async_db = AsyncDatabaseManager(db_manager)
+
+# Autopick team searches run here, off the event loop, so big modes never stall heartbeats or other queues
+autopick_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='autopick')
+
+# Online backups (SQLite backup API, copied in small steps on a worker thread; None if nothing is persisted)
+snapshots = SnapshotManager(db_manager, keep=SNAPSHOT_KEEP) if db_manager.persistent else None
+snapshot_task = None
+
+# Opt-in query profiling (attached at startup only if DB_PROFILING)
+db_profiler = QueryProfiler()
+if DB_PROFILING:
+    db_profiler.attach(db_manager)
+profile_dump_task = None
+archive_task = None
 
 # PUG Queue Manager
 class PUGQueue:
@@ -126,6 +160,19 @@ class PUGQueue:
         self.inactivity_timeout = 4 * 60 * 60  # 4 hours in seconds
         self.queue_start_time = None  # Track when first player joins
         self.inactivity_timer = None  # Track inactivity timeout task
+        self.autopick_splits = []  # Autopicked (red_team, blue_team) options, best first - walked by .reroll
+        self.autopick_choice = 0  # Index of the option currently in red_team/blue_team
+        self.autopick_elos = {}  # ELOs autopick balanced with, so rerolls need no DB reads
+        self.reroll_timer = None  # Records the autopicked PUG when the reroll window closes
+    
+    def clear_autopick_options(self):
+        """Forget the reroll options and stop the reroll window"""
+        self.autopick_splits = []
+        self.autopick_choice = 0
+        self.autopick_elos = {}
+        if self.reroll_timer:
+            self.reroll_timer.cancel()
+            self.reroll_timer = None
     
     def reset(self):
         """Reset picking phase but keep queue intact - returns to captain selection"""
@@ -157,6 +204,7 @@ class PUGQueue:
             self.captain_timer.cancel()
         if self.ready_check_task:
             self.ready_check_task.cancel()
+        self.clear_autopick_options()
     
     def hard_reset(self):
         """Completely clear queue and reset everything"""
@@ -177,6 +225,7 @@ class PUGQueue:
         if self.inactivity_timer:
             self.inactivity_timer.cancel()
             self.inactivity_timer = None
+        self.clear_autopick_options()
         
         # Reset inactivity tracking
         self.queue_start_time = None
@@ -190,12 +239,12 @@ class PUGQueue:
     
     async def add_player(self, user):
         # Check timeout
-        is_timed_out, timeout_end = db_manager.is_timed_out(user.id)
+        is_timed_out, timeout_end = await async_db.is_timed_out(user.id)
         if is_timed_out:
             return False, f"You are timed out until {timeout_end.strftime('%Y-%m-%d %H:%M:%S')}"
         
         # Check if player is registered
-        player_data = db_manager.get_player(user.id, self.server_id)
+        player_data = await async_db.get_player(user.id, self.server_id)
         if not player_data:
             return False, "You must use `.register` before joining a queue!"
         
@@ -214,7 +263,7 @@ class PUGQueue:
         if len(self.queue) >= self.team_size or self.state != 'waiting':
             self.waiting_queue.append(user.id)
             
-            mode_data = db_manager.get_game_mode(self.game_mode_name)
+            mode_data = await async_db.get_game_mode(self.game_mode_name)
             position = len(self.waiting_queue)
             return True, f"queue_full:{position}"  # Signal to show waiting queue message
         
@@ -845,96 +894,26 @@ class PUGQueue:
                 self.state = 'waiting'
                 return
             
-            # Get all player ELOs (mode-aware)
-            all_elos = {}
-            for uid in all_players:
-                # Use get_player_elo to support per-mode ELO
-                elo = get_player_elo(uid, self.server_id, self.game_mode_name)
-                all_elos[uid] = elo
+            # Get all player ELOs (mode-aware) with one batched lookup
+            all_elos = await async_db.get_player_elos(all_players, self.server_id, self.game_mode_name)
             
             # Calculate how many players per team
             players_per_team = self.max_per_team
             
-            # Try to find the most balanced split
-            from itertools import combinations
-            import random
-            
-            best_diff = float('inf')
-            best_red_picks = None
-            best_variance = float('inf')  # For tie-breaking
-            best_win_probability_diff = float('inf')  # Additional metric
-            
-            # Calculate total ELO for optimization
-            total_elo = sum(all_elos.values())
-            target_per_team = total_elo / 2  # Ideal ELO per team
-            
-            # Try all possible combinations of players for red team
-            for red_picks in combinations(all_players, players_per_team):
-                # Calculate red team total
-                red_total = sum(all_elos[uid] for uid in red_picks)
-                
-                # Calculate blue team total (optimization: use total instead of recalculating)
-                blue_total = total_elo - red_total
-                
-                # Find the combination with smallest ELO difference
-                diff = abs(red_total - blue_total)
-                
-                # Calculate average ELOs
-                red_avg = red_total / players_per_team
-                blue_avg = blue_total / players_per_team
-                
-                # Calculate win probability (based on ELO system)
-                red_win_prob = 1 / (1 + 10 ** ((blue_avg - red_avg) / 400))
-                win_prob_diff = abs(red_win_prob - 0.5)  # Distance from 50/50
-                
-                # Calculate variance (skill distribution within teams)
-                red_elos = [all_elos[uid] for uid in red_picks]
-                blue_picks = [uid for uid in all_players if uid not in red_picks]
-                blue_elos = [all_elos[uid] for uid in blue_picks]
-                
-                # Variance calculation - how spread out are skills within each team
-                red_var = sum((elo - red_avg) ** 2 for elo in red_elos) / players_per_team
-                blue_var = sum((elo - blue_avg) ** 2 for elo in blue_elos) / players_per_team
-                total_var = red_var + blue_var
-                
-                # Early termination: if we found perfect balance, use it
-                if diff == 0 and win_prob_diff < 0.01:  # Perfect balance
-                    best_diff = 0
-                    best_red_picks = red_picks
-                    best_variance = total_var
-                    best_win_probability_diff = win_prob_diff
-                    break
-                
-                # Multi-criteria optimization:
-                # 1. Minimize ELO difference (most important)
-                # 2. Minimize win probability difference (second priority)
-                # 3. Minimize variance (tie-breaker for same ELO diff)
-                
-                is_better = False
-                
-                if diff < best_diff:
-                    # Significantly better ELO balance
-                    is_better = True
-                elif diff == best_diff:
-                    # Same ELO difference, check win probability
-                    if win_prob_diff < best_win_probability_diff:
-                        is_better = True
-                    elif win_prob_diff == best_win_probability_diff:
-                        # Same win probability, check variance
-                        if total_var < best_variance:
-                            is_better = True
-                
-                if is_better:
-                    best_diff = diff
-                    best_red_picks = red_picks
-                    best_variance = total_var
-                    best_win_probability_diff = win_prob_diff
+            # Most balanced split: smallest ELO difference, then win probability, then variance
+            # (exact search on a worker thread, see team_balancer.py)
+            # The next best distinct splits come from the same search and are kept for .reroll
+            elos = [all_elos[uid] for uid in all_players]
+            red_options, optimal = await find_balanced_splits(elos, players_per_team)
+            self.autopick_splits = [([all_players[i] for i in red], [uid for i, uid in enumerate(all_players) if i not in red])
+                                    for red in red_options if red]
+            self.autopick_choice = 0
+            self.autopick_elos = all_elos
             
             # Assign the best combination
-            if best_red_picks is not None:
+            if self.autopick_splits:
                 # Assign teams
-                self.red_team = list(best_red_picks)
-                self.blue_team = [uid for uid in all_players if uid not in best_red_picks]
+                self.red_team, self.blue_team = self.autopick_splits[0]
                 
                 # Safety check: ensure teams are not empty
                 if not self.red_team or not self.blue_team:
@@ -949,6 +928,7 @@ class PUGQueue:
                 blue_avg = blue_total / len(self.blue_team)
                 
                 # Log balancing results (for debugging)
+                print(f"[AUTOPICK] {'Optimal split' if optimal else 'Time limit reached, using best split found'}")
                 print(f"[AUTOPICK] Red: {red_avg:.0f} avg | Blue: {blue_avg:.0f} avg | Diff: {abs(red_avg - blue_avg):.0f}")
                 print(f"[AUTOPICK] Red ELOs: {sorted([all_elos[uid] for uid in self.red_team], reverse=True)}")
                 print(f"[AUTOPICK] Blue ELOs: {sorted([all_elos[uid] for uid in self.blue_team], reverse=True)}")
@@ -957,8 +937,13 @@ class PUGQueue:
                 self.red_captain = random.choice(self.red_team)
                 self.blue_captain = random.choice(self.blue_team)
                 
-                # Finish picking (this will show teams)
-                await self.finish_picking()
+                if len(self.autopick_splits) > 1 and REROLL_WINDOW > 0:
+                    # Players may .reroll to the next balanced option before the PUG is recorded
+                    await self.show_autopick_option()
+                    self.reroll_timer = asyncio.create_task(self.finish_after_reroll_window())
+                else:
+                    # Finish picking (this will show teams)
+                    await self.finish_picking()
             else:
                 await self.channel.send("❌ Error: Could not balance teams. Please try manual picking.")
                 self.state = 'selecting_captains'
@@ -968,6 +953,54 @@ class PUGQueue:
             traceback.print_exc()
             self.state = 'selecting_captains'
     
+    async def show_autopick_option(self):
+        """Show the autopick option in red_team/blue_team with its ELO averages (cached, no DB reads)"""
+        def names(team, captain):
+            listed = []
+            for uid in team:
+                member = self.channel.guild.get_member(uid)
+                name = member.display_name if member else f"Player_{uid}"
+                listed.append(f"👑 {name}" if uid == captain else name)
+            return ", ".join(listed)
+        
+        red_avg = sum(self.autopick_elos[uid] for uid in self.red_team) / len(self.red_team)
+        blue_avg = sum(self.autopick_elos[uid] for uid in self.blue_team) / len(self.blue_team)
+        
+        embed = discord.Embed(
+            title=f"Autopicked Teams - Option {self.autopick_choice + 1}/{len(self.autopick_splits)} ({self.max_per_team}v{self.max_per_team})",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name=f"🔴 Red Team ({red_avg:.0f} avg)", value=names(self.red_team, self.red_captain), inline=False)
+        embed.add_field(name=f"🔵 Blue Team ({blue_avg:.0f} avg)", value=names(self.blue_team, self.blue_captain), inline=False)
+        embed.set_footer(text=f"Use .reroll for another balanced option - teams lock in {REROLL_WINDOW} seconds after autopick")
+        await self.channel.send(embed=embed)
+    
+    async def reroll_teams(self):
+        """Switch to the next autopick option (wraps around to the best one)"""
+        self.autopick_choice = (self.autopick_choice + 1) % len(self.autopick_splits)
+        self.red_team, self.blue_team = self.autopick_splits[self.autopick_choice]
+        self.red_captain = random.choice(self.red_team)
+        self.blue_captain = random.choice(self.blue_team)
+        print(f"[AUTOPICK] Reroll: option {self.autopick_choice + 1}/{len(self.autopick_splits)}")
+        await self.show_autopick_option()
+    
+    async def finish_after_reroll_window(self):
+        """Record the chosen autopick option once REROLL_WINDOW has passed"""
+        await asyncio.sleep(REROLL_WINDOW)
+        self.reroll_timer = None  # finish_picking's reset must not cancel this task
+        
+        if self.state != 'picking' or not self.autopick_splits:
+            return
+        
+        # Everyone on the teams must still be queued
+        if any(uid not in self.queue for uid in self.red_team + self.blue_team):
+            await self.channel.send("❌ A player left before the teams locked in - autopick cancelled.")
+            self.reset()
+            return
+        
+        self.autopick_splits = []
+        await self.finish_picking()
+    
     def get_available_players(self):
         picked = self.red_team + self.blue_team
         return [uid for uid in self.queue if uid not in picked]
@@ -1112,7 +1145,7 @@ class PUGQueue:
         )
 
     async def show_teams(self, include_prediction=False):
-        mode_data = db_manager.get_game_mode(self.game_mode_name)
+        mode_data = await async_db.get_game_mode(self.game_mode_name)
         embed = discord.Embed(
             title=f"Current Teams - {mode_data['name']} ({self.max_per_team}v{self.max_per_team})", 
             color=discord.Color.blue()
@@ -1152,8 +1185,9 @@ class PUGQueue:
         # Include match prediction if picking is complete
         if include_prediction and len(self.red_team) == self.max_per_team and len(self.blue_team) == self.max_per_team:
             # Calculate team ELO averages (mode-aware)
-            red_elos = [get_player_elo(uid, self.server_id, self.game_mode_name) for uid in self.red_team]
-            blue_elos = [get_player_elo(uid, self.server_id, self.game_mode_name) for uid in self.blue_team]
+            team_elos = await async_db.get_player_elos(self.red_team + self.blue_team, self.server_id, self.game_mode_name)
+            red_elos = [team_elos[uid] for uid in self.red_team]
+            blue_elos = [team_elos[uid] for uid in self.blue_team]
             
             avg_red_elo = sum(red_elos) / len(red_elos)
             avg_blue_elo = sum(blue_elos) / len(blue_elos)
@@ -1175,28 +1209,28 @@ class PUGQueue:
             # Add tiebreaker map for 4v4 PUGs
             if self.team_size == 8:  # 4v4
                 # Check if tiebreaker is enabled for this mode
-                tiebreaker_enabled = db_manager.is_tiebreaker_enabled(self.game_mode_name)
+                tiebreaker_enabled = await async_db.is_tiebreaker_enabled(self.game_mode_name)
                 
                 if tiebreaker_enabled:
                     server_id = str(self.channel.guild.id)
                     
                     # Get effective mode for map selection (use elo_prefix if set)
-                    effective_mode = db_manager.get_effective_mode_for_elo(self.game_mode_name)
+                    effective_mode = await async_db.get_effective_mode_for_elo(self.game_mode_name)
                     
                     # Get maps for this mode
-                    mode_maps = db_manager.get_maps_for_mode(server_id, effective_mode)
+                    mode_maps = await async_db.get_maps_for_mode(server_id, effective_mode)
                     
                     # Only show tiebreaker if maps are configured
                     if mode_maps:
                         # Get maps on cooldown
-                        on_cooldown = db_manager.get_maps_on_cooldown(server_id, effective_mode, cooldown_count=3)
+                        on_cooldown = await async_db.get_maps_on_cooldown(server_id, effective_mode, cooldown_count=3)
                         
                         # Get available maps (not on cooldown)
                         available_maps = [m for m in mode_maps if m not in on_cooldown]
                         
                         # If all maps are on cooldown, reset and use all maps
                         if not available_maps:
-                            db_manager.clear_old_cooldowns(server_id, effective_mode, keep_count=0)
+                            await async_db.clear_old_cooldowns(server_id, effective_mode, keep_count=0)
                             available_maps = mode_maps.copy()
                         
                         # Select random tiebreaker from available maps
@@ -1217,6 +1251,8 @@ class PUGQueue:
             available = self.get_available_players()
             
             # Show numbered list for picking using INITIAL queue order WITH ELO
+            # Global ELOs of everyone still available, in one lookup
+            available_elos = await async_db.get_player_elos(available, self.server_id) if available else {}
             if available and self.initial_queue:
                 # Number players based on their position in initial_queue
                 available_players_list = []
@@ -1225,8 +1261,7 @@ class PUGQueue:
                         # Find position in initial queue (1-indexed)
                         position = self.initial_queue.index(uid) + 1
                         # Get player ELO and rank
-                        player_data = db_manager.get_player(uid, self.server_id)
-                        elo = player_data['elo']
+                        elo = available_elos[uid]
                         rank = get_elo_rank(elo)
                         member = self.channel.guild.get_member(uid)
                         name = member.display_name if member else f"Player_{uid}"
@@ -1236,8 +1271,7 @@ class PUGQueue:
                 # Fallback if initial_queue not set
                 available_players_list = []
                 for i, uid in enumerate(available):
-                    player_data = db_manager.get_player(uid, self.server_id)
-                    elo = player_data['elo']
+                    elo = available_elos[uid]
                     rank = get_elo_rank(elo)
                     member = self.channel.guild.get_member(uid)
                     name = member.display_name if member else f"Player_{uid}"
@@ -1255,17 +1289,18 @@ class PUGQueue:
             # Show teams with match prediction included
             await self.show_teams(include_prediction=True)
             
-            mode_data = db_manager.get_game_mode(self.game_mode_name)
+            mode_data = await async_db.get_game_mode(self.game_mode_name)
             
             # Calculate team ELO averages for database (mode-aware)
-            red_elos = [get_player_elo(uid, self.server_id, self.game_mode_name) for uid in self.red_team]
-            blue_elos = [get_player_elo(uid, self.server_id, self.game_mode_name) for uid in self.blue_team]
+            team_elos = await async_db.get_player_elos(self.red_team + self.blue_team, self.server_id, self.game_mode_name)
+            red_elos = [team_elos[uid] for uid in self.red_team]
+            blue_elos = [team_elos[uid] for uid in self.blue_team]
             
             avg_red_elo = sum(red_elos) / len(red_elos)
             avg_blue_elo = sum(blue_elos) / len(blue_elos)
             
             # Save PUG data
-            pug_number = db_manager.add_pug(
+            pug_number = await async_db.add_pug(
                 red_team=self.red_team,
                 blue_team=self.blue_team,
                 game_mode=self.game_mode_name,
@@ -1273,7 +1308,8 @@ class PUGQueue:
                 avg_blue_elo=avg_blue_elo,
                 tiebreaker_map=self.selected_tiebreaker if self.team_size == 8 else None,
                 red_captain=self.red_captain,
-                blue_captain=self.blue_captain
+                blue_captain=self.blue_captain,
+                server_id=self.server_id
             )
             
             await self.channel.send(f"This is PUG #{pug_number}. Use `.winner red` or `.winner blue` to report the result")
@@ -1286,13 +1322,13 @@ class PUGQueue:
                 if hasattr(self, 'selected_tiebreaker_mode'):
                     mode_prefix = self.selected_tiebreaker_mode
                 else:
-                    mode_prefix = db_manager.get_effective_mode_for_elo(self.game_mode_name)
+                    mode_prefix = await async_db.get_effective_mode_for_elo(self.game_mode_name)
                 
                 # Add to database cooldown
-                db_manager.add_map_to_cooldown(server_id, mode_prefix, self.selected_tiebreaker)
+                await async_db.add_map_to_cooldown(server_id, mode_prefix, self.selected_tiebreaker)
                 
                 # Clean up old cooldowns (keep last 10 for history)
-                db_manager.clear_old_cooldowns(server_id, mode_prefix, keep_count=10)
+                await async_db.clear_old_cooldowns(server_id, mode_prefix, keep_count=10)
             
             # Store the PUG ID for deadpug functionality
             self.last_pug_id = pug_number
@@ -1469,61 +1505,94 @@ def get_elo_rank(elo):
     else:
         return 'D'
 
-def get_player_elo(discord_id, server_id, mode_name=None):
-    """Get player's ELO - mode-specific if that mode has per-mode ELO enabled, else global
-    
-    If the mode has an elo_prefix set, uses that prefix for ELO lookup.
-    This allows modes like ctf2v2, ctf3v3, ctf5v5 to share the same ELO pool.
-    
+async def find_balanced_splits(elos, players_per_team):
+    """Run the autopick search on autopick_executor within AUTOPICK_TIME_LIMIT
+
+    The search stops itself at the deadline with the best split found so far.
+    Should the worker still be busy a second later (e.g. building its tables
+    for a huge mode), a greedy split is used and the search result discarded.
+    Up to AUTOPICK_ALTERNATIVES splits come back, best first, for .reroll.
+
     Args:
-        discord_id: Player's Discord ID
-        server_id: Server ID
-        mode_name: Game mode name (optional)
-        
+        elos: Rating of every queued player, in queue order
+        players_per_team: Players per team
+
     Returns:
-        float: Player's ELO rating (mode-specific or global)
+        tuple: ([red team indices, ...], True if the first is proven optimal)
     """
-    if mode_name and db_manager.is_per_mode_elo_enabled(mode_name):
-        # This mode has per-mode ELO enabled
-        # Get the effective mode name (uses elo_prefix if set)
-        effective_mode = db_manager.get_effective_mode_for_elo(mode_name)
-        mode_elo_data = db_manager.get_player_mode_elo(discord_id, server_id, effective_mode)
-        return mode_elo_data['elo']
-    else:
-        # This mode doesn't have per-mode ELO or no mode specified - use global ELO
-        player = db_manager.get_player(discord_id, server_id)
-        return player['elo']
+    deadline = time.monotonic() + AUTOPICK_TIME_LIMIT if AUTOPICK_TIME_LIMIT else None
+    started = time.perf_counter()
+    search = asyncio.get_running_loop().run_in_executor(
+        autopick_executor, balance_top, elos, players_per_team, AUTOPICK_ALTERNATIVES, deadline)
+    try:
+        red_options, optimal = await asyncio.wait_for(search, AUTOPICK_TIME_LIMIT + 1 if AUTOPICK_TIME_LIMIT else None)
+    except asyncio.TimeoutError:
+        red_options, optimal = [greedy_split(elos, players_per_team)], False
+    print(f"[AUTOPICK] {players_per_team}v{players_per_team} searched in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return red_options, optimal
 
 def get_leaderboard_position(discord_id, server_id):
-    """Get player's position on the leaderboard"""
-    players = db_manager.get_all_players(server_id)
+    """Get player's position on the leaderboard (simulation players are not ranked)"""
+    standing = db_manager.get_leaderboard_position(str(discord_id), server_id)
+    return standing['position'], standing['total']
+
+def expected_elo_change(pug, discord_id, K_FACTOR=32):
+    """Recompute a player's ELO change for a decided PUG from its stored team averages"""
+    expected_red = 1 / (1 + 10 ** ((pug['avg_blue_elo'] - pug['avg_red_elo']) / 400))
+    expected_blue = 1 - expected_red
+    on_red = str(discord_id) in pug['red_team']
     
-    # Filter out simulation players
-    active_players = []
-    for p in players:
-        try:
-            player_id = int(p['discord_id'])
-            if player_id < 1000 or player_id >= 2000:
-                active_players.append(p)
-        except (ValueError, TypeError):
-            active_players.append(p)
+    if pug['winner'] == 'red':
+        return K_FACTOR * (1 - expected_red) if on_red else K_FACTOR * (0 - expected_blue)
+    else:  # blue won
+        return K_FACTOR * (0 - expected_red) if on_red else K_FACTOR * (1 - expected_blue)
+
+async def recent_elo_summary(discord_id, server_id):
+    """(last ELO change or None, net ELO over the last 10 PUGs) for the global rating
     
-    # Sort by ELO (highest first)
-    active_players.sort(key=lambda x: x['elo'], reverse=True)
+    Read from elo_history. PUGs settled before it existed have no rows there,
+    so when it holds fewer than 10 changes the player's older decided PUGs
+    are filled in by recomputing from team averages.
+    """
+    changes = await async_db.get_recent_elo_changes(str(discord_id), server_id, 'global', 10)
+    deltas = [change['change'] for change in changes]
     
-    # Find position
-    for i, player in enumerate(active_players):
-        if str(player['discord_id']) == str(discord_id):
-            return i + 1, len(active_players)
+    if len(deltas) < 10:
+        before = changes[-1]['pug_id'] if changes else None
+        older = await async_db.get_player_pugs(str(discord_id), server_id, 10 - len(deltas),
+                                               before=before, with_result=True)
+        deltas += [expected_elo_change(pug, discord_id) for pug in older
+                   if pug.get('winner') in ('red', 'blue')]
     
-    return None, len(active_players)
+    if not deltas:
+        return None, 0
+    return deltas[0], sum(deltas)
 
 # Commands
 @bot.event
 async def on_ready():
     print(f'{bot.user} has connected to Discord!')
     print(f'Bot is ready to manage PUGs!')
-    print(f'Database: pug_data.db')
+    if db_manager.persistent:
+        print(f'Database: pug_data.db')
+    else:
+        print(f'⚠️ Storage backend: {STORAGE_BACKEND} - nothing is saved to disk!')
+    
+    # Start periodic snapshots once (on_ready fires again after reconnects)
+    global snapshot_task
+    if SNAPSHOT_INTERVAL_HOURS and snapshots and snapshot_task is None:
+        snapshot_task = asyncio.create_task(snapshots.run_periodic(SNAPSHOT_INTERVAL_HOURS * 3600))
+        print(f"💾 Database snapshots every {SNAPSHOT_INTERVAL_HOURS}h (keeping {SNAPSHOT_KEEP})")
+    
+    global profile_dump_task
+    if DB_PROFILE_DUMP_MINUTES and profile_dump_task is None:
+        profile_dump_task = asyncio.create_task(
+            db_profiler.run_periodic(DB_PROFILE_LOG, DB_PROFILE_DUMP_MINUTES * 60))
+    
+    global archive_task
+    if ARCHIVE_AFTER_DAYS and db_manager.persistent and archive_task is None:
+        archive_task = asyncio.create_task(archive_old_pugs_periodic())
+        print(f"🗄️ PUGs older than {ARCHIVE_AFTER_DAYS} days are archived daily")
     
     # Auto-initialize leaderboard for all guilds
     print("\n🔄 Initializing leaderboards...")
@@ -1713,7 +1782,7 @@ async def on_message(message):
         mode_input = content[1:].strip().split()[0]  # Get first word after +
         
         # Resolve alias to actual mode name
-        resolved_mode = db_manager.resolve_mode_alias(mode_input.lower())
+        resolved_mode = await async_db.resolve_mode_alias(mode_input.lower())
         
         # Special handling for TAM4 or aliases that resolve to default
         if mode_input.upper() == 'TAM4' or resolved_mode == 'default':
@@ -1722,7 +1791,7 @@ async def on_message(message):
             game_mode = resolved_mode
         
         # Validate game mode exists
-        mode_data = db_manager.get_game_mode(game_mode)
+        mode_data = await async_db.get_game_mode(game_mode)
         if not mode_data:
             # Silently ignore invalid modes (don't spam channel)
             return
@@ -1772,7 +1841,7 @@ async def on_message(message):
             mode_input = content[1:].strip().split()[0]  # Get first word after -
             
             # Resolve alias to actual mode name
-            resolved_mode = db_manager.resolve_mode_alias(mode_input.lower())
+            resolved_mode = await async_db.resolve_mode_alias(mode_input.lower())
             
             # Special handling for TAM4 or aliases that resolve to default
             if mode_input.upper() == 'TAM4' or resolved_mode == 'default':
@@ -1781,7 +1850,7 @@ async def on_message(message):
                 game_mode = resolved_mode
             
             # Validate game mode exists
-            mode_data = db_manager.get_game_mode(game_mode)
+            mode_data = await async_db.get_game_mode(game_mode)
             if not mode_data:
                 await ctx.send(f"❌ Game mode '{mode_input}' not found!")
                 return
@@ -1883,7 +1952,7 @@ async def on_reaction_add(reaction, user):
                         if queue.ready_check_task:
                             queue.ready_check_task.cancel()
                         
-                        mode_data = db_manager.get_game_mode(queue.game_mode_name)
+                        mode_data = await async_db.get_game_mode(queue.game_mode_name)
                         remaining = len(queue.queue)
                         needed = queue.team_size - remaining
                         
@@ -2305,10 +2374,12 @@ async def list_queue(ctx, game_mode: str = None):
             color=discord.Color.blue()
         )
         
+        # Mode-aware ELOs of the queue and the waiting list in one lookup
+        queue_elos = await async_db.get_player_elos(queue_list + queue.waiting_queue, str(ctx.guild.id), game_mode_resolved)
+        
         players = []
         for i, uid in enumerate(queue_list):
-            # Use get_player_elo to check if mode has per-mode ELO enabled
-            elo = get_player_elo(uid, str(ctx.guild.id), game_mode_resolved)
+            elo = queue_elos[uid]
             rank = get_elo_rank(elo)
             member = ctx.guild.get_member(uid)
             name = member.display_name if member else f"Player_{uid}"
@@ -2320,8 +2391,7 @@ async def list_queue(ctx, game_mode: str = None):
         if queue.waiting_queue:
             waiting_players = []
             for i, uid in enumerate(queue.waiting_queue):
-                # Use get_player_elo to check if mode has per-mode ELO enabled
-                elo = get_player_elo(uid, str(ctx.guild.id), game_mode_resolved)
+                elo = queue_elos[uid]
                 rank = get_elo_rank(elo)
                 member = ctx.guild.get_member(uid)
                 name = member.display_name if member else f"Player_{uid}"
@@ -2365,10 +2435,12 @@ async def list_queue(ctx, game_mode: str = None):
                 elif queue.state == 'picking':
                     state_indicator = " [PICKING TEAMS]"
                 
+                # Mode-aware ELOs of the whole queue in one lookup
+                queue_elos = await async_db.get_player_elos(queue.queue, str(ctx.guild.id), queue.game_mode_name)
+                
                 players = []
                 for uid in queue.queue:
-                    # Use get_player_elo to check if mode has per-mode ELO enabled
-                    elo = get_player_elo(uid, str(ctx.guild.id), queue.game_mode_name)
+                    elo = queue_elos[uid]
                     rank = get_elo_rank(elo)
                     member = ctx.guild.get_member(uid)
                     name = member.display_name if member else f"Player_{uid}"
@@ -2418,6 +2490,24 @@ async def become_captain(ctx):
     if not success:
         await ctx.send(f"❌ {error}")
 
+@bot.command(name='reroll')
+async def reroll_autopick(ctx):
+    """Switch autopicked teams to the next balanced option before the PUG is recorded"""
+    # Find the queue in this channel whose autopicked teams the user is on (no DB reads)
+    channel_queues = get_channel_queues(ctx.channel)
+    found_queue = None
+    
+    for queue_key, queue in channel_queues.items():
+        if queue.reroll_timer and ctx.author.id in queue.red_team + queue.blue_team:
+            found_queue = queue
+            break
+    
+    if not found_queue:
+        await ctx.send("❌ You are not in an autopicked pug that can still be rerolled!")
+        return
+    
+    await found_queue.reroll_teams()
+
 @bot.command(name='capfor')
 async def takeover_captain(ctx, team: str):
     """Take over as captain for a team"""
@@ -3207,15 +3297,7 @@ async def simulation_mode(ctx, game_mode: str = 'default'):
         player_data = db_manager.get_player(fake_id, self.server_id)
         if player_data['total_pugs'] == 0:
             # Initialize with some stats
-            conn = db_manager.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE players 
-                SET elo = ?
-                WHERE discord_id = ?
-            ''', (700 + (i * 50), str(fake_id)))
-            conn.commit()
-            conn.close()
+            db_manager.update_player_elo(fake_id, self.server_id, 700 + (i * 50))
     
     await ctx.send(f"✅ Simulation mode enabled for **{mode_data['name']}** with {num_players} fake players!")
     await queue.check_queue_full()
@@ -3295,7 +3377,7 @@ async def report_winner(ctx, team_or_pug: str, team: str = None):
         return
     
     # Find the PUG to report on
-    recent_pugs = db_manager.get_recent_pugs(20)
+    recent_pugs = await async_db.get_recent_pugs(str(ctx.guild.id), 20)
     pug = None
     
     if pug_number is not None:
@@ -3316,11 +3398,15 @@ async def report_winner(ctx, team_or_pug: str, team: str = None):
         if pug.get('status') == 'killed':
             await ctx.send(f"❌ PUG #{pug_number} was cancelled/killed!")
             return
+        
+        if pug.get('archived'):
+            await ctx.send(f"❌ PUG #{pug_number} is archived and can no longer be changed!")
+            return
     else:
         # Find most recent PUG that the player was in
         player_pugs = []
         for p in recent_pugs:
-            if not p.get('winner') and p.get('status') != 'killed':
+            if not p.get('winner') and p.get('status') != 'killed' and not p.get('archived'):
                 all_players = p['red_team'] + p['blue_team']
                 if str(ctx.author.id) in all_players:
                     player_pugs.append(p)
@@ -3333,7 +3419,7 @@ async def report_winner(ctx, team_or_pug: str, team: str = None):
             
             # Admin can report on any PUG - find most recent unfinished
             for p in recent_pugs:
-                if not p.get('winner') and p.get('status') != 'killed':
+                if not p.get('winner') and p.get('status') != 'killed' and not p.get('archived'):
                     pug = p
                     break
             
@@ -3438,7 +3524,7 @@ async def split_win(ctx, pug_number: int = None):
     """
     
     # Find the PUG to report on
-    recent_pugs = db_manager.get_recent_pugs(20)
+    recent_pugs = await async_db.get_recent_pugs(str(ctx.guild.id), 20)
     pug = None
     
     if pug_number is not None:
@@ -3459,11 +3545,15 @@ async def split_win(ctx, pug_number: int = None):
         if pug.get('status') == 'killed':
             await ctx.send(f"❌ PUG #{pug_number} was cancelled/killed!")
             return
+        
+        if pug.get('archived'):
+            await ctx.send(f"❌ PUG #{pug_number} is archived and can no longer be changed!")
+            return
     else:
         # Find most recent PUG that the player was in
         player_pugs = []
         for p in recent_pugs:
-            if not p.get('winner') and p.get('status') != 'killed':
+            if not p.get('winner') and p.get('status') != 'killed' and not p.get('archived'):
                 all_players = p['red_team'] + p['blue_team']
                 if str(ctx.author.id) in all_players:
                     player_pugs.append(p)
@@ -3475,7 +3565,7 @@ async def split_win(ctx, pug_number: int = None):
             
             # Admin can split on any PUG - find most recent unfinished
             for p in recent_pugs:
-                if not p.get('winner') and p.get('status') != 'killed':
+                if not p.get('winner') and p.get('status') != 'killed' and not p.get('archived'):
                     pug = p
                     break
             
@@ -3551,29 +3641,13 @@ async def split_win(ctx, pug_number: int = None):
 
 async def process_split_win(ctx, pug):
     """Process split win (draw) and update ELO for both teams"""
-    # Mark as split in database
-    db_manager.update_pug_winner(pug['pug_id'], 'split')
-    
     # Get server_id
-    server_id = pug.get('server_id', str(ctx.guild.id))
+    server_id = pug.get('server_id') or str(ctx.guild.id)
     
     # Get teams
     red_team = pug['red_team']
     blue_team = pug['blue_team']
     
-    # For a split, we DON'T update wins/losses (it's a draw)
-    # But we DO update total_pugs for both teams
-    for uid in red_team + blue_team:
-        conn = db_manager.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE players 
-            SET total_pugs = total_pugs + 1
-            WHERE discord_id = ? AND server_id = ?
-        ''', (uid, server_id))
-        conn.commit()
-        conn.close()
-    
     # Calculate ELO changes for a DRAW (score = 0.5 for both teams)
     K_FACTOR = 32
     avg_red_elo = pug['avg_red_elo']
@@ -3583,24 +3657,13 @@ async def process_split_win(ctx, pug):
     expected_red = 1 / (1 + 10 ** ((avg_blue_elo - avg_red_elo) / 400))
     expected_blue = 1 - expected_red
     
-    # Store ELO changes
-    elo_changes = {}
+    # For a split, we DON'T update wins/losses (it's a draw)
+    # But we DO update total_pugs for both teams
+    deltas = {uid: {'elo': K_FACTOR * (0.5 - expected_red), 'total_pugs': 1} for uid in red_team}
+    deltas.update({uid: {'elo': K_FACTOR * (0.5 - expected_blue), 'total_pugs': 1} for uid in blue_team})
     
-    # Update ELO for red team (score = 0.5 for draw)
-    for uid in red_team:
-        player = db_manager.get_player(uid, server_id)
-        old_elo = player['elo']
-        new_elo = player['elo'] + K_FACTOR * (0.5 - expected_red)
-        db_manager.update_player_elo(uid, server_id, new_elo)
-        elo_changes[uid] = {'old': old_elo, 'new': new_elo, 'change': new_elo - old_elo}
-    
-    # Update ELO for blue team (score = 0.5 for draw)
-    for uid in blue_team:
-        player = db_manager.get_player(uid, server_id)
-        old_elo = player['elo']
-        new_elo = player['elo'] + K_FACTOR * (0.5 - expected_blue)
-        db_manager.update_player_elo(uid, server_id, new_elo)
-        elo_changes[uid] = {'old': old_elo, 'new': new_elo, 'change': new_elo - old_elo}
+    # Mark as split and apply ELO changes in one transaction
+    elo_changes = await async_db.settle_pug(pug['pug_id'], 'split', deltas, server_id)
     
     # Show results
     embed = discord.Embed(
@@ -3613,16 +3676,14 @@ async def process_split_win(ctx, pug):
     red_changes = []
     for uid in red_team:
         change = elo_changes[uid]
-        player = db_manager.get_player(uid, server_id)
-        rank = get_elo_rank(player['elo'])
+        rank = get_elo_rank(change['new'])
         red_changes.append(f"<@{uid}>: {change['old']:.0f} → **{change['new']:.0f}** ({change['change']:+.0f}) - {rank}")
     
     # Show ELO changes for blue team
     blue_changes = []
     for uid in blue_team:
         change = elo_changes[uid]
-        player = db_manager.get_player(uid, server_id)
-        rank = get_elo_rank(player['elo'])
+        rank = get_elo_rank(change['new'])
         blue_changes.append(f"<@{uid}>: {change['old']:.0f} → **{change['new']:.0f}** ({change['change']:+.0f}) - {rank}")
     
     embed.add_field(name="🔴 Red Team", value="\n".join(red_changes), inline=False)
@@ -3642,11 +3703,8 @@ async def process_split_win(ctx, pug):
 
 async def process_winner(ctx, pug, team, admin_override=False):
     """Process winner and update stats/ELO"""
-    # Update winner in database
-    db_manager.update_pug_winner(pug['pug_id'], team)
-    
     # Get server_id from pug or ctx
-    server_id = pug.get('server_id', str(ctx.guild.id))
+    server_id = pug.get('server_id') or str(ctx.guild.id)
     mode_name = pug.get('game_mode', 'default')
     
     # Get teams
@@ -3654,14 +3712,10 @@ async def process_winner(ctx, pug, team, admin_override=False):
     loser_team = pug['blue_team'] if team == 'red' else pug['red_team']
     
     # Check if THIS MODE has per-mode ELO enabled
-    per_mode_elo = db_manager.is_per_mode_elo_enabled(mode_name)
+    per_mode_elo = await async_db.is_per_mode_elo_enabled(mode_name)
     
-    # Update wins/losses (global stats always updated)
-    for uid in winner_team:
-        db_manager.update_player_stats(uid, server_id, won=True)
-    
-    for uid in loser_team:
-        db_manager.update_player_stats(uid, server_id, won=False)
+    # Per-mode ELO uses the effective mode name (elo_prefix if set)
+    elo_pool = await async_db.get_effective_mode_for_elo(mode_name) if per_mode_elo else None
     
     # Update ELO
     K_FACTOR = 32
@@ -3672,65 +3726,19 @@ async def process_winner(ctx, pug, team, admin_override=False):
     expected_red = 1 / (1 + 10 ** ((avg_blue_elo - avg_red_elo) / 400))
     expected_blue = 1 - expected_red
     
-    # Store ELO changes
-    elo_changes = {}
-    
-    if per_mode_elo:
-        # Use per-mode ELO system
-        # Get effective mode name (uses elo_prefix if set)
-        effective_mode = db_manager.get_effective_mode_for_elo(mode_name)
-        
-        # Update mode-specific stats (use effective mode for consistency)
-        for uid in winner_team:
-            db_manager.update_player_mode_stats(uid, server_id, effective_mode, won=True)
-        
-        for uid in loser_team:
-            db_manager.update_player_mode_stats(uid, server_id, effective_mode, won=False)
-        
-        # Update ELO for winners
-        for uid in winner_team:
-            mode_elo_data = db_manager.get_player_mode_elo(uid, server_id, effective_mode)
-            old_elo = mode_elo_data['elo']
-            if team == 'red':
-                new_elo = old_elo + K_FACTOR * (1 - expected_red)
-            else:
-                new_elo = old_elo + K_FACTOR * (1 - expected_blue)
-            db_manager.update_player_mode_elo(uid, server_id, effective_mode, new_elo)
-            elo_changes[uid] = {'old': old_elo, 'new': new_elo, 'change': new_elo - old_elo}
-        
-        # Update ELO for losers
-        for uid in loser_team:
-            mode_elo_data = db_manager.get_player_mode_elo(uid, server_id, effective_mode)
-            old_elo = mode_elo_data['elo']
-            if team == 'red':
-                new_elo = old_elo + K_FACTOR * (0 - expected_blue)
-            else:
-                new_elo = old_elo + K_FACTOR * (0 - expected_red)
-            db_manager.update_player_mode_elo(uid, server_id, effective_mode, new_elo)
-            elo_changes[uid] = {'old': old_elo, 'new': new_elo, 'change': new_elo - old_elo}
+    if team == 'red':
+        winner_change = K_FACTOR * (1 - expected_red)
+        loser_change = K_FACTOR * (0 - expected_blue)
     else:
-        # Use global ELO system
-        # Update ELO for winners
-        for uid in winner_team:
-            player = db_manager.get_player(uid, server_id)
-            old_elo = player['elo']
-            if team == 'red':
-                new_elo = player['elo'] + K_FACTOR * (1 - expected_red)
-            else:
-                new_elo = player['elo'] + K_FACTOR * (1 - expected_blue)
-            db_manager.update_player_elo(uid, server_id, new_elo)
-            elo_changes[uid] = {'old': old_elo, 'new': new_elo, 'change': new_elo - old_elo}
-        
-        # Update ELO for losers
-        for uid in loser_team:
-            player = db_manager.get_player(uid, server_id)
-            old_elo = player['elo']
-            if team == 'red':
-                new_elo = player['elo'] + K_FACTOR * (0 - expected_blue)
-            else:
-                new_elo = player['elo'] + K_FACTOR * (0 - expected_red)
-            db_manager.update_player_elo(uid, server_id, new_elo)
-            elo_changes[uid] = {'old': old_elo, 'new': new_elo, 'change': new_elo - old_elo}
+        winner_change = K_FACTOR * (1 - expected_blue)
+        loser_change = K_FACTOR * (0 - expected_red)
+    
+    # Wins/losses/streaks (global stats always updated, mode stats too when per-mode ELO is on)
+    deltas = {uid: {'elo': winner_change, 'wins': 1, 'total_pugs': 1, 'streak': 'win'} for uid in winner_team}
+    deltas.update({uid: {'elo': loser_change, 'losses': 1, 'total_pugs': 1, 'streak': 'loss'} for uid in loser_team})
+    
+    # Record winner, stats and ELO in one transaction
+    elo_changes = await async_db.settle_pug(pug['pug_id'], team, deltas, server_id, elo_pool)
     
     # Show results
     mode_text = f" ({mode_name})" if per_mode_elo else ""
@@ -3744,25 +3752,14 @@ async def process_winner(ctx, pug, team, admin_override=False):
     winner_changes = []
     for uid in winner_team:
         change = elo_changes[uid]
-        if per_mode_elo:
-            mode_elo_data = db_manager.get_player_mode_elo(uid, server_id, mode_name)
-            rank = get_elo_rank(mode_elo_data['elo'])
-        else:
-            player = db_manager.get_player(uid, server_id)
-            rank = get_elo_rank(player['elo'])
-        rank = get_elo_rank(player['elo'])
+        rank = get_elo_rank(change['new'])
         winner_changes.append(f"<@{uid}>: {change['old']:.0f} → **{change['new']:.0f}** ({change['change']:+.0f}) - {rank}")
     
     # Show ELO changes for losers
     loser_changes = []
     for uid in loser_team:
         change = elo_changes[uid]
-        if per_mode_elo:
-            mode_elo_data = db_manager.get_player_mode_elo(uid, server_id, mode_name)
-            rank = get_elo_rank(mode_elo_data['elo'])
-        else:
-            player = db_manager.get_player(uid, server_id)
-            rank = get_elo_rank(player['elo'])
+        rank = get_elo_rank(change['new'])
         loser_changes.append(f"<@{uid}>: {change['old']:.0f} → **{change['new']:.0f}** ({change['change']:+.0f}) - {rank}")
     
     if team == 'red':
@@ -3786,77 +3783,39 @@ async def process_winner(ctx, pug, team, admin_override=False):
 
 async def undo_winner_logic(ctx, pug):
     """Undo a PUG winner - reverses ELO and stats (shared logic)"""
-    server_id = pug.get('server_id', str(ctx.guild.id))
+    server_id = pug.get('server_id') or str(ctx.guild.id)
+    mode_name = pug.get('game_mode', 'default')
     winning_team_name = pug['winner']
     winner_team = pug['red_team'] if winning_team_name == 'red' else pug['blue_team']
     loser_team = pug['blue_team'] if winning_team_name == 'red' else pug['red_team']
     
-    # Calculate what the ELO changes were
-    K_FACTOR = 32
-    avg_red_elo = pug['avg_red_elo']
-    avg_blue_elo = pug['avg_blue_elo']
+    # Reverse exactly what settlement recorded, in the pool it was credited to
+    recorded = await async_db.get_pug_elo_changes(pug['pug_id'])
+    if recorded:
+        pool = next(iter(recorded.values()))['pool']
+        elo_pool = None if pool == 'global' else pool
+        elo_reversal = {uid: -change['change'] for uid, change in recorded.items()}
+    else:
+        # Settled before elo_history existed: rebuild the changes from the team averages
+        # (splits always went to the global rating)
+        per_mode_elo = winning_team_name != 'split' and await async_db.is_per_mode_elo_enabled(mode_name)
+        elo_pool = await async_db.get_effective_mode_for_elo(mode_name) if per_mode_elo else None
+        if winning_team_name == 'split':
+            expected_red = 1 / (1 + 10 ** ((pug['avg_blue_elo'] - pug['avg_red_elo']) / 400))
+            elo_reversal = {uid: -32 * (0.5 - expected_red) for uid in pug['red_team']}
+            elo_reversal.update({uid: -32 * (expected_red - 0.5) for uid in pug['blue_team']})
+        else:
+            elo_reversal = {uid: -expected_elo_change(pug, uid) for uid in winner_team + loser_team}
     
-    expected_red = 1 / (1 + 10 ** ((avg_blue_elo - avg_red_elo) / 400))
-    expected_blue = 1 - expected_red
+    # Reverse ELO changes and win/loss counters (a split only counted the PUG)
+    if winning_team_name == 'split':
+        deltas = {uid: {'elo': elo_reversal.get(uid, 0), 'total_pugs': -1} for uid in winner_team + loser_team}
+    else:
+        deltas = {uid: {'elo': elo_reversal.get(uid, 0), 'wins': -1, 'total_pugs': -1} for uid in winner_team}
+        deltas.update({uid: {'elo': elo_reversal.get(uid, 0), 'losses': -1, 'total_pugs': -1} for uid in loser_team})
     
-    # Reverse ELO changes for winners
-    for uid in winner_team:
-        player = db_manager.get_player(uid, server_id)
-        current_elo = player['elo']
-        
-        # Calculate what the change was
-        if winning_team_name == 'red':
-            elo_change = K_FACTOR * (1 - expected_red)
-        else:
-            elo_change = K_FACTOR * (1 - expected_blue)
-        
-        # Reverse it
-        new_elo = current_elo - elo_change
-        db_manager.update_player_elo(uid, server_id, new_elo)
-        
-        # Reverse win counter
-        conn = db_manager.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE players 
-            SET wins = wins - 1, total_pugs = total_pugs - 1
-            WHERE discord_id = ? AND server_id = ?
-        """, (uid, server_id))
-        conn.commit()
-        conn.close()
-    
-    # Reverse ELO changes for losers
-    for uid in loser_team:
-        player = db_manager.get_player(uid, server_id)
-        current_elo = player['elo']
-        
-        # Calculate what the change was
-        if winning_team_name == 'red':
-            elo_change = K_FACTOR * (0 - expected_blue)
-        else:
-            elo_change = K_FACTOR * (0 - expected_red)
-        
-        # Reverse it
-        new_elo = current_elo - elo_change
-        db_manager.update_player_elo(uid, server_id, new_elo)
-        
-        # Reverse loss counter
-        conn = db_manager.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE players 
-            SET losses = losses - 1, total_pugs = total_pugs - 1
-            WHERE discord_id = ? AND server_id = ?
-        """, (uid, server_id))
-        conn.commit()
-        conn.close()
-    
-    # Reset winner to NULL
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE pugs SET winner = NULL WHERE pug_id = ?", (pug['pug_id'],))
-    conn.commit()
-    conn.close()
+    # Reset winner to NULL in the same transaction
+    await async_db.settle_pug(pug['pug_id'], None, deltas, server_id, elo_pool)
 
 @bot.command(name='undowinner')
 async def undo_winner(ctx, pug_number: int = None):
@@ -3870,7 +3829,7 @@ async def undo_winner(ctx, pug_number: int = None):
     
     if pug_number is None:
         # Use most recent PUG with a winner
-        recent_pugs = db_manager.get_recent_pugs(10)
+        recent_pugs = await async_db.get_recent_pugs(str(ctx.guild.id), 10)
         pug = None
         for p in recent_pugs:
             if p.get('winner') and p.get('status') != 'killed':
@@ -3882,7 +3841,7 @@ async def undo_winner(ctx, pug_number: int = None):
             return
     else:
         # Find specific PUG
-        recent_pugs = db_manager.get_recent_pugs(100)
+        recent_pugs = await async_db.get_recent_pugs(str(ctx.guild.id), 100)
         pug = None
         for p in recent_pugs:
             if p['number'] == pug_number:
@@ -3901,11 +3860,15 @@ async def undo_winner(ctx, pug_number: int = None):
             await ctx.send(f"❌ PUG #{pug['number']} is already killed/dead!")
             return
     
+    if pug.get('archived'):
+        await ctx.send(f"❌ PUG #{pug['number']} is archived and can no longer be changed!")
+        return
+    
     # Call shared undo logic
     await undo_winner_logic(ctx, pug)
     
     # Show what was reversed
-    server_id = pug.get('server_id', str(ctx.guild.id))
+    server_id = pug.get('server_id') or str(ctx.guild.id)
     winning_team_name = pug['winner']
     
     embed = discord.Embed(
@@ -3945,7 +3908,7 @@ async def set_winner_admin(ctx, pug_id: int, team: str):
         return
     
     # Find the PUG
-    recent_pugs = db_manager.get_recent_pugs(100)
+    recent_pugs = await async_db.get_recent_pugs(str(ctx.guild.id), 100)
     pug = None
     for p in recent_pugs:
         if p['number'] == pug_id:
@@ -3960,6 +3923,10 @@ async def set_winner_admin(ctx, pug_id: int, team: str):
         await ctx.send(f"❌ Cannot set winner for killed PUG #{pug_id}!")
         return
     
+    if pug.get('archived'):
+        await ctx.send(f"❌ PUG #{pug_id} is archived and can no longer be changed!")
+        return
+    
     # Check if already has same winner
     if pug.get('winner') == team:
         await ctx.send(f"ℹ️ PUG #{pug_id} already has {team.upper()} team as winner!")
@@ -3974,7 +3941,7 @@ async def set_winner_admin(ctx, pug_id: int, team: str):
         await undo_winner_logic(ctx, pug)
         
         # Refresh PUG data after undo
-        recent_pugs = db_manager.get_recent_pugs(100)
+        recent_pugs = await async_db.get_recent_pugs(str(ctx.guild.id), 100)
         for p in recent_pugs:
             if p['number'] == pug_id:
                 pug = p
@@ -4093,35 +4060,8 @@ async def my_stats(ctx):
     # Get leaderboard position
     position, total_players = get_leaderboard_position(ctx.author.id, str(ctx.guild.id))
     
-    # Find player's most recent PUG to show ELO change
-    recent_pugs = db_manager.get_recent_pugs(20)
-    last_elo_change = None
-    
-    for pug in recent_pugs:
-        if pug.get('winner'):  # Only check PUGs with results
-            player_id = str(ctx.author.id)
-            if player_id in pug['red_team'] or player_id in pug['blue_team']:
-                # Calculate what the ELO change was
-                K_FACTOR = 32
-                expected_red = 1 / (1 + 10 ** ((pug['avg_blue_elo'] - pug['avg_red_elo']) / 400))
-                expected_blue = 1 - expected_red
-                
-                # Determine if player won
-                won = (player_id in pug['red_team'] and pug['winner'] == 'red') or \
-                      (player_id in pug['blue_team'] and pug['winner'] == 'blue')
-                
-                # Calculate change
-                if pug['winner'] == 'red':
-                    if player_id in pug['red_team']:
-                        last_elo_change = K_FACTOR * (1 - expected_red)
-                    else:
-                        last_elo_change = K_FACTOR * (0 - expected_blue)
-                else:  # blue won
-                    if player_id in pug['blue_team']:
-                        last_elo_change = K_FACTOR * (1 - expected_blue)
-                    else:
-                        last_elo_change = K_FACTOR * (0 - expected_red)
-                break
+    # Last ELO change and net over the last 10 PUGs, from the rating history
+    last_elo_change, net_elo_10 = await recent_elo_summary(ctx.author.id, str(ctx.guild.id))
     
     embed = discord.Embed(
         title=f"📊 Statistics for {ctx.author.display_name}",
@@ -4143,30 +4083,6 @@ async def my_stats(ctx):
     if peak_elo is None:
         peak_elo = elo
     
-    # Calculate net ELO over last 10 PUGs
-    recent_pugs_10 = db_manager.get_recent_pugs(100)  # Get more to find player's 10
-    player_pugs = [p for p in recent_pugs_10 if (str(ctx.author.id) in p['red_team'] or str(ctx.author.id) in p['blue_team']) and p.get('winner')]
-    player_pugs = player_pugs[:10]  # Take first 10
-    
-    net_elo_10 = 0
-    if len(player_pugs) > 0:
-        K_FACTOR = 32
-        for pug in player_pugs:
-            expected_red = 1 / (1 + 10 ** ((pug['avg_blue_elo'] - pug['avg_red_elo']) / 400))
-            expected_blue = 1 - expected_red
-            
-            player_id = str(ctx.author.id)
-            if pug['winner'] == 'red':
-                if player_id in pug['red_team']:
-                    net_elo_10 += K_FACTOR * (1 - expected_red)
-                else:
-                    net_elo_10 += K_FACTOR * (0 - expected_blue)
-            else:  # blue won
-                if player_id in pug['blue_team']:
-                    net_elo_10 += K_FACTOR * (1 - expected_blue)
-                else:
-                    net_elo_10 += K_FACTOR * (0 - expected_red)
-    
     net_elo_display = f"{net_elo_10:+.0f}" if net_elo_10 != 0 else "0"
     
     embed.add_field(name="ELO", value=elo_display, inline=True)
@@ -4497,6 +4413,11 @@ async def longest_loss_streak(ctx):
     
     await ctx.send(embed=embed)
 
+def find_recent_pug(server_id: str, skip: int = 0) -> Optional[Dict]:
+    """This server's most recent PUG after skipping `skip` of them (runs on the DB worker)"""
+    pugs = db_manager.iter_pugs(server_id, page_size=skip + 1)
+    return next(itertools.islice(pugs, skip, None), None)
+
 @bot.command(name='last')
 async def last_pug(ctx, *, player_name: str = None):
     """Show the most recent PUG (or a player's last PUG)
@@ -4506,6 +4427,8 @@ async def last_pug(ctx, *, player_name: str = None):
     .last @Player - Show this player's most recent PUG
     .last PlayerName - Show this player's most recent PUG
     """
+    server_id = str(ctx.guild.id)
+    
     if player_name:
         # Find player's last PUG
         member, discord_id = await resolve_player(ctx, player_name)
@@ -4514,23 +4437,22 @@ async def last_pug(ctx, *, player_name: str = None):
             await ctx.send(f"❌ Could not find player '{player_name}'!")
             return
         
-        # Get all recent PUGs and find ones this player was in
-        recent = db_manager.get_recent_pugs(100)
-        player_pugs = [p for p in recent if str(discord_id) in p['red_team'] or str(discord_id) in p['blue_team']]
+        player_pugs = await async_db.get_player_pugs(str(discord_id), server_id, 1)
+        pug = player_pugs[0] if player_pugs else None
         
-        if not player_pugs:
+        if not pug:
             await ctx.send(f"❌ {member.display_name} hasn't played any PUGs yet!")
             return
         
-        await show_pug_info(ctx, player_pugs[0], f"{member.display_name}'s Last PUG")
+        await show_pug_info(ctx, pug, f"{member.display_name}'s Last PUG")
     else:
         # Show most recent PUG overall
-        recent = db_manager.get_recent_pugs(1)
-        if not recent:
+        pug = await async_db.run(find_recent_pug, server_id)
+        if not pug:
             await ctx.send("No PUGs have been played!")
             return
         
-        await show_pug_info(ctx, recent[0])
+        await show_pug_info(ctx, pug)
 
 @bot.command(name='mylast')
 async def my_last_pug(ctx):
@@ -4538,36 +4460,35 @@ async def my_last_pug(ctx):
     
     Usage: .mylast
     """
-    # Get all recent PUGs and find ones this player was in
     discord_id = str(ctx.author.id)
-    recent = db_manager.get_recent_pugs(100)
-    player_pugs = [p for p in recent if discord_id in p['red_team'] or discord_id in p['blue_team']]
+    player_pugs = await async_db.get_player_pugs(discord_id, str(ctx.guild.id), 1)
+    pug = player_pugs[0] if player_pugs else None
     
-    if not player_pugs:
+    if not pug:
         await ctx.send(f"❌ {ctx.author.display_name}, you haven't played any PUGs yet!")
         return
     
-    await show_pug_info(ctx, player_pugs[0], f"{ctx.author.display_name}'s Last PUG")
+    await show_pug_info(ctx, pug, f"{ctx.author.display_name}'s Last PUG")
 
 @bot.command(name='lastt')
 async def last_two_pugs(ctx):
     """Show the second most recent PUG"""
-    recent = db_manager.get_recent_pugs(2)
-    if len(recent) < 2:
+    pug = await async_db.run(find_recent_pug, str(ctx.guild.id), skip=1)
+    if not pug:
         await ctx.send("Not enough PUGs have been played!")
         return
     
-    await show_pug_info(ctx, recent[1])
+    await show_pug_info(ctx, pug)
 
 @bot.command(name='lasttt')
 async def last_three_pugs(ctx):
     """Show the third most recent PUG"""
-    recent = db_manager.get_recent_pugs(3)
-    if len(recent) < 3:
+    pug = await async_db.run(find_recent_pug, str(ctx.guild.id), skip=2)
+    if not pug:
         await ctx.send("Not enough PUGs have been played!")
         return
     
-    await show_pug_info(ctx, recent[2])
+    await show_pug_info(ctx, pug)
 
 async def show_pug_info(ctx, pug, custom_title=None):
     # Set color based on status
@@ -4617,7 +4538,7 @@ async def show_pug_info(ctx, pug, custom_title=None):
             embed.add_field(name="Mode", value=mode_data['name'], inline=False)
     
     # Get player names - try member first, then database, then API
-    server_id = pug.get('server_id', str(ctx.guild.id))
+    server_id = pug.get('server_id') or str(ctx.guild.id)
     
     red_names = []
     for uid in pug['red_team']:
@@ -4795,6 +4716,161 @@ async def show_pug_admins(ctx):
     
     await ctx.send(embed=embed)
 
+@bot.command(name='snapshot')
+async def take_snapshot(ctx):
+    """Take an online backup of the database now (Admin only)
+    
+    Usage: .snapshot
+    
+    The copy runs in the background without pausing PUGs. Only the newest
+    snapshots are kept (see SNAPSHOT_KEEP).
+    """
+    if not is_full_admin(ctx):
+        await ctx.send("❌ You don't have permission to use this command!")
+        return
+    
+    if not snapshots:
+        await ctx.send(f"❌ The {STORAGE_BACKEND} storage backend keeps nothing on disk to snapshot!")
+        return
+    
+    await ctx.send("💾 Taking database snapshot...")
+    try:
+        info = await snapshots.snapshot_async()
+    except RuntimeError as e:
+        await ctx.send(f"❌ {e}")
+        return
+    except Exception as e:
+        await ctx.send(f"❌ Snapshot failed: {e}")
+        return
+    
+    retained = snapshots.list_snapshots()
+    embed = discord.Embed(
+        title="💾 Database Snapshot Complete",
+        description=f"`{os.path.basename(info['path'])}`",
+        color=discord.Color.green()
+    )
+    embed.add_field(name="Size", value=f"{info['size'] / 1024:.0f} KB", inline=True)
+    embed.add_field(name="Duration", value=f"{info['duration']:.2f}s ({info['steps']} steps)", inline=True)
+    embed.add_field(name="Retained", value=f"{len(retained)} of {SNAPSHOT_KEEP}", inline=True)
+    if info['removed']:
+        embed.add_field(name="Rotated Out", value="\n".join(os.path.basename(path) for path in info['removed']),
+                        inline=False)
+    await ctx.send(embed=embed)
+
+async def archive_old_pugs_periodic():
+    """Move PUGs older than ARCHIVE_AFTER_DAYS to the archive database once a day"""
+    while True:
+        try:
+            # Worker thread, not the DB queue: a large first run must not hold up other queries
+            result = await asyncio.to_thread(db_manager.archive_pugs, ARCHIVE_AFTER_DAYS)
+            if result['archived']:
+                print(f"🗄️ Archived {result['archived']} PUGs (through #{result['through_pug_id']}) "
+                      f"in {result['duration']:.2f}s")
+        except Exception as e:
+            print(f"❌ PUG archival failed: {e}")
+        await asyncio.sleep(24 * 3600)
+
+@bot.command(name='archivepugs')
+async def archive_pugs_command(ctx, days: int = None):
+    """Move old PUGs to the archive database now (Admin only)
+    
+    Usage: .archivepugs or .archivepugs 90
+    
+    Archived PUGs still show in history and stats but can no longer be
+    undone or killed. Defaults to ARCHIVE_AFTER_DAYS.
+    """
+    if not is_full_admin(ctx):
+        await ctx.send("❌ You don't have permission to use this command!")
+        return
+    
+    days = days if days is not None else ARCHIVE_AFTER_DAYS
+    if not days or days < 1:
+        await ctx.send("❌ Please give an age of at least 1 day!")
+        return
+    
+    if not db_manager.persistent:
+        await ctx.send(f"❌ The {STORAGE_BACKEND} storage backend has no archive!")
+        return
+    
+    await ctx.send(f"🗄️ Archiving PUGs older than {days} days...")
+    try:
+        result = await asyncio.to_thread(db_manager.archive_pugs, days)
+    except Exception as e:
+        await ctx.send(f"❌ Archival failed: {e}")
+        return
+    
+    embed = discord.Embed(
+        title="🗄️ PUG Archival Complete",
+        description=f"`{os.path.basename(db_manager.archive_path)}`",
+        color=discord.Color.green()
+    )
+    embed.add_field(name="Archived", value=f"{result['archived']} PUGs", inline=True)
+    embed.add_field(name="Through", value=f"PUG ID {result['through_pug_id'] or '-'}", inline=True)
+    embed.add_field(name="Duration", value=f"{result['duration']:.2f}s", inline=True)
+    await ctx.send(embed=embed)
+
+@bot.command(name='dbprofile')
+async def db_profile(ctx, action: str = None):
+    """Show or control database query profiling (Admin only)
+    
+    Usage: .dbprofile [on|off|reset|dump]
+    
+    Without an action, shows the slowest DB methods and SQL statements by
+    total time. While on, the report is also appended to DB_PROFILE_LOG
+    every DB_PROFILE_DUMP_MINUTES.
+    """
+    if not is_full_admin(ctx):
+        await ctx.send("❌ You don't have permission to use this command!")
+        return
+    
+    action = (action or '').lower()
+    if action == 'on':
+        if db_profiler.enabled:
+            await ctx.send("ℹ️ DB profiling is already on.")
+            return
+        db_profiler.attach(db_manager)
+        await ctx.send(f"📈 DB profiling **enabled** (report every {DB_PROFILE_DUMP_MINUTES} min to `{DB_PROFILE_LOG}`)")
+        return
+    if action == 'off':
+        db_profiler.detach()
+        await ctx.send("📉 DB profiling **disabled** (statistics kept until `.dbprofile reset`)")
+        return
+    if action == 'reset':
+        db_profiler.reset()
+        await ctx.send("🔄 DB profile statistics cleared.")
+        return
+    if action == 'dump':
+        await asyncio.to_thread(db_profiler.dump, DB_PROFILE_LOG)
+        await ctx.send(f"💾 DB profile appended to `{DB_PROFILE_LOG}`")
+        return
+    if action:
+        await ctx.send("❌ Usage: `.dbprofile [on|off|reset|dump]`")
+        return
+    
+    report = db_profiler.report(top=8)
+    if not report['methods']:
+        state = "on" if db_profiler.enabled else "off (`.dbprofile on` to start)"
+        await ctx.send(f"📈 No DB profile data yet - profiling is {state}.")
+        return
+    
+    def table(rows, width):
+        lines = [f"{'calls':>6}{'total':>9}{'p50':>7}{'p95':>7}{'p99':>7}{'rows':>7}  name"]
+        for name, s in rows:
+            label = name if len(name) <= width else name[:width - 3] + '...'
+            lines.append(f"{s['calls']:>6}{s['total_ms']:>9.0f}{s['p50_ms']:>7.1f}{s['p95_ms']:>7.1f}"
+                         f"{s['p99_ms']:>7.1f}{s['rows']:>7}  {label}")
+        return "```\n" + "\n".join(lines) + "\n```"
+    
+    embed = discord.Embed(
+        title="📈 Database Profile",
+        description=f"Since {report['since'].strftime('%Y-%m-%d %H:%M')} - "
+                    f"profiling is {'on' if db_profiler.enabled else 'off'} - times in ms",
+        color=discord.Color.blue()
+    )
+    embed.add_field(name="Methods (by total time)", value=table(report['methods'], 30), inline=False)
+    embed.add_field(name="SQL statements (by total time)", value=table(report['statements'][:5], 40), inline=False)
+    await ctx.send(embed=embed)
+
 @bot.command(name='status')
 async def bot_status(ctx):
     """Show bot status and statistics (Admin only)"""
@@ -4818,11 +4894,10 @@ async def bot_status(ctx):
     
     uptime_text = ", ".join(uptime_str) if uptime_str else "less than a minute"
     
-    # Get total players and PUGs for THIS SERVER
-    server_players = db_manager.get_all_players(str(ctx.guild.id))
-    total_players_count = len(server_players)
-    all_pugs = db_manager.get_recent_pugs(10000)  # Get all PUGs
-    total_pugs = len(all_pugs)
+    # Get total players and PUGs for THIS SERVER (cached counters, no history scan)
+    counters = await async_db.get_server_counters(str(ctx.guild.id))
+    total_players_count = counters['total_players']
+    total_pugs = counters['total_pugs']
     
     # Count active queues
     active_queues = sum(1 for q in queues.values() if len(q.queue) > 0)
@@ -4834,7 +4909,8 @@ async def bot_status(ctx):
         # team_size is total players, not per team
         mode_total_players = mode_data['team_size']
         players_per_team = mode_total_players // 2
-        mode_list.append(f"{mode_data['name']} ({players_per_team}v{players_per_team}, {mode_total_players} total)")
+        mode_pugs = counters['pugs_by_mode'].get(mode_name, 0)
+        mode_list.append(f"{mode_data['name']} ({players_per_team}v{players_per_team}, {mode_total_players} total) • {mode_pugs} PUGs")
     modes_text = "\n".join(mode_list) if mode_list else "None"
     
     # Check simulation mode and autopick for default queue
@@ -4855,7 +4931,7 @@ async def bot_status(ctx):
     # System Info
     embed.add_field(name="⏱️ Uptime", value=uptime_text, inline=True)
     embed.add_field(name="🎮 Active Queues", value=active_queues, inline=True)
-    embed.add_field(name="👥 Total Players", value=total_players_count, inline=True)
+    embed.add_field(name="👥 Total Players", value=f"{total_players_count} ({counters['active_players']} active)", inline=True)
     
     # Statistics
     embed.add_field(name="📈 Total PUGs Played", value=total_pugs, inline=True)
@@ -4936,6 +5012,8 @@ async def undo_player_pugs(ctx):
                 else:
                     errors.append(f"Failed to update player {discord_id}")
         
+        db_manager.flush()
+        
         # Build response
         embed = discord.Embed(
             title="🔄 PUG Count Reset Complete",
@@ -5156,12 +5234,16 @@ Discord ID,Display Name,ELO,Total PUGs,Wins,Losses,Win Rate
                 await ctx.send(f"**Errors:**\n```\n{error_msg}\n```")
             return
         
+        # Validate against the database without changing anything
+        preview = await async_db.bulk_merge_players(str(ctx.guild.id), elo_updates, 'elo', dry_run=True)
+        new_players = sum(1 for row in preview['applied'] if row['created'])
+        
         # Confirm before updating
         await ctx.send(f"""
 📋 **Import Preview**
 Server: **{ctx.guild.name}**
-Valid updates: **{len(elo_updates)}**
-Errors: **{len(errors)}**
+Valid updates: **{len(preview['applied'])}** ({new_players} new players)
+Errors: **{len(errors) + len(preview['errors'])}**
 
 ⚠️ Type `CONFIRM` to proceed with import, or `CANCEL` to abort.
 You have 30 seconds to respond.
@@ -5180,8 +5262,8 @@ You have 30 seconds to respond.
             await ctx.send("❌ Import cancelled (timeout).")
             return
         
-        # Perform bulk update
-        success_count, error_count, db_errors = db_manager.bulk_update_elos(str(ctx.guild.id), elo_updates)
+        # Perform bulk update (one merge transaction)
+        success_count, error_count, db_errors = await async_db.bulk_update_elos(str(ctx.guild.id), elo_updates)
         
         await ctx.send(f"""
 ✅ **ELO Import Complete**
@@ -5356,10 +5438,8 @@ async def update_player_pugs(ctx):
         server_id = str(ctx.guild.id)
         updates = []
         errors = []
-        
-        # Clear previous backup and create new one
-        global pug_count_backup
-        pug_count_backup[server_id] = {}
+        pug_counts = []  # (discord_id, count) rows for the bulk merge
+        line_of = {}  # discord_id -> [CSV lines], for error messages
         
         for line_num, line in enumerate(lines, start=2):
             line = line.strip()
@@ -5416,25 +5496,12 @@ async def update_player_pugs(ctx):
                     continue
                 
                 # Find player - prioritize Discord ID from third column
-                discord_id = None
-                player_name = None
-                
                 if discord_id_override:
                     # Use Discord ID from third column (most reliable)
                     discord_id = discord_id_override
-                    player_data = db_manager.get_player(discord_id, server_id)
-                    if not player_data:
-                        errors.append(f"Line {line_num}: Player with ID {discord_id} not found")
-                        continue
-                    player_name = player_data.get('display_name') or player_data.get('discord_name') or f"Player_{discord_id}"
                 elif identifier.isdigit():
                     # First column is Discord ID
                     discord_id = identifier
-                    player_data = db_manager.get_player(discord_id, server_id)
-                    if not player_data:
-                        errors.append(f"Line {line_num}: Player with ID {discord_id} not found")
-                        continue
-                    player_name = player_data.get('display_name') or player_data.get('discord_name') or f"Player_{discord_id}"
                 else:
                     # Player name - search in database first, then guild
                     discord_id = db_manager.find_player_by_name(server_id, identifier)
@@ -5450,57 +5517,31 @@ async def update_player_pugs(ctx):
                     if not discord_id:
                         errors.append(f"Line {line_num}: Player '{identifier}' not found")
                         continue
-                    
-                    player_data = db_manager.get_player(discord_id, server_id)
-                    if not player_data:
-                        errors.append(f"Line {line_num}: Player '{identifier}' not registered")
-                        continue
-                    
-                    player_name = player_data.get('display_name') or identifier
-                
-                # Store backup of current count
-                old_count = player_data['total_pugs']
-                pug_count_backup[server_id][discord_id] = old_count
-                
-                # Calculate new total (ADD to existing count)
-                new_total = old_count + pug_count
                 
-                # Update only the total_pugs field
-                conn = db_manager.get_connection()
-                cursor = conn.cursor()
-                
-                # Ensure immediate mode (no WAL delay)
-                cursor.execute("PRAGMA synchronous = FULL")
-                
-                cursor.execute('''
-                    UPDATE players 
-                    SET total_pugs = ?
-                    WHERE discord_id = ? AND server_id = ?
-                ''', (new_total, discord_id, server_id))
-                
-                rows_affected = cursor.rowcount
-                conn.commit()
-                conn.close()
-                
-                # Verify the update worked
-                verify_data = db_manager.get_player(discord_id, server_id)
-                if verify_data:
-                    actual_count = verify_data['total_pugs']
-                    print(f"✅ Updated {player_name} (ID: {discord_id}): {old_count} → {new_total}, verified: {actual_count}, rows: {rows_affected}")
-                    if actual_count != new_total:
-                        print(f"⚠️ WARNING: Update verification failed for {player_name}! Expected {new_total}, got {actual_count}")
-                        errors.append(f"Line {line_num}: Verification failed for {player_name}")
-                else:
-                    print(f"❌ ERROR: Could not verify update for {player_name}")
-                    errors.append(f"Line {line_num}: Could not verify update for {player_name}")
-                
-                updates.append(f"{player_name}: {old_count} → {new_total} (+{pug_count})")
+                pug_counts.append((discord_id, pug_count))
+                line_of.setdefault(discord_id, []).append(line_num)
                 
             except ValueError:
                 errors.append(f"Line {line_num}: Invalid PUG count '{parts[1]}'")
             except Exception as e:
                 errors.append(f"Line {line_num}: Error - {str(e)}")
         
+        # ADD every count to the existing total in one merge (a player's rows add up; missing players are errors)
+        result = await async_db.bulk_merge_players(server_id, pug_counts, 'total_pugs',
+                                                   add=True, create_missing=False)
+        for discord_id, message in result['errors']:
+            lines = line_of.get(discord_id, ['?'])
+            errors.append(f"Line{'s' if len(lines) > 1 else ''} {', '.join(map(str, lines))}: {message} (ID {discord_id})")
+        
+        # Replace the previous backup with the counts before this update
+        global pug_count_backup
+        pug_count_backup[server_id] = {row['discord_id']: row['old'] for row in result['applied']}
+        
+        for row in result['applied']:
+            player_name = row['name'] or f"Player_{row['discord_id']}"
+            updates.append(f"{player_name}: {row['old'] or 0} → {row['new']} (+{row['new'] - (row['old'] or 0)})")
+        print(f"✅ Updated PUG counts for {len(updates)} players ({len(errors)} errors)")
+        
         # Build result embed
         embed = discord.Embed(
             title="📊 Player PUG Counts Updated",
@@ -5556,33 +5597,14 @@ async def undo_update_player_pugs(ctx):
     
     try:
         backup = pug_count_backup[server_id]
-        reverted = []
-        
-        # Get database connection once for all updates
-        conn = db_manager.get_connection()
-        cursor = conn.cursor()
-        
-        for discord_id, old_count in backup.items():
-            # Get current count
-            player_data = db_manager.get_player(discord_id, server_id)
-            if not player_data:
-                continue
-            
-            current_count = player_data['total_pugs']
-            player_name = player_data.get('display_name') or player_data.get('discord_name') or f"Player_{discord_id}"
-            
-            # Restore old count
-            cursor.execute('''
-                UPDATE players 
-                SET total_pugs = ?
-                WHERE discord_id = ? AND server_id = ?
-            ''', (old_count, discord_id, server_id))
-            
-            reverted.append(f"{player_name}: {current_count} → {old_count}")
         
-        # Commit all changes
-        conn.commit()
-        conn.close()
+        # Restore every old count in one merge (players deleted since are skipped)
+        result = await async_db.bulk_merge_players(server_id, list(backup.items()), 'total_pugs',
+                                                   create_missing=False)
+        reverted = []
+        for row in result['applied']:
+            player_name = row['name'] or f"Player_{row['discord_id']}"
+            reverted.append(f"{player_name}: {row['old']} → {row['new']}")
         
         # Clear the backup
         pug_count_backup[server_id] = {}
@@ -6174,15 +6196,7 @@ async def set_peak(ctx, player_name: str, peak_elo: int):
     current_elo = player_data['elo']
     
     # Update peak_elo directly
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE players 
-        SET peak_elo = ?
-        WHERE discord_id = ? AND server_id = ?
-    """, (peak_elo, discord_id, str(ctx.guild.id)))
-    conn.commit()
-    conn.close()
+    db_manager.set_player_peak_elo(discord_id, str(ctx.guild.id), peak_elo)
     
     # Show confirmation
     embed = discord.Embed(
@@ -6324,17 +6338,7 @@ async def reset_player_pugs(ctx):
         return
     
     # Reset wins and losses for each player
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        UPDATE players 
-        SET wins = 0, losses = 0
-        WHERE server_id = ?
-    ''', (str(ctx.guild.id),))
-    
-    conn.commit()
-    conn.close()
+    db_manager.reset_player_stats(str(ctx.guild.id), ('wins', 'losses'))
     
     await ctx.send(f"✅ **Reset complete!** All {len(players)} players now have 0 wins and 0 losses.")
 
@@ -6361,18 +6365,7 @@ async def reset_pug_stats(ctx):
         return
     
     # Reset total_pugs for all players on this server
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        UPDATE players 
-        SET total_pugs = 0
-        WHERE server_id = ?
-    ''', (str(ctx.guild.id),))
-    
-    affected = cursor.rowcount
-    conn.commit()
-    conn.close()
+    affected = db_manager.reset_player_stats(str(ctx.guild.id), ('total_pugs',))
     
     await ctx.send(f"✅ **Reset complete!** Total PUGs count reset for {affected} players on this server.")
 
@@ -6384,16 +6377,9 @@ async def clean_duplicates(ctx):
         return
     
     # Get all players for this server
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT discord_id, elo FROM players 
-        WHERE server_id = ?
-        ORDER BY elo DESC
-    ''', (str(ctx.guild.id),))
-    
-    all_players = cursor.fetchall()
+    all_players = sorted(((p['discord_id'], p['elo']) for p in db_manager.get_all_players(str(ctx.guild.id))),
+                         key=lambda player: player[1], reverse=True)
+    elo_of = dict(all_players)
     
     # Find duplicates: same ELO, but one user can't be fetched from Discord
     to_delete = []
@@ -6421,11 +6407,7 @@ async def clean_duplicates(ctx):
     # Show what will be deleted
     preview_msg = f"Found **{len(to_delete)}** entries to remove:\n"
     for i, discord_id in enumerate(to_delete[:10]):
-        cursor.execute('SELECT elo FROM players WHERE discord_id = ? AND server_id = ?',
-                      (discord_id, str(ctx.guild.id)))
-        result = cursor.fetchone()
-        if result:
-            preview_msg += f"- ID: {discord_id} (ELO: {result[0]})\n"
+        preview_msg += f"- ID: {discord_id} (ELO: {elo_of[discord_id]})\n"
     
     if len(to_delete) > 10:
         preview_msg += f"... and {len(to_delete) - 10} more\n"
@@ -6440,24 +6422,13 @@ async def clean_duplicates(ctx):
         
         if msg.content.upper() != 'CONFIRM':
             await ctx.send("❌ Cleanup cancelled.")
-            conn.close()
             return
     except asyncio.TimeoutError:
         await ctx.send("❌ Cleanup cancelled (timeout).")
-        conn.close()
         return
     
     # Delete the invalid entries
-    deleted_count = 0
-    for discord_id in to_delete:
-        cursor.execute('''
-            DELETE FROM players 
-            WHERE discord_id = ? AND server_id = ?
-        ''', (discord_id, str(ctx.guild.id)))
-        deleted_count += 1
-    
-    conn.commit()
-    conn.close()
+    deleted_count = db_manager.delete_players(str(ctx.guild.id), to_delete)
     
     await ctx.send(f"✅ **Cleanup complete!** Removed {deleted_count} duplicate/invalid player entries.")
 
@@ -6504,17 +6475,7 @@ You have 30 seconds to respond.
         return
     
     # Delete all players for this server
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        DELETE FROM players 
-        WHERE server_id = ?
-    ''', (str(ctx.guild.id),))
-    
-    deleted = cursor.rowcount
-    conn.commit()
-    conn.close()
+    deleted = db_manager.delete_players(str(ctx.guild.id))
     
     await ctx.send(f"""
 ✅ **Complete wipe successful!**
@@ -7109,31 +7070,8 @@ async def player_stats(ctx, *, player_name: str):
     actual_games = wins + losses
     win_rate = (wins / actual_games * 100) if actual_games > 0 else 0
     
-    # Find player's most recent PUG to show ELO change
-    recent_pugs = db_manager.get_recent_pugs(20)
-    last_elo_change = None
-    
-    for pug in recent_pugs:
-        if pug.get('winner'):  # Only check PUGs with results
-            player_id = str(member.id)
-            if player_id in pug['red_team'] or player_id in pug['blue_team']:
-                # Calculate what the ELO change was
-                K_FACTOR = 32
-                expected_red = 1 / (1 + 10 ** ((pug['avg_blue_elo'] - pug['avg_red_elo']) / 400))
-                expected_blue = 1 - expected_red
-                
-                # Calculate change
-                if pug['winner'] == 'red':
-                    if player_id in pug['red_team']:
-                        last_elo_change = K_FACTOR * (1 - expected_red)
-                    else:
-                        last_elo_change = K_FACTOR * (0 - expected_blue)
-                else:  # blue won
-                    if player_id in pug['blue_team']:
-                        last_elo_change = K_FACTOR * (1 - expected_blue)
-                    else:
-                        last_elo_change = K_FACTOR * (0 - expected_red)
-                break
+    # Last ELO change and net over the last 10 PUGs, from the rating history
+    last_elo_change, net_elo_10 = await recent_elo_summary(member.id, str(ctx.guild.id))
     
     embed = discord.Embed(
         title=f"📊 Statistics for {member.display_name}",
@@ -7155,30 +7093,6 @@ async def player_stats(ctx, *, player_name: str):
     if peak_elo is None:
         peak_elo = elo
     
-    # Calculate net ELO over last 10 PUGs
-    recent_pugs_10 = db_manager.get_recent_pugs(100)  # Get more to find player's 10
-    player_pugs = [p for p in recent_pugs_10 if (str(member.id) in p['red_team'] or str(member.id) in p['blue_team']) and p.get('winner')]
-    player_pugs = player_pugs[:10]  # Take first 10
-    
-    net_elo_10 = 0
-    if len(player_pugs) > 0:
-        K_FACTOR = 32
-        for pug in player_pugs:
-            expected_red = 1 / (1 + 10 ** ((pug['avg_blue_elo'] - pug['avg_red_elo']) / 400))
-            expected_blue = 1 - expected_red
-            
-            player_id = str(member.id)
-            if pug['winner'] == 'red':
-                if player_id in pug['red_team']:
-                    net_elo_10 += K_FACTOR * (1 - expected_red)
-                else:
-                    net_elo_10 += K_FACTOR * (0 - expected_blue)
-            else:  # blue won
-                if player_id in pug['blue_team']:
-                    net_elo_10 += K_FACTOR * (1 - expected_blue)
-                else:
-                    net_elo_10 += K_FACTOR * (0 - expected_red)
-    
     net_elo_display = f"{net_elo_10:+.0f}" if net_elo_10 != 0 else "0"
     
     embed.add_field(name="ELO", value=elo_display, inline=True)
@@ -7371,7 +7285,7 @@ async def update_leaderboard(guild_id):
             return
         
         # Get updated player list
-        players = db_manager.get_all_players(str_guild_id)
+        players = await async_db.get_all_players(str_guild_id)
         
         # Filter out simulation players
         active_players = []
@@ -7404,7 +7318,7 @@ async def update_leaderboard(guild_id):
                 if member:
                     name = member.display_name
                 else:
-                    player_data = db_manager.get_player(discord_id, str_guild_id)
+                    player_data = await async_db.get_player(discord_id, str_guild_id)
                     name = player_data.get('display_name') or player_data.get('discord_name') or f"Player_{discord_id}"
                     if '#' in name:
                         name = name.split('#')[0]
@@ -7540,7 +7454,7 @@ async def promote_pugs(ctx):
 async def deadpug_vote(ctx):
     """Vote to cancel the last PUG you played in"""
     # Find the player's most recent PUG
-    recent_pugs = db_manager.get_recent_pugs(10)
+    recent_pugs = await async_db.get_recent_pugs(str(ctx.guild.id), 10)
     
     player_pug = None
     for pug in recent_pugs:
@@ -7635,7 +7549,7 @@ async def force_deadpug(ctx, pug_id: int):
         return
     
     # Get the PUG
-    recent_pugs = db_manager.get_recent_pugs(100)
+    recent_pugs = await async_db.get_recent_pugs(str(ctx.guild.id), 100)
     target_pug = None
     for pug in recent_pugs:
         if pug['number'] == pug_id:
@@ -7650,15 +7564,15 @@ async def force_deadpug(ctx, pug_id: int):
         await ctx.send(f"❌ PUG #{pug_id} already has a winner and cannot be cancelled!")
         return
     
+    if target_pug.get('archived'):
+        await ctx.send(f"❌ PUG #{pug_id} is archived and can no longer be changed!")
+        return
+    
     # Get the actual pug_id from the database
     actual_pug_id = target_pug.get('pug_id')
     
     # Mark as killed instead of deleting
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE pugs SET status = 'killed' WHERE pug_id = ?", (actual_pug_id,))
-    conn.commit()
-    conn.close()
+    await async_db.delete_pug(actual_pug_id)
     
     await ctx.send(f"✅ **PUG #{pug_id} has been cancelled!** ELO changes have been prevented.")
 
@@ -7673,7 +7587,7 @@ async def undo_deadpug(ctx, pug_number: int):
         return
     
     # Find the PUG
-    recent_pugs = db_manager.get_recent_pugs(100)
+    recent_pugs = await async_db.get_recent_pugs(str(ctx.guild.id), 100)
     pug = None
     for p in recent_pugs:
         if p['number'] == pug_number:
@@ -7693,11 +7607,7 @@ async def undo_deadpug(ctx, pug_number: int):
         return
     
     # Restore the PUG to active status
-    conn = db_manager.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE pugs SET status = 'active' WHERE pug_id = ?", (pug['pug_id'],))
-    conn.commit()
-    conn.close()
+    await async_db.restore_pug(pug['pug_id'])
     
     # Show teams
     embed = discord.Embed(
@@ -7756,6 +7666,7 @@ async def help_command(ctx):
     
     player_embed.add_field(name="**Captain Commands**", value="""
 `.captain` - Become a captain
+`.reroll` - Switch autopicked teams to the next balanced option (before they lock in)
 `.capfor red-team` / `.capfor blue-team` - Takeover captain spot
 `.pick <number>` or `.p <number>` - Pick a player by number (e.g., .p 3)
 `.pick <number> <number>` or `.p <n> <n>` - Pick 2 players during double pick (e.g., .p 3 5)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - Rating Store
+
+Write-behind, in-memory cache of player ratings and stats.
+
+Records are keyed by (server_id, discord_id, pool), where pool is None for the
+global rating in the players table or the effective mode name for a
+player_mode_elos row. They are loaded lazily, kept in an LRU of bounded size
+and changed in memory; changed fields are journaled and written back to SQLite
+in one batched transaction when flush() runs (on settlement, before bulk
+reads, when the journal grows past a threshold, and on shutdown).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Columns cached for the global rating (players table)
+PLAYER_FIELDS = ('elo', 'wins', 'losses', 'total_pugs', 'peak_elo',
+                 'current_streak', 'best_win_streak', 'best_loss_streak')
+
+# Columns cached for a per-mode rating (player_mode_elos table)
+MODE_FIELDS = ('elo', 'wins', 'losses', 'peak_elo',
+               'current_streak', 'best_win_streak', 'best_loss_streak')
+
+# Values of a player_mode_elos row that does not exist yet
+MODE_DEFAULTS = {
+    'elo': 1000,
+    'wins': 0,
+    'losses': 0,
+    'peak_elo': 1000,
+    'current_streak': 0,
+    'best_win_streak': 0,
+    'best_loss_streak': 0
+}
+
+Key = Tuple[str, str, Optional[str]]
+
+
+class RatingStore:
+    """LRU cache of rating records with a write-behind journal
+
+    Usage:
+        store = RatingStore(db_manager)
+        elo = store.get(server_id, discord_id)['elo']            # Global rating
+        store.update(server_id, discord_id, 'ctf', elo=1032.5)   # Per-mode rating
+        store.flush()                                            # Write changes back
+    """
+
+    def __init__(self, db, capacity: int = 5000, flush_threshold: int = 256):
+        """
+        Args:
+            db: DatabaseManager used to load and flush records
+            capacity: Maximum number of cached records
+            flush_threshold: Flush automatically once this many records are dirty
+        """
+        self.db = db
+        self.capacity = capacity
+        self.flush_threshold = flush_threshold
+        self._records: 'OrderedDict[Key, Dict]' = OrderedDict()
+        self._dirty: Dict[Key, set] = {}
+        self._missing = set()  # Per-mode keys with no row in the database yet
+        self.lock = threading.RLock()  # Also guards listeners that mirror the store
+        self.listeners = []  # Objects with rating_changed() / ratings_invalidated()
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+    @staticmethod
+    def _key(server_id, discord_id, pool) -> Key:
+        return str(server_id), str(discord_id), pool
+
+    def _load(self, server_id: str, discord_ids: List[str], pool: Optional[str]) -> Dict[str, Dict]:
+        """Read records from SQLite with a single query"""
+        placeholders = ','.join('?' * len(discord_ids))
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        if pool is None:
+            cursor.execute(f'''
+                SELECT discord_id, {', '.join(PLAYER_FIELDS)}
+                FROM players
+                WHERE server_id = ? AND discord_id IN ({placeholders})
+            ''', (server_id, *discord_ids))
+            fields = PLAYER_FIELDS
+        else:
+            cursor.execute(f'''
+                SELECT discord_id, {', '.join(MODE_FIELDS)}
+                FROM player_mode_elos
+                WHERE server_id = ? AND mode_name = ? AND discord_id IN ({placeholders})
+            ''', (server_id, pool, *discord_ids))
+            fields = MODE_FIELDS
+
+        rows = {row[0]: dict(zip(fields, row[1:])) for row in cursor.fetchall()}
+        conn.close()
+        return rows
+
+    def _store(self, key: Key, record: Dict):
+        """Insert a record, evicting the least recently used ones if over capacity"""
+        self._records[key] = record
+        self._records.move_to_end(key)
+        if len(self._records) > self.capacity:
+            if self._dirty:
+                self.flush()
+            while len(self._records) > self.capacity:
+                old_key, _ = self._records.popitem(last=False)
+                self._missing.discard(old_key)
+
+    def get_many(self, server_id: str, discord_ids: Iterable[str], pool: Optional[str] = None) -> Dict[str, Dict]:
+        """Records for several players, loading any misses with one query
+
+        Returns:
+            dict: {discord_id: record copy}. Players without a players row are
+                  left out of global lookups; per-mode lookups fall back to defaults.
+        """
+        server_id = str(server_id)
+        ids = [str(discord_id) for discord_id in discord_ids]
+        result = {}
+
+        with self.lock:
+            missing = []
+            for discord_id in ids:
+                key = (server_id, discord_id, pool)
+                record = self._records.get(key)
+                if record is None:
+                    missing.append(discord_id)
+                else:
+                    self._records.move_to_end(key)
+                    result[discord_id] = dict(record)
+            self.hits += len(ids) - len(missing)
+            self.misses += len(missing)
+
+            if missing:
+                loaded = self._load(server_id, missing, pool)
+                for discord_id in missing:
+                    key = (server_id, discord_id, pool)
+                    record = loaded.get(discord_id)
+                    if record is None:
+                        if pool is None:
+                            continue  # Unknown player: nothing to cache
+                        record = dict(MODE_DEFAULTS)
+                        self._missing.add(key)
+                    self._store(key, record)
+                    result[discord_id] = dict(record)
+
+        return result
+
+    def get(self, server_id: str, discord_id: str, pool: Optional[str] = None) -> Optional[Dict]:
+        """One player's record (a copy), or None for a global lookup of an unknown player"""
+        return self.get_many(server_id, [discord_id], pool).get(str(discord_id))
+
+    def peek(self, server_id: str, discord_id: str, pool: Optional[str] = None) -> Optional[Dict]:
+        """Cached record (a copy) without loading it from the database"""
+        with self.lock:
+            record = self._records.get(self._key(server_id, discord_id, pool))
+            return dict(record) if record is not None else None
+
+    def update(self, server_id: str, discord_id: str, pool: Optional[str] = None, **fields) -> bool:
+        """Change fields of a record in memory and journal them for the next flush
+
+        Returns:
+            bool: False if the player has no players row (global ratings only)
+        """
+        key = self._key(server_id, discord_id, pool)
+        with self.lock:
+            if key not in self._records and self.get(server_id, discord_id, pool) is None:
+                return False
+
+            record = self._records[key]
+            record.update(fields)
+            self._records.move_to_end(key)
+
+            if 'elo' in fields:
+                for listener in self.listeners:
+                    listener.rating_changed(key[0], key[1], pool, fields['elo'])
+            
+            dirty = self._dirty.setdefault(key, set())
+            if key in self._missing:
+                dirty.update(MODE_FIELDS)  # New row: write every column
+            else:
+                dirty.update(fields)
+
+            if len(self._dirty) >= self.flush_threshold:
+                self.flush()
+        return True
+
+    def exists(self, server_id: str, discord_id: str, pool: str) -> bool:
+        """Whether a per-mode record exists (in the database or pending in the journal)"""
+        key = self._key(server_id, discord_id, pool)
+        with self.lock:
+            self.get(server_id, discord_id, pool)
+            return key not in self._missing or key in self._dirty
+
+    def flush(self) -> int:
+        """Write every journaled change to SQLite in one transaction
+
+        Returns:
+            int: Number of records written
+        """
+        with self.lock:
+            if not self._dirty:
+                return 0
+            journal = {key: {field: self._records[key][field] for field in fields}
+                       for key, fields in self._dirty.items()}
+            self._dirty = {}
+
+            player_batches = {}
+            mode_batches = {}
+            for (server_id, discord_id, pool), values in journal.items():
+                columns = tuple(sorted(values))
+                params = tuple(values[c] for c in columns)
+                if pool is None:
+                    player_batches.setdefault(columns, []).append(params + (discord_id, server_id))
+                else:
+                    mode_batches.setdefault(columns, []).append((discord_id, server_id, pool) + params)
+
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute('BEGIN IMMEDIATE')
+                for columns, rows in player_batches.items():
+                    assignments = ', '.join(f"{c} = ?" for c in columns)
+                    cursor.executemany(f'''
+                        UPDATE players SET {assignments}
+                        WHERE discord_id = ? AND server_id = ?
+                    ''', rows)
+                for columns, rows in mode_batches.items():
+                    # Peak ELO only ever rises, even if a stale value is flushed
+                    assignments = ', '.join(
+                        f"{c} = MAX(COALESCE({c}, excluded.{c}), excluded.{c})" if c == 'peak_elo'
+                        else f"{c} = excluded.{c}" for c in columns)
+                    cursor.executemany(f'''
+                        INSERT INTO player_mode_elos (discord_id, server_id, mode_name, {', '.join(columns)})
+                        VALUES (?, ?, ?, {', '.join('?' * len(columns))})
+                        ON CONFLICT (discord_id, server_id, mode_name) DO UPDATE SET
+                            {assignments},
+                            last_updated = CURRENT_TIMESTAMP
+                    ''', rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                # Put the changes back so a later flush can retry them
+                for key, values in journal.items():
+                    self._dirty.setdefault(key, set()).update(values)
+                raise
+            finally:
+                conn.close()
+
+            self._missing.difference_update(journal)
+            self.flushes += 1
+            return len(journal)
+
+    def invalidate(self, server_id: str = None, discord_ids: Iterable[str] = None):
+        """Drop cached records after the database was changed behind the store's back
+
+        Pending changes are flushed first so they are not lost.
+
+        Args:
+            server_id: Only records of this server (all servers if None)
+            discord_ids: Only these players (all players if None)
+        """
+        ids = {str(discord_id) for discord_id in discord_ids} if discord_ids is not None else None
+        with self.lock:
+            self.flush()
+            for key in list(self._records):
+                if server_id is not None and key[0] != str(server_id):
+                    continue
+                if ids is not None and key[1] not in ids:
+                    continue
+                del self._records[key]
+                self._missing.discard(key)
+            for listener in self.listeners:
+                listener.ratings_invalidated(server_id, ids)
+
+    def close(self):
+        """Flush pending changes (call on shutdown)"""
+        self.flush()
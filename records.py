@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - Record Types
+
+Compact row objects returned by DatabaseManager.
+
+Each record type stores its columns in __slots__ instead of a per-instance
+dict, so bulk reads (get_all_players on every leaderboard refresh) allocate
+one small object per row. Records are built directly by a cursor row_factory
+from rows whose columns are selected in FIELDS order.
+
+Records stay dict-compatible - player['elo'], player.get('peak_elo'),
+'wins' in player, keys()/items(), update() and equality with plain dicts
+all work - so existing call sites keep working unchanged. Attribute access
+(player.elo) is the faster spelling for new code.
+"""
+
+from typing import Any, Dict, Iterator, Tuple
+
+
+class Record:
+    """Base class: dict-style access to the fields named in FIELDS"""
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+    _FIELD_SET = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+        # A generated __init__ with one plain attribute store per field, as
+        # namedtuple does, instead of a setattr() loop per row
+        source = (f"def __init__(self, {', '.join(f'{name}=None' for name in cls.FIELDS)}):\n"
+                  + ''.join(f"    self.{name} = {name}\n" for name in cls.FIELDS))
+        namespace = {}
+        exec(source, namespace)
+        cls.__init__ = namespace['__init__']
+
+    @classmethod
+    def row_factory(cls, cursor, row):
+        """sqlite3 row_factory for rows selected in FIELDS order"""
+        return cls(*row)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self._FIELD_SET:
+            raise KeyError(f"{type(self).__name__} has no field '{key}'")
+        setattr(self, key, value)
+
+    def __contains__(self, key) -> bool:
+        return key in self._FIELD_SET
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._FIELD_SET:
+            return default
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.FIELDS
+
+    def values(self):
+        return [getattr(self, name) for name in self.FIELDS]
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.FIELDS]
+
+    def update(self, other=(), **fields):
+        for name, value in dict(other, **fields).items():
+            self[name] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """A plain dict copy (e.g. for json.dumps)"""
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None  # Mutable, like the dicts records replace
+
+    def __getstate__(self):
+        return self.values()
+
+    def __setstate__(self, state):
+        for name, value in zip(self.FIELDS, state):
+            setattr(self, name, value)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{name}={value!r}' for name, value in self.items())})"
+
+
+class Player(Record):
+    """One players row (global rating and stats of a player on a server)"""
+
+    FIELDS = ('discord_id', 'server_id', 'discord_name', 'display_name',
+              'wins', 'losses', 'total_pugs', 'elo', 'peak_elo',
+              'ut2k4_player_name', 'ut2k4_last_scraped', 'current_streak', 'registered',
+              'best_win_streak', 'best_loss_streak')
+    __slots__ = FIELDS
+
+    # Column list for SELECTs feeding Player.row_factory
+    COLUMNS = ', '.join(FIELDS)
+
+
+class ModeRating(Record):
+    """A player's rating and stats in one ELO pool (player_mode_elos row)"""
+
+    FIELDS = ('elo', 'wins', 'losses', 'peak_elo',
+              'current_streak', 'best_win_streak', 'best_loss_streak')
+    __slots__ = FIELDS
+
+    COLUMNS = ', '.join(FIELDS)
+
+
+class PugRecord(Record):
+    """One PUG with its rosters ('number' is the pug_id shown to players)"""
+
+    FIELDS = ('pug_id', 'number', 'game_mode', 'winner', 'avg_red_elo', 'avg_blue_elo',
+              'timestamp', 'status', 'tiebreaker_map', 'red_captain', 'blue_captain',
+              'server_id', 'red_team', 'blue_team', 'archived')
+    __slots__ = FIELDS
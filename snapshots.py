@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - Database Snapshots
+
+Online backups of the live database with sqlite3.Connection.backup.
+
+The copy is made in steps of a few pages with a short sleep between steps,
+on a worker thread, so neither the event loop nor writers on other
+connections are held up. Each snapshot is written to a temporary file and
+renamed into place when complete, so a snapshot on disk is never torn.
+Only the newest `keep` snapshots are retained.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+
+class SnapshotManager:
+    """Takes and rotates hot backups of a DatabaseManager's database
+
+    Usage:
+        snapshots = SnapshotManager(db_manager, directory='backups', keep=7)
+        info = await snapshots.snapshot_async()   # From the event loop
+        asyncio.create_task(snapshots.run_periodic(6 * 3600))
+    """
+
+    def __init__(self, db, directory: str = 'backups', keep: int = 7,
+                 pages: int = 256, sleep: float = 0.005):
+        """
+        Args:
+            db: DatabaseManager whose database is backed up
+            directory: Snapshot folder (relative paths are next to the database file)
+            keep: Number of snapshots retained after each new one
+            pages: Pages copied per backup step
+            sleep: Seconds to pause between steps so writers get the lock
+        """
+        self.db = db
+        base = os.path.dirname(os.path.abspath(db.db_path))
+        self.directory = directory if os.path.isabs(directory) else os.path.join(base, directory)
+        self.prefix = os.path.splitext(os.path.basename(db.db_path))[0] + '-'
+        self.keep = keep
+        self.pages = pages
+        self.sleep = sleep
+        self._lock = threading.Lock()
+
+    def list_snapshots(self) -> List[Dict]:
+        """Snapshots on disk, newest first: [{'path', 'size', 'created'}]"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted((name for name in os.listdir(self.directory)
+                        if name.startswith(self.prefix) and name.endswith('.db')), reverse=True)
+        snapshots = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            stat = os.stat(path)
+            snapshots.append({'path': path, 'size': stat.st_size,
+                              'created': datetime.fromtimestamp(stat.st_mtime)})
+        return snapshots
+
+    def rotate(self) -> List[str]:
+        """Delete all but the newest `keep` snapshots, returning the removed paths"""
+        removed = []
+        for snapshot in self.list_snapshots()[self.keep:]:
+            os.remove(snapshot['path'])
+            removed.append(snapshot['path'])
+        return removed
+
+    def snapshot(self) -> Dict:
+        """Copy the database to a new snapshot file (blocking: call from a worker thread)
+
+        Returns:
+            dict: {'path', 'size' (bytes), 'duration' (seconds), 'steps', 'removed' (rotated paths)}
+
+        Raises:
+            RuntimeError: If another snapshot is already running
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A snapshot is already in progress")
+        partial = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            name = f"{self.prefix}{datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+            path = os.path.join(self.directory, name)
+            partial = path + '.partial'
+
+            # Pending rating changes belong in the snapshot
+            self.db.ratings.flush()
+
+            steps = 0
+
+            def progress(status, remaining, total):
+                # backup() itself only sleeps when the source is busy: pause between
+                # every step so writers (and the GIL) get a turn
+                nonlocal steps
+                steps += 1
+                if remaining and self.sleep:
+                    time.sleep(self.sleep)
+
+            start = time.perf_counter()
+            source = sqlite3.connect(self.db.db_path)
+            target = sqlite3.connect(partial)
+            try:
+                source.backup(target, pages=self.pages, progress=progress)
+            finally:
+                target.close()
+                source.close()
+            os.replace(partial, path)
+            partial = None
+            duration = time.perf_counter() - start
+
+            return {'path': path, 'size': os.path.getsize(path), 'duration': duration,
+                    'steps': steps, 'removed': self.rotate()}
+        finally:
+            # Never leave a half-written copy behind
+            if partial and os.path.exists(partial):
+                os.remove(partial)
+            self._lock.release()
+
+    async def snapshot_async(self) -> Dict:
+        """snapshot() on a worker thread, so the event loop keeps running"""
+        return await asyncio.to_thread(self.snapshot)
+
+    async def run_periodic(self, interval: float):
+        """Take a snapshot every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                info = await self.snapshot_async()
+                print(f"💾 Database snapshot {os.path.basename(info['path'])} "
+                      f"({info['size'] / 1024:.0f} KB in {info['duration']:.2f}s)")
+            except Exception as e:
+                print(f"❌ Database snapshot failed: {e}")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - Storage Backends
+
+StorageBackend is the set of operations pug_bot.py performs on its
+database. Two implementations exist:
+
+    sqlite  DatabaseManager (database.py) - the persistent production store
+    memory  InMemoryDatabase (memory_storage.py) - plain Python containers,
+            nothing persisted; for load tests and benchmarks that need to
+            measure matchmaking without storage cost
+
+The bot picks one at startup with open_storage(STORAGE_BACKEND, ...).
+Both return the same record types (records.py), and AsyncDatabaseManager
+and QueryProfiler work with either.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Protocol, Tuple, runtime_checkable
+
+from records import ModeRating, Player, PugRecord
+
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    """Operations the bot needs from its store (see DatabaseManager for the semantics)"""
+
+    persistent: bool  # False if nothing survives a restart (no snapshots or archival)
+    archive_path: Optional[str]  # Cold-storage file of archive_pugs, None if unsupported
+    profiler: object  # QueryProfiler while one is attached, else None
+
+    def close(self): ...
+    def flush(self): ...
+
+    # Players
+    def get_player(self, discord_id: str, server_id: str = None) -> Optional[Player]: ...
+    def register_player(self, discord_id: str, server_id: str, discord_name: str = None,
+                        display_name: str = None) -> Player: ...
+    def player_exists(self, discord_id: str, server_id: str) -> bool: ...
+    def find_player_by_name(self, server_id: str, name: str) -> Optional[str]: ...
+    def delete_player(self, discord_id: str, server_id: str) -> bool: ...
+    def delete_players(self, server_id: str, discord_ids: List[str] = None) -> int: ...
+    def reset_player_stats(self, server_id: str, fields: Tuple[str, ...] = ('wins', 'losses')) -> int: ...
+    def update_player_elo(self, discord_id: str, server_id: str, new_elo: float): ...
+    def set_player_peak_elo(self, discord_id: str, server_id: str, peak_elo: float) -> bool: ...
+    def get_player_elo(self, discord_id: str, server_id: str, mode_name: str = None) -> Optional[float]: ...
+    def get_player_elos(self, discord_ids: Iterable[str], server_id: str,
+                        mode_name: str = None) -> Dict[str, Optional[float]]: ...
+    def update_ut2k4_info(self, discord_id: str, server_id: str, ut2k4_name: str): ...
+    def update_player_total_pugs(self, discord_id: str, server_id: str, total_pugs: int) -> bool: ...
+    def get_all_players(self, server_id: str = None) -> List[Player]: ...
+    def get_leaderboard_position(self, discord_id: str, server_id: str, mode_name: str = None) -> Dict: ...
+    def bulk_merge_players(self, server_id: str, rows: List[tuple], column: str = 'elo', add: bool = False,
+                           create_missing: bool = True, dry_run: bool = False) -> Dict: ...
+    def bulk_update_elos(self, server_id: str, elo_updates: List[tuple]) -> tuple: ...
+
+    # PUGs and rating history
+    def add_pug(self, red_team: List[str], blue_team: List[str], game_mode: str, avg_red_elo: float,
+                avg_blue_elo: float, tiebreaker_map: str = None, red_captain: str = None,
+                blue_captain: str = None, server_id: str = None) -> int: ...
+    def settle_pug(self, pug_id: int, winner: Optional[str], per_player_deltas: Dict[str, Dict],
+                   server_id: str, elo_pool: str = None) -> Dict[str, Dict]: ...
+    def delete_pug(self, pug_id: int): ...
+    def restore_pug(self, pug_id: int): ...
+    def get_server_counters(self, server_id: str) -> Dict: ...
+    def get_recent_pugs(self, server_id: str = None, limit: int = 3) -> List[PugRecord]: ...
+    def iter_pugs(self, server_id: str = None, before_id: int = None,
+                  page_size: int = 100) -> Iterator[PugRecord]: ...
+    def get_player_pugs(self, discord_id: str, server_id: str, limit: int = 10, before: int = None,
+                        with_result: bool = False) -> List[PugRecord]: ...
+    def archive_pugs(self, older_than_days: float, batch_size: int = 500) -> Dict: ...
+    def get_pug_elo_changes(self, pug_id: int) -> Dict[str, Dict]: ...
+    def get_recent_elo_changes(self, discord_id: str, server_id: str, pool: str = 'global',
+                               limit: int = 10) -> List[Dict]: ...
+
+    # Timeouts and admins
+    def add_timeout(self, discord_id: str, timeout_end: datetime): ...
+    def is_timed_out(self, discord_id: str) -> Tuple[bool, Optional[datetime]]: ...
+    def add_pug_admin(self, discord_id: str, server_id: str): ...
+    def remove_pug_admin(self, discord_id: str, server_id: str): ...
+    def is_pug_admin(self, discord_id: str, server_id: str) -> bool: ...
+    def get_pug_admins(self, server_id: str = None) -> List[str]: ...
+
+    # Game modes, aliases and settings
+    def add_game_mode(self, mode_name: str, display_name: str, team_size: int,
+                      description: str = "") -> Tuple[bool, Optional[str]]: ...
+    def get_game_mode(self, mode_name: str) -> Optional[Dict]: ...
+    def get_all_game_modes(self) -> Dict: ...
+    def remove_mode(self, mode_name: str) -> Tuple[bool, Optional[str]]: ...
+    def add_mode_alias(self, alias: str, mode_name: str) -> Tuple[bool, Optional[str]]: ...
+    def remove_mode_alias(self, alias: str) -> Tuple[bool, Optional[str]]: ...
+    def get_mode_aliases(self, mode_name: str) -> list: ...
+    def resolve_mode_alias(self, name: str) -> str: ...
+    def is_scraping_enabled(self) -> bool: ...
+    def set_scraping_enabled(self, enabled: bool): ...
+    def is_per_mode_elo_enabled(self, mode_name: str = None) -> bool: ...
+    def set_per_mode_elo_for_mode(self, mode_name: str, enabled: bool) -> Tuple[bool, Optional[str]]: ...
+    def set_mode_elo_prefix(self, mode_name: str, elo_prefix: str) -> Tuple[bool, Optional[str]]: ...
+    def get_mode_elo_prefix(self, mode_name: str) -> Optional[str]: ...
+    def get_effective_mode_for_elo(self, mode_name: str) -> str: ...
+    def get_modes_with_per_mode_elo(self) -> list: ...
+    def set_tiebreaker_enabled(self, mode_name: str, enabled: bool) -> tuple: ...
+    def is_tiebreaker_enabled(self, mode_name: str) -> bool: ...
+
+    # Per-mode ratings
+    def get_player_mode_elo(self, discord_id: str, server_id: str, mode_name: str) -> ModeRating: ...
+    def set_player_mode_elo(self, discord_id: str, server_id: str, mode_name: str,
+                            new_elo: float) -> Tuple[bool, Optional[str]]: ...
+    def get_all_player_mode_elos(self, discord_id: str, server_id: str) -> Dict[str, ModeRating]: ...
+
+    # Maps
+    def add_map(self, server_id: str, mode_prefix: str, map_name: str) -> tuple: ...
+    def remove_map(self, server_id: str, mode_prefix: str, map_name: str) -> tuple: ...
+    def get_maps_for_mode(self, server_id: str, mode_prefix: str) -> list: ...
+    def get_all_maps_grouped(self, server_id: str) -> dict: ...
+    def add_map_to_cooldown(self, server_id: str, mode_prefix: str, map_name: str): ...
+    def get_maps_on_cooldown(self, server_id: str, mode_prefix: str, cooldown_count: int = 3) -> list: ...
+    def clear_old_cooldowns(self, server_id: str, mode_prefix: str, keep_count: int = 10): ...
+    def validate_mode_for_maps(self, mode_prefix: str) -> tuple: ...
+    def remove_all_maps(self, server_id: str, mode_prefix: str) -> tuple: ...
+    def find_map_prefixes(self, server_id: str, search_term: str = None) -> list: ...
+
+
+BACKENDS = ('sqlite', 'memory')
+
+
+def open_storage(backend: str = 'sqlite', db_path: str = 'pug_data.db', **options) -> StorageBackend:
+    """Create the configured storage backend
+
+    Args:
+        backend: 'sqlite' (DatabaseManager on db_path) or 'memory' (InMemoryDatabase)
+        db_path: SQLite database file (ignored by the memory backend)
+        options: Extra DatabaseManager arguments, e.g. pooled=True (ignored by the memory backend)
+
+    Raises:
+        ValueError: For an unknown backend name
+    """
+    if backend == 'sqlite':
+        from database import DatabaseManager
+        return DatabaseManager(db_path, **options)
+    if backend == 'memory':
+        from memory_storage import InMemoryDatabase
+        return InMemoryDatabase()
+    raise ValueError(f"Unknown storage backend '{backend}' (expected one of: {', '.join(BACKENDS)})")
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+PUG Pro Discord Bot - Team Balancer
+
+Exact balanced-partition search for autopick.
+
+autopick used to score every itertools.combinations(players, per_team)
+split (brute_force_split below, kept as the reference). Its criteria are
+the ELO difference, then the distance of the red win probability from
+50%, then the summed intra-team variance, with the first split in
+combination order winning ties and an exact 0 difference ending the
+search at once. For a fixed total, both later criteria depend only on
+the difference, so the optimum is the first split (in combination order)
+with the minimal difference.
+
+best_split finds that minimum one of two ways:
+
+    - NumPy (optional, up to VECTORIZED_MAX_PER_TEAM a side): every split
+      with player 0 on red - half of them, the rest are mirror images - is
+      scored at once from a cached matrix of combination indices.
+    - Meet in the middle: the players are cut into two halves, the subset
+      sums of the second half are sorted per subset size, and every subset
+      of the first half looks up its best complement by bisection -
+      O(2^(n/2) * n) instead of C(n, n/2) full evaluations.
+
+The splits that reach the minimum are then re-scored with exactly the
+brute force's arithmetic, in combination order, so the result is the same
+split the brute force picks.
+
+balance adds a time budget: the meet-in-the-middle search stops at the
+deadline and returns the best split found so far (a greedy split if it
+had not found one yet), telling the caller whether it was proven optimal.
+balance_top also returns the next closest splits (mirror images skipped)
+from the same tables, for rerolls.
+"""
+
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: best_split falls back to the pure-Python search
+    np = None
+
+# Tied optimal splits re-scored with the brute-force arithmetic; beyond this
+# (e.g. a dozen new players on the same rating) they are equal to float noise
+MAX_TIED_SPLITS = 1000
+
+# Largest team size scored with NumPy (C(2k-1, k-1) rows: 1,716 at 7v7); the
+# meet-in-the-middle search is faster beyond it (python bench_autopick.py)
+VECTORIZED_MAX_PER_TEAM = 7
+
+# First-half parts searched between two deadline checks
+DEADLINE_CHECK_EVERY = 64
+
+
+class SearchTimeout(Exception):
+    """The deadline passed before the search finished"""
+
+
+def _check_deadline(deadline: Optional[float]):
+    """Raise SearchTimeout once time.monotonic() reaches `deadline` (None: no limit)"""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise SearchTimeout
+
+
+def split_score(elos: Sequence[float], red: Sequence[int], total: float = None) -> Tuple[float, float, float]:
+    """(ELO difference, win probability distance from 50%, summed team variance) of a split
+
+    Computed exactly as the original autopick loop did, so scores compare
+    equal to its scores bit for bit.
+
+    Args:
+        elos: Rating of every player, in queue order
+        red: Indices of the red team's players, ascending
+        total: sum(elos), if already known
+    """
+    per_team = len(red)
+    if total is None:
+        total = sum(elos)
+
+    red_total = sum(elos[i] for i in red)
+    blue_total = total - red_total
+    diff = abs(red_total - blue_total)
+
+    red_avg = red_total / per_team
+    blue_avg = blue_total / per_team
+    red_win_prob = 1 / (1 + 10 ** ((blue_avg - red_avg) / 400))
+    win_prob_diff = abs(red_win_prob - 0.5)
+
+    red_set = set(red)
+    red_var = sum((elos[i] - red_avg) ** 2 for i in red) / per_team
+    blue_var = sum((elos[i] - blue_avg) ** 2 for i in range(len(elos)) if i not in red_set) / per_team
+    return diff, win_prob_diff, red_var + blue_var
+
+
+def brute_force_split(elos: Sequence[float], per_team: int) -> Tuple[int, ...]:
+    """Reference search: score every split (C(n, per_team) of them)
+
+    Returns:
+        tuple: Red team indices, ascending
+    """
+    total = sum(elos)
+    best_red = None
+    best_score = None
+    for red in combinations(range(len(elos)), per_team):
+        score = split_score(elos, red, total)
+        # Perfect balance: take it
+        if score[0] == 0 and score[1] < 0.01:
+            return red
+        if best_score is None or score < best_score:
+            best_red, best_score = red, score
+    return best_red
+
+
+def greedy_split(elos: Sequence[float], per_team: int) -> Tuple[int, ...]:
+    """Quick fallback split: strongest players first, each to the team with the lower total
+
+    Not optimal, but never far off; balance starts from it so there is
+    always an answer when the deadline passes.
+
+    Returns:
+        tuple: Red team indices, ascending (None if no split exists)
+    """
+    n = len(elos)
+    if not 0 < per_team < n:
+        return None
+    red, red_total, blue_total = [], 0.0, 0.0
+    blue_room = n - per_team
+    for i in sorted(range(n), key=lambda i: -elos[i]):
+        if len(red) < per_team and (red_total <= blue_total or not blue_room):
+            red.append(i)
+            red_total += elos[i]
+        else:
+            blue_room -= 1
+            blue_total += elos[i]
+    return tuple(sorted(red))
+
+
+def _subsets_by_size(elos: Sequence[float], indices: Sequence[int],
+                     deadline: Optional[float] = None) -> Dict[int, Tuple[List[float], List[tuple]]]:
+    """{size: (subset sums ascending, subsets in the same order)} over `indices`"""
+    values = [elos[i] for i in indices]
+    by_size = {}
+    for size in range(len(indices) + 1):
+        _check_deadline(deadline)
+        # combinations() of indices and of values come out aligned
+        entries = sorted(zip(map(sum, combinations(values, size)), combinations(indices, size)))
+        by_size[size] = ([entry[0] for entry in entries], [entry[1] for entry in entries])
+    return by_size
+
+
+def _first_parts(elos: Sequence[float], per_team: int, deadline: Optional[float] = None) -> list:
+    """[(first-half part, its sum, (second-half sums, subsets) to complete it)]"""
+    n = len(elos)
+    first = _subsets_by_size(elos, range(n // 2), deadline)
+    second = _subsets_by_size(elos, range(n // 2, n), deadline)
+    return [(subset, first_sum, second[per_team - size])
+            for size, (sums, subsets) in first.items() if per_team - size in second
+            for first_sum, subset in zip(sums, subsets)]
+
+
+def optimal_splits(elos: Sequence[float], per_team: int, deadline: Optional[float] = None,
+                   incumbent: Optional[list] = None, first_parts: Optional[list] = None) -> Iterator[Tuple[int, ...]]:
+    """Every split with the minimal ELO difference, in itertools.combinations order
+
+    Meet in the middle: red = (subset of the first half) + (subset of the
+    second half), and for each first-half subset the second-half subsets
+    closest to the ideal red total are found by bisection. Differences
+    within a rounding tolerance of the minimum count as equal; split_score
+    settles them.
+
+    Args:
+        elos: Rating of every player, in queue order
+        per_team: Players on the red team
+        deadline: time.monotonic() value after which SearchTimeout is raised
+        incumbent: [red indices] of a known split; replaced in place whenever
+            a closer split is found, so it holds the best so far on timeout
+        first_parts: _first_parts' tables, if already built (sorted in place)
+    """
+    n = len(elos)
+    if not 0 < per_team < n:
+        return
+    if first_parts is None:
+        first_parts = _first_parts(elos, per_team, deadline)
+
+    total = sum(elos)
+    half = total / 2
+    tolerance = 1e-9 * max(1.0, sum(abs(elo) for elo in elos))
+
+    # Pass 1: the minimal difference |red_total - half| (half the ELO difference)
+    best = float('inf')
+    if incumbent:
+        best = abs(sum(elos[i] for i in incumbent[0]) - half)
+    for count, (part, first_sum, (sums, subsets)) in enumerate(first_parts):
+        if count % DEADLINE_CHECK_EVERY == 0:
+            _check_deadline(deadline)
+        target = half - first_sum
+        position = bisect_left(sums, target)
+        for closest in (position - 1, position):
+            if 0 <= closest < len(sums) and abs(sums[closest] - target) < best:
+                best = abs(sums[closest] - target)
+                if incumbent is not None:
+                    incumbent[:] = [part + subsets[closest]]
+
+    # Pass 2 goes in combination order: a first-half part that is a prefix
+    # of another sorts after it (its next index is from the second half),
+    # hence the sentinel n. bytes keys compare in C, far faster than tuples
+    _check_deadline(deadline)
+    first_parts.sort(key=lambda entry: bytes(entry[0] + (n,)))
+
+    # Pass 2: every split reaching it (red total either below or above half)
+    windows = [(-best - tolerance, -best + tolerance), (best - tolerance, best + tolerance)]
+    if best <= tolerance:
+        windows = [(-best - tolerance, best + tolerance)]
+    for count, (part, first_sum, (sums, subsets)) in enumerate(first_parts):
+        if count % DEADLINE_CHECK_EVERY == 0:
+            _check_deadline(deadline)
+        target = half - first_sum
+        found = []
+        for low, high in windows:
+            start = bisect_left(sums, target + low)
+            end = bisect_right(sums, target + high, start)
+            found.extend(subsets[start:end])
+        if found:
+            found.sort()
+            for second_part in found:
+                yield part + second_part
+
+
+def _nearest_splits(elos: Sequence[float], first_parts: list, count: int,
+                    deadline: Optional[float] = None) -> List[Tuple[int, ...]]:
+    """The `count` splits with player 0 on red closest to an even ELO total (any order)
+
+    Same tables as optimal_splits: each first-half part walks outwards from
+    its ideal complement while it still beats the worst split kept.
+    """
+    half = sum(elos) / 2
+    kept = []  # Max-heap on distance: (-|red_total - half|, red)
+    for number, (part, first_sum, (sums, subsets)) in enumerate(first_parts):
+        if number % DEADLINE_CHECK_EVERY == 0:
+            _check_deadline(deadline)
+        if not part or part[0] != 0:
+            continue  # Mirror image of a split with player 0 on red
+        target = half - first_sum
+        right = bisect_left(sums, target)
+        left = right - 1
+        while left >= 0 or right < len(sums):
+            if right == len(sums) or (left >= 0 and target - sums[left] <= sums[right] - target):
+                distance, second_part = target - sums[left], subsets[left]
+                left -= 1
+            else:
+                distance, second_part = sums[right] - target, subsets[right]
+                right += 1
+            if len(kept) < count:
+                heapq.heappush(kept, (-distance, part + second_part))
+            elif distance < -kept[0][0]:
+                heapq.heapreplace(kept, (-distance, part + second_part))
+            else:
+                break
+    return [red for _, red in kept]
+
+
+@lru_cache(maxsize=None)
+def split_matrices(per_team: int):
+    """(red, blue) index matrices of every split with player 0 on red, cached per team size
+
+    Each row is one split; rows are in combination order. A split and its
+    mirror image (teams swapped) score the same, so fixing player 0 to
+    red halves the C(2k, k) splits to C(2k - 1, k - 1).
+    """
+    n = 2 * per_team
+    rest = list(combinations(range(1, n), per_team - 1))
+    rest = np.array(rest, dtype=np.intp).reshape(len(rest), per_team - 1)
+    red = np.hstack([np.zeros((len(rest), 1), dtype=np.intp), rest])
+    on_red = np.zeros((len(red), n), dtype=bool)
+    on_red[np.arange(len(red))[:, None], red] = True
+    blue = np.nonzero(~on_red)[1].reshape(len(red), per_team)
+    red.setflags(write=False)
+    blue.setflags(write=False)
+    return red, blue
+
+
+def score_splits(elos: Sequence[float], per_team: int):
+    """Vectorized split_score of every split with player 0 on red
+
+    Returns:
+        tuple: (red index matrix, diff, win_prob_diff, variance) - one array entry per split
+    """
+    red, blue = split_matrices(per_team)
+    ratings = np.asarray(elos, dtype=float)
+    red_elos = ratings[red]
+    blue_elos = ratings[blue]
+
+    red_total = red_elos.sum(axis=1)
+    blue_total = ratings.sum() - red_total
+    diff = np.abs(red_total - blue_total)
+
+    red_avg = red_total / per_team
+    blue_avg = blue_total / per_team
+    win_prob_diff = np.abs(1 / (1 + 10 ** ((blue_avg - red_avg) / 400)) - 0.5)
+
+    variance = (((red_elos - red_avg[:, None]) ** 2).sum(axis=1)
+                + ((blue_elos - blue_avg[:, None]) ** 2).sum(axis=1)) / per_team
+    return red, diff, win_prob_diff, variance
+
+
+def vectorized_optimal_splits(elos: Sequence[float], per_team: int, scores: tuple = None) -> List[Tuple[int, ...]]:
+    """Every split with the minimal ELO difference (mirror images included), in combination order
+
+    Args:
+        scores: score_splits(elos, per_team), if already computed
+    """
+    n = len(elos)
+    red, diff, _, _ = scores if scores is not None else score_splits(elos, per_team)
+    tolerance = 2e-9 * max(1.0, sum(abs(elo) for elo in elos))
+    splits = []
+    for row in red[diff <= diff.min() + tolerance]:
+        split = tuple(row.tolist())
+        splits.append(split)
+        splits.append(tuple(sorted(set(range(n)) - set(split))))
+    return sorted(splits)
+
+
+def _first_best(elos: Sequence[float], splits: Iterable[Tuple[int, ...]]) -> Tuple[int, ...]:
+    """brute_force_split's choice among `splits` (given in combination order)"""
+    total = sum(elos)
+    best_red = None
+    best_score = None
+    for count, red in enumerate(splits):
+        if count == MAX_TIED_SPLITS:
+            break
+        score = split_score(elos, red, total)
+        if score[0] == 0 and score[1] < 0.01:
+            return red
+        if best_score is None or score < best_score:
+            best_red, best_score = red, score
+    return best_red
+
+
+def best_split(elos: Sequence[float], per_team: int) -> Tuple[int, ...]:
+    """The split brute_force_split picks, without scoring every split
+
+    Up to VECTORIZED_MAX_PER_TEAM a side the half of the splits with player
+    0 on red is scored with NumPy (when installed); larger teams use the
+    meet-in-the-middle search. Either way the splits with the minimal
+    difference are settled with the brute force's exact arithmetic.
+
+    Args:
+        elos: Rating of every player (2 * per_team of them), in queue order
+        per_team: Players per team
+
+    Returns:
+        tuple: Red team indices, ascending (None if no split exists)
+    """
+    return balance(elos, per_team)[0]
+
+
+def balance(elos: Sequence[float], per_team: int, deadline: Optional[float] = None) -> Tuple[Tuple[int, ...], bool]:
+    """best_split with a time budget (anytime search)
+
+    Safe to call from a worker thread. When `deadline` passes, the best
+    split found so far is returned instead: the closest one pass 1 had
+    reached, or greedy_split's if the search had not got that far.
+
+    Args:
+        elos: Rating of every player (2 * per_team of them), in queue order
+        per_team: Players per team
+        deadline: time.monotonic() value to stop at (None: search to the end)
+
+    Returns:
+        tuple: (red team indices, True if proven to be best_split's answer)
+    """
+    splits, optimal = balance_top(elos, per_team, 1, deadline)
+    return splits[0], optimal
+
+
+def balance_top(elos: Sequence[float], per_team: int, count: int = 1,
+                deadline: Optional[float] = None) -> Tuple[List[Tuple[int, ...]], bool]:
+    """balance plus the next best distinct splits, from one search
+
+    The first split is balance's answer; the others are the closest
+    remaining splits ranked by split_score, never the mirror image (teams
+    swapped) of one already listed. Alternatives are only looked for when
+    the best split was proven optimal in time.
+
+    Args:
+        elos: Rating of every player (2 * per_team of them), in queue order
+        per_team: Players per team
+        count: Splits wanted, best first
+        deadline: time.monotonic() value to stop at (None: search to the end)
+
+    Returns:
+        tuple: ([red team indices, ...] - at most `count`, True if the first is proven optimal)
+    """
+    alternatives = count > 1 and len(elos) == 2 * per_team
+    if np is not None and 0 < per_team <= VECTORIZED_MAX_PER_TEAM and len(elos) == 2 * per_team:
+        # A few milliseconds at most: not worth interrupting
+        scores = score_splits(elos, per_team)
+        best = _first_best(elos, vectorized_optimal_splits(elos, per_team, scores))
+        if not alternatives:
+            return [best], True
+        red, diff, win_prob_diff, variance = scores
+        nearest = [tuple(row.tolist()) for row in red[np.lexsort((variance, win_prob_diff, diff))[:count]]]
+        return _with_alternatives(elos, best, nearest, count), True
+
+    incumbent = [greedy_split(elos, per_team)] if deadline is not None else None
+    try:
+        first_parts = _first_parts(elos, per_team, deadline) if 0 < per_team < len(elos) else []
+        best = _first_best(elos, optimal_splits(elos, per_team, deadline, incumbent, first_parts))
+    except SearchTimeout:
+        return [incumbent[0]], False
+    if not alternatives or best is None:
+        return [best], True
+    try:
+        nearest = _nearest_splits(elos, first_parts, count, deadline)
+    except SearchTimeout:
+        return [best], True
+    return _with_alternatives(elos, best, nearest, count), True
+
+
+def _with_alternatives(elos: Sequence[float], best: Tuple[int, ...], nearest: Iterable[Tuple[int, ...]],
+                       count: int) -> List[Tuple[int, ...]]:
+    """[best] followed by the other `nearest` splits ranked by split_score, mirror images skipped"""
+    total = sum(elos)
+    listed = {best, tuple(i for i in range(len(elos)) if i not in best)}
+    others = sorted((split_score(elos, red, total), red) for red in nearest if red not in listed)
+    return [best] + [red for _, red in others[:count - 1]]
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Archive Test Suite
+Tests that old PUGs move to the attached archive database and that history
+queries still return them, reading the archive only past the hot window,
+and that archived PUGs can no longer be settled
+"""
+
+import sqlite3
+
+import pytest
+
+from database import DatabaseManager
+
+SERVER = '1'
+
+
+def test_history_spans_hot_and_archived_pugs(tmp_path):
+    db = DatabaseManager(str(tmp_path / "pug_data.db"), pooled=True)
+    for discord_id in ('10', '20'):
+        db.register_player(discord_id, SERVER)
+    pug_ids = [db.add_pug(['10'], ['20'], 'ctf', 1000, 1000, server_id=SERVER) for _ in range(5)]
+    db.update_pug_winner(pug_ids[0], 'red')
+
+    conn = sqlite3.connect(db.db_path)
+    conn.execute("UPDATE pugs SET timestamp = datetime('now', '-400 days') WHERE pug_id <= ?", (pug_ids[2],))
+    conn.commit()
+    conn.close()
+
+    result = db.archive_pugs(older_than_days=180, batch_size=2)
+    assert (result['archived'], result['through_pug_id']) == (3, pug_ids[2])
+    assert db.archive_pugs(older_than_days=180)['archived'] == 0
+
+    # The hot window alone answers short queries
+    assert [p['archived'] for p in db.get_recent_pugs(SERVER, 2)] == [False, False]
+
+    pugs = db.get_recent_pugs(SERVER, 10)
+    assert [p['pug_id'] for p in pugs] == pug_ids[::-1]
+    assert [p['archived'] for p in pugs] == [False, False, True, True, True]
+    assert pugs[-1]['winner'] == 'red' and pugs[-1]['red_team'] == ['10']
+    assert [p['pug_id'] for p in db.get_player_pugs('20', SERVER, 10, with_result=True)] == [pug_ids[0]]
+    assert [p['pug_id'] for p in db.iter_pugs(SERVER, page_size=2)] == pug_ids[::-1]
+    db.close()
+
+    conn = sqlite3.connect(db.archive_path)
+    assert conn.execute("SELECT COUNT(*) FROM pug_teams").fetchone()[0] == 6
+    conn.close()
+
+
+def test_archived_pug_cannot_be_settled(tmp_path):
+    db = DatabaseManager(str(tmp_path / "pug_data.db"))
+    for discord_id in ('10', '20'):
+        db.register_player(discord_id, SERVER)
+    pug_id = db.add_pug(['10'], ['20'], 'ctf', 1000, 1000, server_id=SERVER)
+
+    conn = sqlite3.connect(db.db_path)
+    conn.execute("UPDATE pugs SET timestamp = datetime('now', '-400 days')")
+    conn.commit()
+    conn.close()
+    assert db.archive_pugs(older_than_days=180)['archived'] == 1
+
+    win = {'elo': 16, 'wins': 1, 'total_pugs': 1, 'streak': 'win'}
+    loss = {'elo': -16, 'losses': 1, 'total_pugs': 1, 'streak': 'loss'}
+    with pytest.raises(ValueError):
+        db.settle_pug(pug_id, 'red', {'10': win, '20': loss}, SERVER)
+
+    # Nothing was applied: ratings, counters and history are untouched
+    assert db.get_player_elo('10', SERVER) == 1000
+    assert db.get_player('10', SERVER)['wins'] == 0
+    assert db.get_pug_elo_changes(pug_id) == {}
+    assert db.get_recent_pugs(SERVER, 1)[0]['winner'] is None
+    db.close()
+
+
+def test_archive_is_skipped_when_it_cannot_match(tmp_path, monkeypatch):
+    db = DatabaseManager(str(tmp_path / "pug_data.db"))
+    for discord_id in ('10', '20', '30'):
+        db.register_player(discord_id, SERVER)
+    db.add_pug(['10'], ['20'], 'ctf', 1000, 1000, server_id=SERVER)
+
+    def archive(days):
+        conn = sqlite3.connect(db.db_path)
+        conn.execute("UPDATE pugs SET timestamp = datetime('now', ?)", (f"-{days} days",))
+        conn.commit()
+        conn.close()
+        return db.archive_pugs(older_than_days=180)
+
+    archive(400)
+    queried = []
+    query_pugs = db._query_pugs
+    monkeypatch.setattr(db, '_query_pugs', lambda cursor, prefix, *args: queried.append(prefix)
+                        or query_pugs(cursor, prefix, *args))
+
+    # A player without archived PUGs: the archive is asked once, then skipped
+    assert db.get_player_pugs('30', SERVER) == []
+    assert db.get_player_pugs('30', SERVER) == []
+    assert db.get_recent_pugs('2', 5) == []
+    assert db.get_recent_pugs('2', 5) == []
+    assert queried == ['', 'archive.', '', '', 'archive.', '']
+
+    # An archived PUG of their own is found as soon as the watermark moves
+    pug_id = db.add_pug(['30'], ['20'], 'ctf', 1000, 1000, server_id=SERVER)
+    assert archive(400)['through_pug_id'] == pug_id
+    assert [p['pug_id'] for p in db.get_player_pugs('30', SERVER)] == [pug_id]
+    db.close()
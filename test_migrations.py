@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Database Migration Test Suite
+Tests the versioned schema migrations in migrations.py against fresh,
+legacy (pre-versioning) and up-to-date databases
+"""
+
+import sqlite3
+
+import pytest
+
+import migrations
+from database import DatabaseManager
+from migrations import get_schema_version, latest_version, run_migrations
+
+
+def table_columns(db_path, table):
+    """Column names of `table`"""
+    conn = sqlite3.connect(db_path)
+    columns = [col[1] for col in conn.execute(f"PRAGMA table_info({table})")]
+    conn.close()
+    return columns
+
+
+def test_fresh_database_reaches_latest_version(tmp_path):
+    """A new database is created at the latest schema version"""
+    db_path = str(tmp_path / "fresh.db")
+    DatabaseManager(db_path)
+    
+    conn = sqlite3.connect(db_path)
+    assert get_schema_version(conn) == latest_version()
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    conn.close()
+    assert versions == [version for version, _, _ in migrations.MIGRATIONS]
+    
+    assert 'peak_elo' in table_columns(db_path, 'players')
+    assert 'tiebreaker_enabled' in table_columns(db_path, 'game_modes')
+
+
+def test_up_to_date_startup_runs_one_query(tmp_path):
+    """Starting on an up-to-date database only reads schema_version"""
+    db_path = str(tmp_path / "current.db")
+    DatabaseManager(db_path)
+    
+    statements = []
+    conn = sqlite3.connect(db_path)
+    conn.set_trace_callback(statements.append)
+    assert run_migrations(conn) == latest_version()
+    conn.close()
+    
+    assert statements == ["SELECT MAX(version) FROM schema_version"]
+
+
+def test_failed_migration_rolls_back(tmp_path, monkeypatch):
+    """A failing migration leaves the schema and version untouched"""
+    db_path = str(tmp_path / "failing.db")
+    DatabaseManager(db_path)
+    
+    next_version = latest_version() + 1
+    
+    def broken(cursor):
+        cursor.execute("ALTER TABLE players ADD COLUMN half_done INTEGER")
+        cursor.execute("SELECT no_such_column FROM players")
+    
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS + [(next_version, "broken", broken)])
+    
+    conn = sqlite3.connect(db_path)
+    with pytest.raises(sqlite3.OperationalError):
+        run_migrations(conn)
+    assert get_schema_version(conn) == next_version - 1
+    conn.close()
+    
+    assert 'half_done' not in table_columns(db_path, 'players')
+
+
+def test_legacy_players_table_gets_server_id(tmp_path):
+    """Pre-multi-server player rows are kept and assigned server_id='default'"""
+    db_path = str(tmp_path / "legacy_players.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE players (
+            discord_id TEXT PRIMARY KEY,
+            discord_name TEXT,
+            display_name TEXT,
+            wins INTEGER DEFAULT 0,
+            losses INTEGER DEFAULT 0,
+            total_pugs INTEGER DEFAULT 0,
+            elo REAL DEFAULT 1000
+        )
+    ''')
+    conn.execute("INSERT INTO players (discord_id, wins, total_pugs, elo) VALUES ('42', 3, 5, 1234)")
+    conn.commit()
+    conn.close()
+    
+    db = DatabaseManager(db_path)
+    player = db.get_player('42', 'default')
+    assert player['elo'] == 1234
+    assert player['wins'] == 3
+    assert player['registered'] == 1
+
+
+def test_tiebreaker_migration(tmp_path):
+    """tiebreaker_enabled is added to a v2.0 game_modes table, enabled by default"""
+    db_path = str(tmp_path / "test_migration.db")
+    
+    # Create OLD database (without tiebreaker_enabled column)
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE game_modes (
+            mode_name TEXT PRIMARY KEY,
+            display_name TEXT NOT NULL,
+            team_size INTEGER NOT NULL,
+            description TEXT,
+            per_mode_elo_enabled INTEGER DEFAULT 0,
+            elo_prefix TEXT
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO game_modes (mode_name, display_name, team_size, description)
+        VALUES ('tam', 'TAM 4v4', 8, 'Team Arena Master')
+    ''')
+    conn.execute('''
+        INSERT INTO game_modes (mode_name, display_name, team_size, description)
+        VALUES ('ctf', 'CTF 4v4', 8, 'Capture the Flag')
+    ''')
+    conn.commit()
+    conn.close()
+    assert 'tiebreaker_enabled' not in table_columns(db_path, 'game_modes')
+    
+    # Run migration (simulate bot startup)
+    db = DatabaseManager(db_path)
+    assert 'tiebreaker_enabled' in table_columns(db_path, 'game_modes')
+    
+    # Default value is 1 (enabled) for existing modes
+    assert db.is_tiebreaker_enabled('tam')
+    assert db.is_tiebreaker_enabled('ctf')
+    
+    # Set/Get operations work correctly
+    db.set_tiebreaker_enabled('tam', False)
+    assert not db.is_tiebreaker_enabled('tam')
+    assert db.is_tiebreaker_enabled('ctf')
+
+
+def test_pug_server_id_backfill(tmp_path, monkeypatch):
+    """Existing PUGs get the server most of their participants play on"""
+    db_path = str(tmp_path / "history.db")
+    
+    # Database as it was before PUGs carried a server_id
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [m for m in migrations.MIGRATIONS if m[0] <= 2])
+    conn = sqlite3.connect(db_path)
+    run_migrations(conn)
+    conn.executemany("INSERT INTO players (discord_id, server_id) VALUES (?, ?)",
+                     [('1', 'A'), ('2', 'A'), ('3', 'A'), ('3', 'B'), ('4', 'B'), ('5', 'B')])
+    conn.executemany("INSERT INTO pugs (pug_id, game_mode) VALUES (?, 'tam')", [(1,), (2,), (3,)])
+    conn.executemany("INSERT INTO pug_teams (pug_id, discord_id, team) VALUES (?, ?, ?)", [
+        (1, '1', 'red'), (1, '2', 'red'), (1, '3', 'blue'), (1, '4', 'blue'),
+        (2, '3', 'red'), (2, '4', 'red'), (2, '5', 'blue'), (2, '1', 'blue'),
+    ])
+    conn.commit()
+    conn.close()
+    monkeypatch.undo()
+    
+    db = DatabaseManager(db_path)
+    assert [p['pug_id'] for p in db.get_recent_pugs('A', 10)] == [1]
+    assert [p['pug_id'] for p in db.get_recent_pugs('B', 10)] == [2]
+    assert db.get_recent_pugs(None, 10)[0]['server_id'] is None  # No participants
+    
+    conn = sqlite3.connect(db_path)
+    teams = dict(conn.execute("SELECT pug_id, MIN(server_id) FROM pug_teams GROUP BY pug_id"))
+    conn.close()
+    assert teams == {1: 'A', 2: 'B'}
+
+
+def test_elo_history_reversal_backfill(tmp_path, monkeypatch):
+    """Latest history rows are flagged as reversals when their PUG has no standing result"""
+    db_path = str(tmp_path / "history.db")
+    
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [m for m in migrations.MIGRATIONS if m[0] <= 6])
+    conn = sqlite3.connect(db_path)
+    run_migrations(conn)
+    conn.executemany("INSERT INTO pugs (pug_id, game_mode, winner) VALUES (?, 'tam', ?)",
+                     [(1, 'red'), (2, None), (3, 'blue')])
+    conn.executemany("INSERT INTO elo_history (pug_id, server_id, discord_id, pool, elo_before, elo_after) "
+                     "VALUES (?, 'A', '1', 'global', ?, ?)", [
+        (1, 1000, 1016),                    # Settled
+        (2, 1016, 1000),                    # Legacy PUG undone: one reversal row
+        (3, 1000, 984), (3, 984, 1000), (3, 1000, 1016),  # Settled, undone, re-reported
+        (4, 1016, 1032), (4, 1032, 1016),   # Archived (not in pugs), settled then undone
+    ])
+    conn.commit()
+    conn.close()
+    monkeypatch.undo()
+    
+    db = DatabaseManager(db_path)
+    assert db.get_pug_elo_changes(2) == db.get_pug_elo_changes(4) == {}
+    assert [(row['pug_id'], row['change']) for row in db.get_recent_elo_changes('1', 'A')] == [(3, 16), (1, 16)]
+
+
+def test_server_counters_match_recount(tmp_path):
+    """The server_counters cache agrees with counting the pugs table"""
+    db = DatabaseManager(str(tmp_path / "counters.db"))
+    for uid in '1234':
+        db.register_player(uid, 'A')
+    
+    red_win = {'1': {'wins': 1, 'total_pugs': 1}, '3': {'losses': 1, 'total_pugs': 1}}
+    first = db.add_pug(['1', '2'], ['3', '4'], 'tam', 1000, 1000, server_id='A')
+    second = db.add_pug(['1', '2'], ['3', '4'], 'tam', 1000, 1000, server_id='A')
+    third = db.add_pug(['1', '2'], ['3', '4'], 'ctf', 1000, 1000, server_id='A')
+    db.settle_pug(first, 'red', red_win, 'A')
+    db.settle_pug(second, 'blue', red_win, 'A')
+    db.settle_pug(second, None, red_win, 'A')  # Undo
+    db.delete_pug(third)
+    db.delete_pug(third)  # Already killed
+    db.delete_pug(second)
+    db.restore_pug(second)
+    
+    counters = db.get_server_counters('A')
+    assert counters['total_pugs'] == 3
+    assert counters['decided_pugs'] == 1
+    assert counters['killed_pugs'] == 1
+    assert counters['pugs_by_mode'] == {'tam': 2, 'ctf': 1}
+    assert counters['total_players'] == 4
+    assert counters['active_players'] == 2
+    
+    conn = sqlite3.connect(db.db_path)
+    recount = conn.execute('''
+        SELECT game_mode, COUNT(*), COUNT(winner), SUM(status = 'killed')
+        FROM pugs WHERE server_id = 'A' GROUP BY game_mode ORDER BY game_mode
+    ''').fetchall()
+    cached = conn.execute('''
+        SELECT game_mode, pugs, decided, killed
+        FROM server_counters WHERE server_id = 'A' ORDER BY game_mode
+    ''').fetchall()
+    conn.close()
+    assert cached == recount
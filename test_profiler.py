@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Query Profiler Test Suite
+Tests that an attached profiler counts method calls, SQL statements and rows,
+and that detaching restores the plain DatabaseManager
+"""
+
+from database import DatabaseManager
+from profiler import QueryProfiler, normalize_sql
+
+SERVER = '1'
+
+
+def test_profiler_records_methods_and_statements(tmp_path):
+    db = DatabaseManager(str(tmp_path / "profile.db"), pooled=True)
+    profiler = QueryProfiler(samples=10)
+    profiler.attach(db)
+
+    for discord_id in ('10', '20', '30'):
+        db.register_player(discord_id, SERVER)
+    assert len(db.get_all_players(SERVER)) == 3
+    assert len(list(db.iter_pugs(SERVER))) == 0
+
+    report = profiler.report(top=50, sort='calls')
+    methods = dict(report['methods'])
+    assert methods['register_player']['calls'] == 3
+    assert methods['get_player']['calls'] == 3  # Nested calls are timed too
+    assert methods['get_all_players']['rows'] == 3
+    assert 'iter_pugs' in methods
+    assert methods['get_all_players']['p50_ms'] <= methods['get_all_players']['max_ms']
+
+    statements = dict(report['statements'])
+    select_all = next(sql for sql in statements if sql.startswith('SELECT') and 'WHERE server_id = ?' in sql
+                      and 'FROM players' in sql)
+    assert statements[select_all]['rows'] == 3
+    assert all("'" not in sql for sql in statements)
+
+    log = tmp_path / "db_profile.log"
+    profiler.dump(str(log))
+    assert 'register_player' in log.read_text()
+
+    profiler.detach()
+    assert db.profiler is None and 'get_player' not in vars(db)
+    db.get_player('10', SERVER)
+    assert profiler.report(sort='calls')['methods'][0][1]['calls'] == 3
+    db.close()
+
+
+def test_normalize_sql_groups_literals():
+    assert normalize_sql("SELECT * FROM players WHERE discord_id IN ('1', '2''s', 3)\n  AND elo > -10.5") == \
+        "SELECT * FROM players WHERE discord_id IN (?, ...) AND elo > ?"
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Query Plan Guardrails
+Runs every DatabaseManager method against a populated database, captures the
+SQL it issues and fails if EXPLAIN QUERY PLAN shows a full table scan that is
+not on the allowlist below
+"""
+
+import inspect
+import re
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import DatabaseManager
+
+SERVER = '111'
+
+# Full scans that are intended: regex over the normalized SQL -> reason
+ALLOWED_SCANS = {
+    r"FROM pugs ORDER BY pug_id DESC LIMIT \d+\b": "newest-first walk of the rowid, stops after LIMIT rows",
+    r"FROM game_modes ORDER BY team_size DESC$": "ModeRegistry load of every mode (a handful of rows)",
+    r"^SELECT alias, mode_name FROM mode_aliases$": "ModeRegistry load of every alias",
+    r"^SELECT key, value FROM bot_settings$": "ModeRegistry load of every setting",
+    r"^SELECT discord_id FROM pug_admins$": "unfiltered admin listing",
+    r"best_win_streak, best_loss_streak FROM players$": "unfiltered all-server player export",
+    r"\btemp\.import_rows\b": "bulk import staging table, read in full by design",
+    r"FROM main\.sqlite_master WHERE tbl_name = \?": "archive schema copy (a handful of rows)",
+}
+
+# Methods that issue no SQL of their own
+NOT_QUERIES = {'get_connection', 'close', 'init_database'}
+
+
+class TracingDatabase(DatabaseManager):
+    """DatabaseManager that records every statement it runs"""
+    
+    def __init__(self, db_path):
+        self.statements = []
+        super().__init__(db_path)
+    
+    def get_connection(self):
+        conn = super().get_connection()
+        conn.set_trace_callback(self.statements.append)
+        return conn
+
+
+def normalize(sql):
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def full_scans(conn, sql):
+    """Tables that the plan for `sql` scans without a search term"""
+    table_names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    tables = []
+    for _, _, _, detail in plan:
+        # Subquery results (e.g. "SCAN p") are not tables
+        match = re.match(r'SCAN (\w+)', detail)
+        if match and match.group(1) in table_names:
+            tables.append(detail)
+    return tables
+
+
+def exercise(db):
+    """Call every query method with representative arguments, return their names"""
+    calls = [
+        ('register_player', '1', SERVER, 'alice', 'Alice'),
+        ('register_player', '2', SERVER, 'bob', 'Bob'),
+        ('register_player', '3', SERVER, 'carol', 'Carol'),
+        ('register_player', '4', SERVER, 'dave', 'Dave'),
+        ('get_player', '1', SERVER),
+        ('player_exists', '1', SERVER),
+        ('update_player_names', '1', SERVER, 'alice', 'Alice A'),
+        ('find_player_by_name', SERVER, 'bob'),
+        ('update_player_stats', '1', SERVER, True),
+        ('update_player_elo', '1', SERVER, 1050),
+        ('update_ut2k4_info', '1', SERVER, 'AliceUT'),
+        ('update_player_total_pugs', '1', SERVER, 5),
+        ('set_player_peak_elo', '1', SERVER, 1200),
+        ('get_player_elo', '1', SERVER),
+        ('get_player_elos', ['1', '2', '404'], SERVER),
+        ('flush',),
+        ('get_all_players', SERVER),
+        ('get_all_players',),
+        ('bulk_update_elos', SERVER, [('2', 1100), ('9', 900)]),
+        ('bulk_merge_players', SERVER, [('1', 3), ('9', 2), ('x', 1)], 'total_pugs', True, False, True),
+        ('bulk_merge_players', SERVER, [('1', 3)], 'total_pugs', True, False),
+        ('add_game_mode', 'tam', 'TAM 2v2', 4),
+        ('add_game_mode', 'ctf', 'CTF 2v2', 4),
+        ('get_game_mode', 'tam'),
+        ('get_all_game_modes',),
+        ('add_mode_alias', 't', 'tam'),
+        ('get_mode_aliases', 'tam'),
+        ('resolve_mode_alias', 't'),
+        ('remove_mode_alias', 't'),
+        ('set_setting', 'foo', 'bar'),
+        ('get_setting', 'foo'),
+        ('set_scraping_enabled', True),
+        ('is_scraping_enabled',),
+        ('set_per_mode_elo_enabled', False),
+        ('set_per_mode_elo_for_mode', 'tam', True),
+        ('is_per_mode_elo_enabled', 'tam'),
+        ('is_per_mode_elo_enabled',),
+        ('set_mode_elo_prefix', 'ctf', 'tam'),
+        ('get_mode_elo_prefix', 'ctf'),
+        ('get_effective_mode_for_elo', 'ctf'),
+        ('get_modes_with_per_mode_elo',),
+        ('add_pug', ['1', '2'], ['3', '4'], 'tam', 1000, 1000, None, '1', '3', SERVER),
+        ('update_pug_winner', 1, 'red'),
+        ('settle_pug', 1, 'red', {'1': {'elo': 16, 'wins': 1, 'total_pugs': 1, 'streak': 'win'},
+                                  '3': {'elo': -16, 'losses': 1, 'total_pugs': 1, 'streak': 'loss'}},
+         SERVER, 'tam'),
+        ('get_recent_pugs', SERVER, 10),
+        ('get_recent_pugs', None, 10),
+        ('iter_pugs', SERVER),
+        ('iter_pugs', None, 5, 1),
+        ('get_player_pugs', '1', SERVER),
+        ('get_player_pugs', '1', SERVER, 5, 10, True),
+        ('get_last_pug_id', SERVER),
+        ('get_last_pug_id',),
+        ('get_pug_elo_changes', 1),
+        ('get_recent_elo_changes', '1', SERVER, 'tam'),
+        ('get_elo_history', '1', SERVER, 'tam', 5),
+        ('get_history_peak_elo', '1', SERVER),
+        ('delete_pug', 1),
+        ('restore_pug', 1),
+        ('get_server_counters', SERVER),
+        ('get_leaderboard_position', '1', SERVER),
+        ('get_leaderboard_position', '1', SERVER, 'tam'),
+        ('get_leaderboard_neighbours', '3', SERVER),
+        ('get_leaderboard_neighbours', '3', SERVER, 'tam', 1),
+        ('init_player_mode_elo', '1', SERVER, 'tam'),
+        ('get_player_mode_elo', '1', SERVER, 'tam'),
+        ('update_player_mode_elo', '1', SERVER, 'tam', 1020),
+        ('update_player_mode_stats', '1', SERVER, 'tam', True),
+        ('update_player_mode_result', '2', SERVER, 'tam', False, 990),
+        ('set_player_mode_elo', '1', SERVER, 'tam', 1030),
+        ('get_all_player_mode_elos', '1', SERVER),
+        ('get_player_elo', '2', SERVER, 'tam'),
+        ('get_player_elos', ['1', '2', '3'], SERVER, 'tam'),
+        ('reset_player_stats', SERVER, ('wins', 'losses', 'total_pugs')),
+        ('add_timeout', '1', datetime.now() + timedelta(minutes=5)),
+        ('is_timed_out', '1'),
+        ('add_pug_admin', '1', SERVER),
+        ('is_pug_admin', '1', SERVER),
+        ('get_pug_admins', SERVER),
+        ('get_pug_admins',),
+        ('remove_pug_admin', '1', SERVER),
+        ('add_map', SERVER, 'tam', 'DM-Rankin'),
+        ('add_map', SERVER, 'tam', 'DM-Deck17'),
+        ('get_maps_for_mode', SERVER, 'tam'),
+        ('get_all_maps_grouped', SERVER),
+        ('add_map_to_cooldown', SERVER, 'tam', 'DM-Rankin'),
+        ('get_maps_on_cooldown', SERVER, 'tam'),
+        ('clear_old_cooldowns', SERVER, 'tam'),
+        ('set_tiebreaker_enabled', 'tam', False),
+        ('is_tiebreaker_enabled', 'tam'),
+        ('validate_mode_for_maps', 'tam'),
+        ('validate_mode_for_maps', 'nomode'),
+        ('get_maps_for_prefix_exact', SERVER, 'tam'),
+        ('find_map_prefixes', SERVER, 'ta'),
+        ('find_map_prefixes', SERVER),
+        ('remove_map', SERVER, 'tam', 'DM-Deck17'),
+        ('remove_all_maps', SERVER, 'tam'),
+        ('remove_all_maps_exact', SERVER, 'tam'),
+        ('remove_game_mode', 'ctf'),
+        ('remove_mode', 'tam'),
+        ('delete_player', '4', SERVER),
+        ('delete_players', SERVER, ['3', '4']),
+        ('delete_players', '222'),
+        # Everything is older than "-1 days": the reads below go to the archive
+        ('archive_pugs', -1),
+        ('get_recent_pugs', SERVER, 10),
+        ('get_player_pugs', '1', SERVER, 5, 0, True),
+        ('iter_pugs', None, 5),
+        ('get_last_pug_id', SERVER),
+    ]
+    for name, *args in calls:
+        result = getattr(db, name)(*args)
+        if inspect.isgenerator(result):
+            list(result)
+    return {name for name, *_ in calls}
+
+
+@pytest.fixture
+def traced_db(tmp_path):
+    db = TracingDatabase(str(tmp_path / "plans.db"))
+    db.statements.clear()  # Ignore migrations
+    return db
+
+
+def test_every_query_method_is_exercised(traced_db):
+    """New DatabaseManager methods must be added to exercise()"""
+    public = {name for name, _ in inspect.getmembers(DatabaseManager, inspect.isfunction)
+              if not name.startswith('_')}
+    assert public - NOT_QUERIES - exercise(traced_db) == set()
+
+
+def test_no_unexpected_full_table_scans(traced_db):
+    exercise(traced_db)
+    
+    conn = sqlite3.connect(traced_db.db_path)
+    conn.execute('ATTACH DATABASE ? AS archive', (traced_db.archive_path,))
+    failures = []
+    seen = set()
+    for statement in traced_db.statements:
+        sql = normalize(statement)
+        if sql in seen or not re.match(r'(SELECT|UPDATE|DELETE|INSERT|REPLACE)\b', sql, re.IGNORECASE):
+            continue
+        seen.add(sql)
+        if any(re.search(pattern, sql) for pattern in ALLOWED_SCANS):
+            continue
+        for detail in full_scans(conn, sql):
+            failures.append(f"{detail}: {sql}")
+    conn.close()
+    
+    assert not failures, "Unexpected full table scans:\n" + "\n".join(failures)
+
+
+def test_config_reads_are_cached(traced_db):
+    """Mode, alias and setting lookups hit SQLite once per invalidation"""
+    traced_db.add_game_mode('tam', 'TAM 2v2', 4)
+    traced_db.add_mode_alias('t', 'tam')
+    
+    def hot_path():
+        mode = traced_db.resolve_mode_alias('t')
+        traced_db.get_game_mode(mode)
+        traced_db.is_per_mode_elo_enabled(mode)
+        traced_db.get_effective_mode_for_elo(mode)
+        traced_db.is_tiebreaker_enabled(mode)
+        traced_db.is_scraping_enabled()
+    
+    hot_path()
+    traced_db.statements.clear()
+    hot_path()
+    assert traced_db.statements == []
+    
+    # Mutators drop only the section they change
+    traced_db.set_mode_elo_prefix('tam', 'ta')
+    traced_db.statements.clear()
+    hot_path()
+    assert [normalize(sql) for sql in traced_db.statements if 'FROM' in sql] == [
+        "SELECT mode_name, display_name, team_size, description, per_mode_elo_enabled, elo_prefix, "
+        "tiebreaker_enabled FROM game_modes ORDER BY team_size DESC"
+    ]
+    assert traced_db.get_effective_mode_for_elo('tam') == 'ta'
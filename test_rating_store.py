@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Rating Store Test Suite
+Tests that write-behind rating changes stay visible through DatabaseManager
+and reach SQLite on flush, settlement and shutdown
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from database import DatabaseManager
+
+SERVER = '1'
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "ratings.db"))
+    manager.add_game_mode('ctf', 'CTF', 8)
+    manager.register_player('10', SERVER)
+    manager.register_player('20', SERVER)
+    yield manager
+    manager.close()
+
+
+def stored(db, sql, params):
+    """Read a row straight from the file, bypassing the store"""
+    conn = sqlite3.connect(db.db_path)
+    row = conn.execute(sql, params).fetchone()
+    conn.close()
+    return row
+
+
+def test_updates_are_written_behind(db):
+    """Changes are served from memory until flush writes them in one batch"""
+    db.update_player_elo('10', SERVER, 1100)
+    db.update_player_stats('10', SERVER, won=True)
+
+    assert db.get_player('10', SERVER)['elo'] == 1100
+    assert db.get_player('10', SERVER)['wins'] == 1
+    assert stored(db, 'SELECT elo, wins FROM players WHERE discord_id = ?', ('10',)) == (1000, 0)
+
+    assert db.ratings.flush() == 1
+    assert stored(db, 'SELECT elo, wins, peak_elo, current_streak FROM players WHERE discord_id = ?',
+                  ('10',)) == (1100, 1, 1100, 1)
+
+
+def test_new_mode_rating_is_inserted(db):
+    """A per-mode rating that has no row yet is created on flush with every column"""
+    assert db.get_player_mode_elo('10', SERVER, 'ctf')['elo'] == 1000
+    db.update_player_mode_elo('10', SERVER, 'ctf', 1040)
+    db.update_player_mode_stats('10', SERVER, 'ctf', won=True)
+    db.update_player_mode_elo('10', SERVER, 'ctf', 1020)
+    db.close()
+
+    row = stored(db, '''SELECT elo, peak_elo, wins, losses, current_streak FROM player_mode_elos
+                        WHERE discord_id = ? AND mode_name = ?''', ('10', 'ctf'))
+    assert row == (1020, 1040, 1, 0, 1)
+
+
+def test_settlement_sees_pending_changes(db):
+    """settle_pug flushes pending changes first and the store reloads its result"""
+    db.update_player_elo('10', SERVER, 1200)
+    db.update_player_total_pugs('10', SERVER, 5)
+    pug_id = db.add_pug(['10'], ['20'], 'ctf', 1200, 1000, server_id=SERVER)
+
+    changes = db.settle_pug(pug_id, 'red', {
+        '10': {'elo': 10, 'wins': 1, 'total_pugs': 1, 'streak': 'win'},
+        '20': {'elo': -10, 'losses': 1, 'total_pugs': 1, 'streak': 'loss'},
+    }, SERVER)
+
+    assert changes['10'] == {'old': 1200, 'new': 1210, 'change': 10}
+    assert db.get_player('10', SERVER)['total_pugs'] == 6
+    assert db.ratings.get(SERVER, '20')['elo'] == 990
+
+
+def test_unknown_player_is_not_created(db):
+    """Global updates for players without a row are rejected, not inserted"""
+    assert db.update_player_total_pugs('99', SERVER, 3) is False
+    db.update_player_elo('99', SERVER, 1500)
+    assert db.ratings.flush() == 0
+    assert db.get_player('99', SERVER) is None
+
+
+def test_queue_elos_load_with_one_query(db, monkeypatch):
+    """get_player_elos resolves the pool once and loads all misses in one query"""
+    db.set_per_mode_elo_for_mode('ctf', True)
+    db.set_player_mode_elo('10', SERVER, 'ctf', 1200)
+    expected = {uid: db.get_player_elo(uid, SERVER, 'ctf') for uid in ('10', '20', '30')}
+
+    loads = []
+    load = db.ratings._load
+    monkeypatch.setattr(db.ratings, '_load', lambda *args: loads.append(args) or load(*args))
+    queue = ['10', '20', '30', '40', 50]
+    assert db.get_player_elos(queue, SERVER, 'ctf') == {**expected, '40': 1000, 50: 1000}
+    assert len(loads) == 1 and loads[0][1] == ['40', '50']
+    assert db.get_player_elos(['20', '99'], SERVER) == {'20': 1000, '99': None}
+
+
+def test_leaderboard_follows_rating_changes(db):
+    """Rank index matches a full sort after writes, settlements and deletes"""
+    for discord_id, elo in (('30', 1300), ('40', 900), ('1005', 2000)):
+        db.register_player(discord_id, SERVER)
+        db.update_player_elo(discord_id, SERVER, elo)
+
+    def naive(discord_id):
+        ranked = sorted((p for p in db.get_all_players(SERVER) if p['discord_id'] != '1005'),
+                        key=lambda p: (-p['elo'], p['discord_id']))
+        ids = [p['discord_id'] for p in ranked]
+        return ids.index(discord_id) + 1 if discord_id in ids else None, len(ids)
+
+    def indexed(discord_id):
+        standing = db.get_leaderboard_position(discord_id, SERVER)
+        return standing['position'], standing['total']
+
+    assert indexed('30') == naive('30') == (1, 4)  # Simulation player 1005 is not ranked
+    db.update_player_elo('40', SERVER, 1400)
+    assert indexed('40') == naive('40') == (1, 4)
+
+    pug_id = db.add_pug(['10'], ['40'], 'ctf', 1000, 1400, server_id=SERVER)
+    db.settle_pug(pug_id, 'red', {'10': {'elo': 500}, '40': {'elo': -500}}, SERVER)
+    for discord_id in ('10', '20', '30', '40'):
+        assert indexed(discord_id) == naive(discord_id)
+
+    db.delete_player('10', SERVER)
+    assert indexed('10') == (None, 3)
+    assert [n['discord_id'] for n in db.get_leaderboard_neighbours('20', SERVER, radius=1)] == ['30', '20', '40']
+
+
+def test_bulk_merge_reports_rows_and_dry_run(db):
+    """Bulk merge reports old/new values and per-row errors; dry runs change nothing"""
+    db.update_player_total_pugs('10', SERVER, 4)  # Pending in the store until the merge flushes it
+    rows = [('10', 3), ('30', 2), ('abc', 1), ('10', 9)]
+
+    # Added rows for the same player add up
+    preview = db.bulk_merge_players(SERVER, rows, 'total_pugs', add=True, create_missing=False, dry_run=True)
+    assert [(r['discord_id'], r['old'], r['new']) for r in preview['applied']] == [('10', 4, 16)]
+    assert [discord_id for discord_id, _ in preview['errors']] == ['abc', '30']
+    assert db.get_player('10', SERVER)['total_pugs'] == 4
+
+    result = db.bulk_merge_players(SERVER, rows, 'total_pugs', add=True, create_missing=False)
+    assert result == preview
+    assert db.get_player('10', SERVER)['total_pugs'] == 16
+    assert db.get_player('30', SERVER) is None
+
+    # Replacing values: only a player's first row is used
+    result = db.bulk_merge_players(SERVER, [('10', 5), ('10', 8)], 'total_pugs')
+    assert [(r['old'], r['new']) for r in result['applied']] == [(16, 5)]
+    assert result['errors'] == [('10', "Duplicate row (only the first one is used)")]
+
+    assert db.bulk_update_elos(SERVER, [('30', 1250), ('20', 1100)]) == (2, 0, [])
+    assert db.get_player('30', SERVER)['elo'] == 1250
+    assert db.get_leaderboard_position('30', SERVER)['position'] == 1
+
+
+def test_mode_result_matches_separate_writes(db):
+    """update_player_mode_result writes what update_player_mode_stats + update_player_mode_elo did"""
+    db.update_player_mode_stats('10', SERVER, 'ctf', won=True)
+    db.update_player_mode_elo('10', SERVER, 'ctf', 1016)
+    db.update_player_mode_result('20', SERVER, 'ctf', True, 1016)
+    db.ratings.flush()
+
+    columns = 'elo, peak_elo, wins, losses, current_streak, best_win_streak, best_loss_streak'
+    sql = f'SELECT {columns} FROM player_mode_elos WHERE discord_id = ? AND mode_name = ?'
+    assert stored(db, sql, ('20', 'ctf')) == stored(db, sql, ('10', 'ctf')) == (1016, 1016, 1, 0, 1, 1, 0)
+
+    db.update_player_mode_result('20', SERVER, 'ctf', False, 990)
+    db.ratings.flush()
+    assert stored(db, sql, ('20', 'ctf')) == (990, 1016, 1, 1, -1, 1, 1)
+
+    # Undoing a result for a player with no mode row yet doesn't store negative counts
+    pug_id = db.add_pug(['30'], ['40'], 'ctf', 1000, 1000, server_id=SERVER)
+    db.settle_pug(pug_id, 'red', {}, SERVER, 'ctf')
+    db.settle_pug(pug_id, None, {'30': {'elo': -16, 'wins': -1}, '40': {'elo': 16, 'losses': -1}}, SERVER, 'ctf')
+    assert stored(db, sql, ('30', 'ctf')) == (984, 1000, 0, 0, 0, 0, 0)
+    assert stored(db, sql, ('40', 'ctf')) == (1016, 1016, 0, 0, 0, 0, 0)
+
+
+def test_elo_history_records_and_reverses_settlement(db):
+    """Settlement appends before/after rows; a reversal appends compensating rows"""
+    pug_id = db.add_pug(['10'], ['20'], 'ctf', 1000, 1000, server_id=SERVER)
+    db.settle_pug(pug_id, 'red', {'10': {'elo': 16}, '20': {'elo': -16}}, SERVER, 'ctf')
+    assert db.get_pug_elo_changes(pug_id) == {'10': {'pool': 'ctf', 'change': 16},
+                                             '20': {'pool': 'ctf', 'change': -16}}
+    assert db.get_recent_elo_changes('10', SERVER, 'ctf')[0]['elo_after'] == 1016
+
+    db.settle_pug(pug_id, None, {'10': {'elo': -16}, '20': {'elo': 16}}, SERVER, 'ctf')
+    assert db.get_pug_elo_changes(pug_id) == {}
+    assert db.get_recent_elo_changes('10', SERVER, 'ctf') == []
+    assert [row['elo_after'] for row in db.get_elo_history('10', SERVER, 'ctf')] == [1016, 1000]
+    assert db.get_history_peak_elo('10', SERVER, 'ctf') == 1016
+
+
+def test_settlement_is_not_overwritten_by_concurrent_updates(db, monkeypatch):
+    """A cached update from another thread waits until settlement has committed"""
+    db.get_player('10', SERVER)  # Cached before settlement
+    pug_id = db.add_pug(['10'], ['20'], 'ctf', 1000, 1000, server_id=SERVER)
+
+    writer = threading.Thread(target=db.update_player_elo, args=('10', SERVER, 1100))
+    get_connection = db.get_connection
+
+    def start_writer_mid_settlement():
+        if not writer.is_alive():
+            writer.start()
+            writer.join(0.2)
+            assert writer.is_alive()  # Blocked on the store's lock
+        return get_connection()
+    monkeypatch.setattr(db, 'get_connection', start_writer_mid_settlement)
+    db.settle_pug(pug_id, 'red', {'10': {'elo': 16, 'wins': 1, 'total_pugs': 1}}, SERVER)
+    monkeypatch.undo()
+    writer.join()
+    db.ratings.flush()
+
+    assert stored(db, 'SELECT elo, wins, total_pugs FROM players WHERE discord_id = ?', ('10',)) == (1100, 1, 1)
+
+
+def test_legacy_pug_undo_then_rereport(db):
+    """A PUG settled before elo_history existed starts its history with an undo"""
+    pug_id = db.add_pug(['10'], ['20'], 'ctf', 1000, 1000, server_id=SERVER)
+    db.update_pug_winner(pug_id, 'red')  # Legacy result: no history rows
+
+    undo = {'10': {'elo': -16, 'wins': -1}, '20': {'elo': 16, 'losses': -1}}
+    db.settle_pug(pug_id, None, undo, SERVER)
+    assert db.get_pug_elo_changes(pug_id) == {}
+    assert db.get_recent_elo_changes('10', SERVER) == []
+
+    db.settle_pug(pug_id, 'blue', {'10': {'elo': -16, 'losses': 1}, '20': {'elo': 16, 'wins': 1}}, SERVER)
+    assert db.get_pug_elo_changes(pug_id) == {'10': {'pool': 'global', 'change': -16},
+                                             '20': {'pool': 'global', 'change': 16}}
+    assert [row['change'] for row in db.get_recent_elo_changes('10', SERVER)] == [-16]
+
+    db.settle_pug(pug_id, None, {'10': {'elo': 16, 'losses': -1}, '20': {'elo': -16, 'wins': -1}}, SERVER)
+    assert db.get_pug_elo_changes(pug_id) == {}
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Record Type Test Suite
+Tests that the __slots__ records DatabaseManager returns behave like the
+dicts they replace
+"""
+
+import pickle
+
+import pytest
+
+from database import DatabaseManager
+from records import Player
+
+SERVER = '1'
+
+
+def test_records_are_dict_compatible(tmp_path):
+    db = DatabaseManager(str(tmp_path / "records.db"))
+    db.register_player('10', SERVER, 'alice', 'Alice')
+    db.update_player_elo('10', SERVER, 1100)  # Pending in the store, overlaid on the row
+
+    player = db.get_player('10', SERVER)
+    assert isinstance(player, Player) and not hasattr(player, '__dict__')
+    assert player['elo'] == player.elo == 1100
+    assert player.get('display_name') == 'Alice' and player.get('nope', 5) == 5
+    assert 'peak_elo' in player and 'nope' not in player
+    assert dict(player) == player.to_dict() == player
+    assert db.get_all_players(SERVER) == [player]
+
+    player['elo'] = 1200
+    assert player.elo == 1200
+    with pytest.raises(KeyError):
+        player['rank'] = 1
+    with pytest.raises(KeyError):
+        player['rank']
+    assert pickle.loads(pickle.dumps(player)) == player
+
+    pug_id = db.add_pug(['10'], ['20'], 'ctf', 1000, 1000, server_id=SERVER)
+    pug = db.get_recent_pugs(SERVER, 1)[0]
+    assert (pug['number'], pug['red_team'], pug['blue_team'], pug['archived']) == (pug_id, ['10'], ['20'], False)
+    assert db.get_player_mode_elo('10', SERVER, 'ctf') == {'elo': 1000, 'wins': 0, 'losses': 0, 'peak_elo': 1000,
+                                                          'current_streak': 0, 'best_win_streak': 0,
+                                                          'best_loss_streak': 0}
+    db.close()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Snapshot Test Suite
+Tests online backups: complete copies including pending rating changes,
+and rotation down to the configured number of snapshots
+"""
+
+import sqlite3
+from datetime import datetime
+
+from database import DatabaseManager
+from snapshots import SnapshotManager
+
+
+class FakeClock:
+    """datetime stand-in whose now() advances one second per call"""
+    
+    def __init__(self):
+        self.ticks = 0
+    
+    def now(self):
+        self.ticks += 1
+        return datetime(2026, 1, 1, 0, 0, self.ticks)
+    
+    fromtimestamp = staticmethod(datetime.fromtimestamp)
+
+
+def test_snapshot_copies_live_database_and_rotates(tmp_path, monkeypatch):
+    db = DatabaseManager(str(tmp_path / "pug_data.db"), pooled=True)
+    db.register_player('1', 's')
+    db.update_player_elo('1', 's', 1234)  # Still pending in the RatingStore
+    snapshots = SnapshotManager(db, keep=2, pages=1, sleep=0)
+
+    # Distinct names without waiting for the clock
+    monkeypatch.setattr('snapshots.datetime', FakeClock())
+
+    infos = [snapshots.snapshot() for _ in range(3)]
+    db.close()
+
+    assert infos[0]['steps'] > 1 and infos[0]['size'] > 0
+    assert infos[2]['removed'] == [infos[0]['path']]
+    assert [s['path'] for s in snapshots.list_snapshots()] == [infos[2]['path'], infos[1]['path']]
+    assert not list(tmp_path.glob('backups/*.partial'))
+
+    conn = sqlite3.connect(infos[2]['path'])
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+    assert conn.execute("SELECT elo FROM players WHERE discord_id = '1'").fetchone()[0] == 1234
+    conn.close()
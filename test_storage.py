@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Storage Backend Test Suite
+Runs one scenario against the SQLite and in-memory backends and checks that
+every call returns the same result, so benchmarks on the memory backend
+exercise the same behaviour the bot has in production
+"""
+
+import inspect
+from datetime import datetime, timedelta
+
+import pytest
+
+from memory_storage import InMemoryDatabase
+from records import Record
+from storage import StorageBackend, open_storage
+
+SERVER = '111'
+
+# Wall-clock values that legitimately differ between two runs
+VOLATILE = {'timestamp', 'ts', 'ut2k4_last_scraped', 'duration'}
+
+
+def plain(value):
+    """Result with records turned into dicts and wall-clock fields dropped"""
+    if isinstance(value, (Record, dict)):
+        return {key: plain(item) for key, item in value.items() if key not in VOLATILE}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    return value
+
+
+def scenario(db):
+    """Drive every StorageBackend method; returns [(call, result)]"""
+    win = {'elo': 16, 'wins': 1, 'total_pugs': 1, 'streak': 'win'}
+    loss = {'elo': -16, 'losses': 1, 'total_pugs': 1, 'streak': 'loss'}
+    calls = [
+        ('register_player', '1', SERVER, 'alice', 'Alice'),
+        ('register_player', '2', SERVER, 'bob', 'Bob'),
+        ('register_player', '3', SERVER, 'carol', None),
+        ('register_player', '1500', SERVER, 'simulated'),
+        ('register_player', '1', SERVER),
+        ('get_player', '1', SERVER),
+        ('get_player', '404', SERVER),
+        ('player_exists', '2', SERVER),
+        ('find_player_by_name', SERVER, 'CAROL'),
+        ('find_player_by_name', SERVER, 'nobody'),
+        ('bulk_update_elos', SERVER, [('2', 1100), ('4', '950'), ('x', 1), ('4', 1)]),
+        ('bulk_merge_players', SERVER, [('1', 3), ('5', 2)], 'total_pugs', True, False, True),
+        ('bulk_merge_players', SERVER, [('1', 3), ('5', 2)], 'total_pugs', True, False),
+        ('update_player_elo', '3', SERVER, 980),
+        ('update_player_elo', '404', SERVER, 980),
+        ('set_player_peak_elo', '3', SERVER, 1300),
+        ('set_player_peak_elo', '404', SERVER, 1300),
+        ('update_player_total_pugs', '4', SERVER, 12),
+        ('update_ut2k4_info', '1', SERVER, 'AliceUT'),
+        ('add_game_mode', 'tam', 'TAM 2v2', 4),
+        ('add_game_mode', 'ctf', 'CTF 4v4', 8),
+        ('add_game_mode', 'TAM', 'TAM again', 4),
+        ('add_game_mode', 'odd', 'Odd', 3),
+        ('get_all_game_modes',),
+        ('get_game_mode', 'ctf'),
+        ('add_mode_alias', 't', 'tam'),
+        ('add_mode_alias', 't', 'tam'),
+        ('add_mode_alias', 'ctf', 'tam'),
+        ('add_mode_alias', 'x', 'nomode'),
+        ('get_mode_aliases', 'tam'),
+        ('resolve_mode_alias', 't'),
+        ('set_per_mode_elo_for_mode', 'ctf', True),
+        ('set_mode_elo_prefix', 'ctf', 'CTF'),
+        ('set_tiebreaker_enabled', 'tam', False),
+        ('set_tiebreaker_enabled', 'nomode', False),
+        ('is_tiebreaker_enabled', 'tam'),
+        ('is_per_mode_elo_enabled', 'ctf'),
+        ('get_effective_mode_for_elo', 'ctf'),
+        ('get_modes_with_per_mode_elo',),
+        ('validate_mode_for_maps', 'ctf'),
+        ('set_scraping_enabled', True),
+        ('is_scraping_enabled',),
+        ('add_pug', ['1', '2'], ['3', '4'], 'tam', 1050, 965, None, '1', '3', SERVER),
+        ('settle_pug', 1, 'red', {'1': win, '2': win, '3': loss, '4': loss}, SERVER),
+        ('add_pug', [1, 2], [3, 4], 'ctf', 1000, 1000, 'CTF-Face', 1, 3, SERVER),
+        ('settle_pug', 2, 'blue', {'1': loss, '2': loss, '3': win, '4': win}, SERVER, 'ctf'),
+        ('settle_pug', 2, None, {'1': {**win, 'elo': 16, 'wins': 0, 'losses': -1, 'total_pugs': -1},
+                                 '3': {**loss, 'elo': -16, 'wins': -1, 'losses': 0, 'total_pugs': -1}},
+         SERVER, 'ctf'),
+        ('add_pug', ['2'], ['404'], 'tam', 1000, 1000, None, None, None, '222'),
+        ('delete_pug', 3),
+        ('restore_pug', 3),
+        ('delete_pug', 3),
+        ('get_pug_elo_changes', 1),
+        ('get_pug_elo_changes', 2),
+        ('get_recent_elo_changes', '1', SERVER),
+        ('get_recent_elo_changes', '2', SERVER, 'ctf'),
+        ('get_player_elo', '1', SERVER),
+        ('get_player_elo', '1', SERVER, 'ctf'),
+        ('get_player_elo', '404', SERVER),
+        ('get_player_elos', ['1', '2', '404'], SERVER),
+        ('get_player_elos', [1, '5', '404'], SERVER, 'ctf'),
+        ('get_player_elos', [], SERVER),
+        ('get_player_mode_elo', '2', SERVER, 'ctf'),
+        ('get_player_mode_elo', '5', SERVER, 'ctf'),
+        ('set_player_mode_elo', '5', SERVER, 'tam', 1200),
+        ('set_player_mode_elo', '5', SERVER, 'nomode', 1200),
+        ('get_all_player_mode_elos', '5', SERVER),
+        ('get_server_counters', SERVER),
+        ('get_server_counters', '222'),
+        ('get_recent_pugs', SERVER, 10),
+        ('get_recent_pugs', None, 2),
+        ('iter_pugs', None, None, 2),
+        ('get_player_pugs', '3', SERVER),
+        ('get_player_pugs', '3', SERVER, 10, 2, True),
+        ('get_leaderboard_position', '1', SERVER),
+        ('get_leaderboard_position', '1500', SERVER),
+        ('get_leaderboard_position', '2', SERVER, 'ctf'),
+        ('archive_pugs', 30),
+        ('add_timeout', '1', datetime.now() + timedelta(minutes=5)),
+        ('add_timeout', '2', datetime.now() - timedelta(minutes=5)),
+        ('is_timed_out', '2'),
+        ('add_pug_admin', '1', SERVER),
+        ('add_pug_admin', '2', SERVER),
+        ('add_pug_admin', '1', SERVER),
+        ('remove_pug_admin', '2', SERVER),
+        ('is_pug_admin', '1', SERVER),
+        ('get_pug_admins', SERVER),
+        ('add_map', SERVER, 'CTF', 'CTF-Face'),
+        ('add_map', SERVER, 'ctf', 'CTF-Bridge'),
+        ('add_map', SERVER, 'ctf', 'CTF-Face'),
+        ('add_map', SERVER, 'tam', 'DM-Rankin'),
+        ('get_maps_for_mode', SERVER, 'ctf'),
+        ('get_all_maps_grouped', SERVER),
+        ('find_map_prefixes', SERVER, 'T'),
+        ('remove_map', SERVER, 'ctf', 'ctf-face'),
+        ('remove_map', SERVER, 'ctf', 'CTF-Face'),
+        ('add_map_to_cooldown', SERVER, 'ctf', 'CTF-Bridge'),
+        ('get_maps_on_cooldown', SERVER, 'ctf'),
+        ('clear_old_cooldowns', SERVER, 'ctf', 0),
+        ('get_maps_on_cooldown', SERVER, 'ctf'),
+        ('remove_all_maps', SERVER, 'ctf'),
+        ('remove_mode_alias', 't'),
+        ('remove_mode_alias', 't'),
+        ('remove_mode', 'tam'),
+        ('remove_mode', 'tam'),
+        ('reset_player_stats', SERVER),
+        ('delete_player', '2', SERVER),
+        ('delete_players', SERVER, ['3', '404']),
+        ('get_all_players', SERVER),
+        ('delete_players', SERVER),
+        ('get_all_players',),
+        ('flush',),
+    ]
+    results = []
+    for name, *args in calls:
+        result = getattr(db, name)(*args)
+        if inspect.isgenerator(result):
+            result = list(result)
+        results.append(((name, *args), plain(result)))
+    return results
+
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def backend(request, tmp_path):
+    db = open_storage(request.param, str(tmp_path / "pug_data.db"))
+    yield db
+    db.close()
+
+
+def test_backends_implement_the_protocol(backend):
+    assert isinstance(backend, StorageBackend)
+    assert backend.persistent == (not isinstance(backend, InMemoryDatabase))
+
+
+def test_memory_backend_matches_sqlite(tmp_path):
+    sqlite_db = open_storage('sqlite', str(tmp_path / "pug_data.db"))
+    expected = scenario(sqlite_db)
+    sqlite_db.close()
+
+    actual = scenario(InMemoryDatabase())
+    for (call, want), (_, got) in zip(expected, actual):
+        assert got == want, call
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        open_storage('postgres')
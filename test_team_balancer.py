@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Team Balancer Test Suite
+Checks that the meet-in-the-middle search picks exactly the split the
+brute-force autopick loop picks, including ties and the perfect-balance
+shortcut, that 12v12 stays fast, that a time budget still yields a valid
+split, and that the reroll alternatives are the next best distinct splits
+"""
+
+import random
+import time
+from itertools import combinations
+
+import pytest
+
+import team_balancer
+from team_balancer import (_first_best, balance, balance_top, best_split, brute_force_split, greedy_split,
+                           optimal_splits, split_score)
+
+
+def rating_sets(seed, count):
+    """Random queues: continuous ratings, few distinct ratings (many ties) and half-points"""
+    rng = random.Random(seed)
+    for trial in range(count):
+        per_team = rng.randint(1, 7)
+        kind = trial % 3
+        if kind == 0:
+            elos = [rng.uniform(700, 1500) for _ in range(2 * per_team)]
+        elif kind == 1:
+            elos = [float(rng.choice([950, 984, 1000, 1000, 1016, 1100])) for _ in range(2 * per_team)]
+        else:
+            elos = [rng.randint(900, 1100) + rng.choice([0, 0.25, 0.5]) for _ in range(2 * per_team)]
+        yield per_team, elos
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_brute_force(seed):
+    for per_team, elos in rating_sets(seed, 150):
+        expected = brute_force_split(elos, per_team)
+        assert best_split(elos, per_team) == expected, elos
+        assert _first_best(elos, optimal_splits(elos, per_team)) == expected, elos
+
+
+def test_vectorized_scores_match_brute_force():
+    pytest.importorskip('numpy')
+    for per_team, elos in rating_sets(3, 60):
+        red, diff, win_prob_diff, variance = team_balancer.score_splits(elos, per_team)
+        # Player 0 always red: half of the C(2k, k) splits
+        assert len(red) * 2 == len(list(combinations(range(2 * per_team), per_team)))
+        for row, scores in zip(red, zip(diff, win_prob_diff, variance)):
+            assert scores == pytest.approx(split_score(elos, tuple(row.tolist())), abs=1e-6)
+        chosen = _first_best(elos, team_balancer.vectorized_optimal_splits(elos, per_team))
+        assert chosen == brute_force_split(elos, per_team), elos
+
+
+def test_works_without_numpy(monkeypatch):
+    monkeypatch.setattr(team_balancer, 'np', None)
+    for per_team, elos in rating_sets(4, 30):
+        assert best_split(elos, per_team) == brute_force_split(elos, per_team), elos
+
+
+def test_perfect_balance_takes_the_first_split():
+    # Variance would prefer {1000, 1000} vs {900, 1100}, but the first exact tie wins
+    elos = [900.0, 1000.0, 1100.0, 1000.0]
+    assert best_split(elos, 2) == brute_force_split(elos, 2) == (0, 2)
+    assert split_score(elos, (0, 2))[0] == 0
+
+
+def test_identical_ratings():
+    assert best_split([1000.0] * 24, 12) == tuple(range(12))
+
+
+def test_twelve_a_side_is_fast():
+    rng = random.Random(7)
+    elos = [rng.uniform(700, 1500) for _ in range(24)]
+    start = time.perf_counter()
+    red = best_split(elos, 12)
+    assert time.perf_counter() - start < 1.0
+    assert len(red) == 12
+
+
+def test_balance_without_deadline_is_optimal():
+    for per_team, elos in rating_sets(5, 30):
+        assert balance(elos, per_team) == (brute_force_split(elos, per_team), True), elos
+
+
+def test_balance_past_deadline_returns_best_so_far():
+    rng = random.Random(8)
+    elos = [rng.uniform(700, 1500) for _ in range(32)]
+    red, optimal = balance(elos, 16, deadline=time.monotonic())
+    assert not optimal
+    assert red == greedy_split(elos, 16)
+
+    # Cut short after pass 1 has started: never worse than the greedy split
+    red, optimal = balance(elos, 16, deadline=time.monotonic() + 0.05)
+    assert len(set(red)) == 16 and all(0 <= i < 32 for i in red)
+    assert split_score(elos, red)[0] <= split_score(elos, greedy_split(elos, 16))[0] + 1e-6
+
+
+def test_greedy_split_is_valid():
+    for per_team, elos in rating_sets(6, 30):
+        red = greedy_split(elos, per_team)
+        assert len(red) == per_team and list(red) == sorted(set(red))
+
+
+@pytest.mark.parametrize('vectorized', [True, False])
+def test_top_splits_are_the_next_best(monkeypatch, vectorized):
+    if vectorized:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(team_balancer, 'np', None)
+    for per_team, elos in rating_sets(9, 60):
+        splits, optimal = balance_top(elos, per_team, 4)
+        assert optimal and splits[0] == brute_force_split(elos, per_team), elos
+
+        # One split per pair of mirror images, player 0 on red
+        everyone = set(range(2 * per_team))
+        distinct = [red for red in combinations(range(2 * per_team), per_team) if 0 in red]
+        assert len(splits) == min(4, len(distinct))
+        teams = [frozenset(red) for red in splits] + [frozenset(everyone - set(red)) for red in splits]
+        assert len(set(teams)) == 2 * len(splits)
+
+        best = splits[0] if 0 in splits[0] else tuple(sorted(everyone - set(splits[0])))
+        expected = sorted(split_score(elos, red) for red in distinct if red != best)[:len(splits) - 1]
+        got = [split_score(elos, red) for red in splits[1:]]
+        assert [score[0] for score in got] == pytest.approx([score[0] for score in expected], abs=1e-6), elos